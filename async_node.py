@@ -0,0 +1,287 @@
+from __future__ import annotations
+import asyncio, concurrent.futures, threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+try:
+    import redis.asyncio as aioredis
+except Exception:
+    aioredis = None
+
+from messages import Message
+from node import RouterNode
+from nodelog import flush as flush_logs
+from tcp_pool import FrameReader, encode_frame, LEGACY_START
+
+class AsyncSender:
+    """
+    Outbound queue for one neighbor on the event loop, with the NeighborSender
+    policy: control traffic is never dropped and goes first; data is bounded to
+    `maxlen` (0: unbounded) and drops the oldest entry when full.
+    """
+    def __init__(self, maxlen: int = 1024):
+        self.maxlen = int(maxlen)
+        self._data: Deque[Any] = deque()
+        self._ctrl: Deque[Any] = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._data) + len(self._ctrl)
+
+    def put(self, wire: Any, control: bool) -> None:
+        if control:
+            self._ctrl.append(wire)
+        else:
+            if 0 < self.maxlen <= len(self._data):
+                self._data.popleft()
+                self.dropped += 1
+            self._data.append(wire)
+        self._ready.set()
+
+    async def get(self) -> Any:
+        while not self._ctrl and not self._data:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._ctrl.popleft() if self._ctrl else self._data.popleft()
+
+class SharedLoop:
+    """
+    One event loop in one background thread that many AsyncRouterNodes run on
+    (SharedLoop.start(nodes) or node.start(loop=...)), e.g. hundreds of
+    transport="memory" nodes in a process without a thread per node.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="shared-loop", daemon=True)
+        self._thread.start()
+
+    def start(self, nodes) -> None:
+        """Start nodes on this loop together: one wait for all of them, not one per node."""
+        for n in nodes:
+            n._started = threading.Event()
+            n._run_future = asyncio.run_coroutine_threadsafe(n.run(), self.loop)
+        for n in nodes:
+            n._started.wait(timeout=5.0)
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2.0)
+
+class AsyncRouterNode(RouterNode):
+    """
+    RouterNode driven by a single asyncio event loop instead of polling threads.
+    Receive, per-neighbor send, hello and routing are tasks on the same loop;
+    Flooding/LSR/DVR/dijkstra are reused unchanged (their synchronous node._send
+    calls only enqueue).
+    """
+    def __init__(self, *args, **kwargs):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._aqueues: Dict[str, AsyncSender] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._pubsub = None
+        self._awake: Optional[asyncio.Event] = None
+        self._run_future: Optional[concurrent.futures.Future] = None
+        super().__init__(*args, **kwargs)
+
+    def _connect_redis(self):
+        if aioredis is None:
+            raise RuntimeError("Install redis: pip install redis")
+        # connection is opened on the event loop in _redis_reader
+        self._redis = None
+        self._pubsub = None
+
+    # ========= Sending ==========
+    def _send(self, target_node: str, wire: Message | str):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._enqueue(target_node, wire)
+        else:
+            loop.call_soon_threadsafe(self._enqueue, target_node, wire)
+
+    def _enqueue(self, target_node: str, wire: Message | str) -> None:
+        q = self._aqueues.get(target_node)
+        if q is None:
+            q = self._aqueues[target_node] = AsyncSender(self.out_queue)
+            self._tasks.append(self._loop.create_task(self._writer(target_node, q)))
+        q.put(wire, not (isinstance(wire, Message) and wire.type == "message"))
+
+    async def _writer(self, target_node: str, q: AsyncSender) -> None:
+        writer: Optional[asyncio.StreamWriter] = None
+        while self.running:
+            item = await q.get()
+            wire = self._encode_for(target_node, item)
+            if self.transport == "memory":
+                try:
+                    self._net.send(self.node_id, target_node, wire)
+                except ConnectionError as e:
+                    self._log("WARN", "memory send error to %s: %s", target_node, e)
+                    self._on_send_failure(target_node, item)
+                continue
+            if self.transport == "redis":
+                try:
+                    await self._redis.publish(str(self.nodes_map[target_node]), wire)
+                except Exception as e:
+                    self._log("WARN", "Redis publish error to %s: %s", target_node, e)
+                continue
+            host, port = self.nodes_map[target_node]
+            if self.tcp_legacy:
+                data = wire.encode("utf-8") if isinstance(wire, str) else wire
+            else:
+                data = encode_frame(wire)
+            for attempt in (0, 1):
+                try:
+                    if writer is None or writer.is_closing():
+                        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 1.2)
+                    writer.write(data)
+                    await writer.drain()
+                    if self.tcp_legacy:
+                        writer.close(); writer = None
+                    break
+                except Exception as e:
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+                    if attempt:
+                        self._log("WARN", "TCP send error to %s: %s", target_node, e)
+                        self._on_send_failure(target_node, item)
+        if writer is not None:
+            writer.close()
+
+    # ========= Receiving ==========
+    def _handle(self, data: bytes) -> None:
+        try:
+            msg = self._decode(data)
+        except Exception:
+            return
+        self._process_msg(msg)
+
+    def _mem_receive(self, data) -> None:
+        # called from the sender's thread (or the memnet scheduler)
+        try:
+            self._loop.call_soon_threadsafe(self._handle, data)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def _serve_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            first = await reader.read(65536)
+            if first[:1] in LEGACY_START:
+                self._handle(first + await reader.read())
+                return
+            frames = FrameReader()
+            data = first
+            while data and self.running:
+                for frame in frames.feed(data):
+                    self._handle(frame)
+                data = await reader.read(65536)
+        except asyncio.CancelledError:
+            pass  # loop shutting down
+        except Exception as e:
+            self._log("DEBUG", "TCP reader closed: %s", e, tag="PROC")
+        finally:
+            writer.close()
+
+    async def _redis_reader(self) -> None:
+        self._redis = aioredis.Redis(host=self._redis_host, port=self._redis_port, password=self._redis_pwd)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self._channel)
+        while self.running:
+            try:
+                async for message in self._pubsub.listen():
+                    if not self.running:
+                        break
+                    if message.get("type") == "message":
+                        self._handle(message.get("data"))
+            except Exception as e:
+                self._log("WARN", "Redis listen error: %s", e)
+                await asyncio.sleep(0.2)
+
+    # ========= Periodic tasks ==========
+    def _kick_routing(self) -> None:
+        if self._awake is not None:
+            self._loop.call_soon_threadsafe(self._awake.set)
+
+    async def _routing_task(self) -> None:
+        self._awake = asyncio.Event()
+        while self.running:
+            self._awake.clear()
+            try:
+                self._routing_tick()
+            except Exception as e:
+                self._log("WARN", "routing_loop error: %s", e)
+            try:
+                await asyncio.wait_for(self._awake.wait(), self._routing_delay())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _hello_task(self) -> None:
+        while self.running:
+            self._hello_tick()
+            await asyncio.sleep(self.hello_period)
+
+    # ========= Lifecycle =========
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.running = True
+        if self.transport == "tcp":
+            self._server = await asyncio.start_server(self._serve_conn, self._host, self._port,
+                                                      reuse_address=True, backlog=1024)
+            addr = f"TCP {self._host}:{self._port}"
+        elif self.transport == "memory":
+            self._net.attach(self.node_id, self._mem_receive)
+            addr = "memory"
+        else:
+            self._tasks.append(self._loop.create_task(self._redis_reader()))
+            addr = f"Redis ch={self._channel}"
+        self._tasks.append(self._loop.create_task(self._routing_task()))
+        self._tasks.append(self._loop.create_task(self._hello_task()))
+        self._start_metrics()
+        self._log("INFO", "Started (%s, asyncio) %s neighbors=%s", self.mode, addr, sorted(self.neighbors), tag="start")
+        self._started.set()
+        while self.running:
+            await asyncio.sleep(0.2)
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+        if self.transport == "memory":
+            self._net.detach(self.node_id)
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.unsubscribe()
+            except Exception:
+                pass
+
+    def start(self, loop: Optional[SharedLoop] = None):
+        """Run in a background thread with its own event loop, or on a SharedLoop (same contract as RouterNode.start)."""
+        if loop is not None:
+            loop.start([self])
+            return
+        self._started = threading.Event()
+        self._t_loop = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._t_loop.start()
+        self._started.wait(timeout=5.0)
+
+    def stop(self):
+        self.running = False
+        t = getattr(self, "_t_loop", None)
+        if t is not None:
+            t.join(timeout=2.0)
+        if self._run_future is not None:
+            try:
+                self._run_future.result(timeout=2.0)
+            except Exception:
+                pass
+        self._stop_metrics()
+        if self._ack_pool is not None:
+            self._ack_pool.close()
+        flush_logs()
@@ -0,0 +1,60 @@
+"""One blackholed neighbor must not slow flooding to the others (per-neighbor queues vs inline sends)."""
+from __future__ import annotations
+import argparse, threading, time
+from common import free_port, report
+from messages import make_msg
+from node import RouterNode
+from tcp_pool import ConnectionPool
+
+TOPO = {"A": {"B": 1.0, "X": 1.0}, "B": {"A": 1.0}, "X": {"A": 1.0}}
+
+class Node(RouterNode):
+    blackhole_delay = 0.0
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.got = 0
+        self.expect = 0
+        self.done = threading.Event()
+
+    def _deliver(self, target_node, wire):
+        if target_node == "X":
+            time.sleep(self.blackhole_delay)  # connect timeout to a host that drops SYNs
+            return
+        super()._deliver(target_node, wire)
+
+    def on_data_local(self, msg):
+        self.got += 1
+        if self.got >= self.expect:
+            self.done.set()
+
+def run(out_queue: int, n_msgs: int, delay: float) -> dict:
+    nodes_map = {nid: ("127.0.0.1", free_port()) for nid in TOPO}
+    Node.blackhole_delay = delay
+    a = Node("A", nodes_map, TOPO, log_level="ERROR", hello_period=3600, out_queue=out_queue)
+    b = Node("B", nodes_map, TOPO, log_level="ERROR", hello_period=3600, out_queue=out_queue)
+    a.start(); b.start()
+    time.sleep(0.3)
+    b.expect = n_msgs
+    client = ConnectionPool(lambda k: nodes_map[k])
+    t0 = time.perf_counter()
+    for i in range(n_msgs):
+        client.send("A", make_msg("flooding", "data", "A", "B", 8, f"m{i}"))
+    b.done.wait(timeout=n_msgs * delay + 10)
+    dt = time.perf_counter() - t0
+    depth = a.outq.stats().get("X", {}) if a.outq else {}
+    client.close(); a.stop(); b.stop()
+    return {"out_queue": out_queue, "msgs": n_msgs, "blackhole_delay_s": delay, "delivered_B": b.got,
+            "secs_to_B": dt, "X_depth": depth.get("depth", "-"), "X_dropped": depth.get("dropped", "-")}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--msgs", type=int, default=50)
+    ap.add_argument("--delay", type=float, default=0.1)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(0, args.msgs, args.delay), run(1024, args.msgs, args.delay)]
+    report("flood delivery to B with blackholed neighbor X", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""JSON vs negotiated binary codec: encode/decode cost and wire size per message type."""
+from __future__ import annotations
+import argparse, json
+from common import report, timed
+from codec import BinaryCodec
+from messages import Message, normalize_incoming
+
+NAMES = [f"sec10.grupopares.node{i:02d}" for i in range(8)]
+
+def samples() -> dict[str, Message]:
+    a, b = NAMES[0], NAMES[1]
+    return {
+        "hello": Message("hello", a, b, 1, "HELLO", alg="lsr", hdr_list=False, hdr={"codec": "bin1:5f3a9c21"}),
+        "echo": Message("echo", b, a, 1, {"seq": 12, "ts": 1724251234.123}, hdr={"reply_to": "4b0d3c1e-8a51-4a3f-9a7e-0d1c2b3a4f5e"}),
+        "info(lsr)": Message("info", a, "*", 16, None, alg="lsr", hdr_list=False,
+                             extra={"seq_num": 42, "neighbors": NAMES[1:4]}),
+        "message(100B)": Message("message", a, NAMES[5], 8, "x" * 100, alg="flooding", prev=b),
+        "message(10kB)": Message("message", a, NAMES[5], 8, "x" * 10_000, alg="flooding", prev=b),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    codec = BinaryCodec(NAMES)
+    rows = []
+    for name, m in samples().items():
+        js = m.to_wire().encode("utf-8")
+        bn = codec.encode(m)
+        assert json.loads(codec.decode(bn).to_wire()) == json.loads(js), name
+        n = args.n
+        rows.append({
+            "type": name, "json_B": len(js), "bin_B": len(bn), "size_ratio": len(bn) / len(js),
+            "json_enc_us": timed(lambda: [m.to_wire().encode("utf-8") for _ in range(n)], 3) / n * 1e6,
+            "bin_enc_us": timed(lambda: [codec.encode(m) for _ in range(n)], 3) / n * 1e6,
+            "json_dec_us": timed(lambda: [normalize_incoming(js) for _ in range(n)], 3) / n * 1e6,
+            "bin_dec_us": timed(lambda: [codec.decode(bn) for _ in range(n)], 3) / n * 1e6,
+        })
+    report("wire codec", rows)
+
+if __name__ == "__main__":
+    main()
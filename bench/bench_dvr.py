@@ -0,0 +1,131 @@
+"""DVR convergence and control bytes: triggered partial updates vs periodic full tables (virtual clock)."""
+from __future__ import annotations
+import argparse, heapq, itertools
+from common import ROOT, report
+from dijkstra import dijkstra
+from dvr import DVR, INF
+from node import RouterNode
+from run_node import load_topo
+from topogen import grid, random_graph
+
+LATENCY = 0.01  # one-way per link, virtual seconds
+
+class PeriodicDVR(DVR):
+    """The previous behaviour: whole table to every neighbor each tick, no split horizon."""
+    def should_advertise(self) -> bool:
+        return self._now() - self.last_adv >= 1.0
+
+    def advertise(self, node) -> None:
+        self.last_adv = self._now() - self.refresh - 1  # force full
+        super().advertise(node)
+        self.last_adv = self._now()
+
+    def _vector_for(self, node, n, dests):
+        return [[d, self.dv_self.get(d, INF)] for d in dests]
+
+class Net:
+    def __init__(self, topo, dvr_cls, dv_throttle):
+        self.t = 0.0
+        self.q = []
+        self.seq = itertools.count()
+        self.bytes = self.msgs = 0
+        self.down = set()
+        nodes_map = {n: ("127.0.0.1", 0) for n in topo}
+        self.nodes = {}
+        for nid in topo:
+            node = SimNode(nid, nodes_map, topo, mode="dvr", log_level="ERROR", out_queue=0,
+                           dv_throttle=dv_throttle)
+            node.net = self
+            node.dvr = dvr_cls(nid, trig=node.dvr.trig)
+            node.dvr._now = lambda: self.t
+            self.nodes[nid] = node
+            self.at(0.0, node._tick)
+
+    def at(self, t, fn, *a):
+        heapq.heappush(self.q, (t, next(self.seq), fn, a))
+
+    def run_until(self, t_end, done):
+        last_check = -1.0
+        while self.q and self.q[0][0] <= t_end:
+            t, _, fn, a = heapq.heappop(self.q)
+            self.t = t
+            fn(*a)
+            if t - last_check >= 0.01:
+                last_check = t
+                if done():
+                    return t
+        return None
+
+class SimNode(RouterNode):
+    def _send(self, target, wire):
+        if frozenset((self.node_id, target)) in self.net.down:
+            return
+        self.net.bytes += len(wire.to_wire().encode())
+        self.net.msgs += 1
+        self.net.at(self.net.t + LATENCY, self.net.nodes[target].dvr.on_receive_info, self.net.nodes[target], wire)
+
+    def is_neighbor_active(self, n):
+        return frozenset((self.node_id, n)) not in self.net.down
+
+    def _kick_routing(self):
+        self.net.at(self.net.t, self._tick_once)
+
+    def _tick_once(self):
+        # like routing_loop after a wake-up: tick, then sleep until the throttle is due
+        self._routing_tick()
+        delay = self._routing_delay()
+        if delay < 1.0:
+            self.net.at(self.net.t + max(delay, 1e-3), self._tick_once)
+
+    def _tick(self):
+        self._routing_tick()
+        delay = self._routing_delay()
+        self.net.at(self.net.t + max(delay, 1e-3), self._tick)
+
+def converged(net, topo):
+    live = {u: {v: w for v, w in n.items() if frozenset((u, v)) not in net.down} for u, n in topo.items()}
+    def check():
+        for nid, node in net.nodes.items():
+            ref = dijkstra(live, nid).dist
+            dv = node.dvr.dv_self
+            for d, c in ref.items():
+                got = dv.get(d, INF)
+                if (c == float("inf") and got < INF) or (c != float("inf") and abs(got - c) > 1e-6):
+                    return False
+        return True
+    return check
+
+def run(name, topo, cls, label, limit, dv_throttle):
+    net = Net(topo, cls, dv_throttle)
+    t_up = net.run_until(limit, converged(net, topo))
+    b_up, m_up = net.bytes, net.msgs
+    # fail a link on a shortest path near the middle and measure re-convergence
+    u = sorted(topo)[len(topo) // 2]
+    v = sorted(topo[u])[0]
+    net.down.add(frozenset((u, v)))
+    t0 = net.t
+    net.bytes = net.msgs = 0
+    t_fail = net.run_until(t0 + limit, converged(net, topo))
+    fmt = lambda t, base: round(t - base, 3) if t is not None else f">{limit:g}"
+    return {"topo": name, "nodes": len(topo), "dvr": label, "conv_s": fmt(t_up, 0.0),
+            "ctrl_kB": round(b_up / 1024, 1), "msgs": m_up, "fail_conv_s": fmt(t_fail, t0),
+            "fail_ctrl_kB": round(net.bytes / 1024, 1)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=float, default=30.0, help="virtual seconds to wait for convergence")
+    ap.add_argument("--dv-throttle", default="0,0.05,1", help="initial,hold,max_hold for triggered updates")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    topos = [("topo.json", load_topo(str(ROOT / "config" / "topo.json"))),
+             ("grid 8x8", grid(8, 8, 1, 10, seed=1)),
+             ("random 150", random_graph(150, 4, seed=2))]
+    th = tuple(float(x) for x in args.dv_throttle.split(","))
+    rows = []
+    for name, topo in topos:
+        for cls, label in ((PeriodicDVR, "periodic full"), (DVR, "triggered+poison")):
+            rows.append(run(name, topo, cls, label, args.limit, th))
+    report("DVR convergence (virtual time, 10 ms links)", rows)
+
+if __name__ == "__main__":
+    main()
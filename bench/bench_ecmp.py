@@ -0,0 +1,84 @@
+"""ECMP vs single next hop: per-link load for many flows across diamond/grid topologies (in-process network)."""
+from __future__ import annotations
+import argparse
+from collections import Counter, deque
+from common import report
+from messages import Message
+from node import RouterNode
+from topogen import grid
+
+DIAMOND = {"A": {"B": 1.0, "C": 1.0}, "B": {"A": 1.0, "D": 1.0}, "C": {"A": 1.0, "D": 1.0},
+           "D": {"B": 1.0, "C": 1.0}}
+
+class Net:
+    def __init__(self, topo, mode, ecmp):
+        self.q = deque()
+        self.load = Counter()
+        self.paths = {}
+        self.delivered = 0
+        nodes_map = {n: ("127.0.0.1", 0) for n in topo}
+        self.nodes = {nid: SimNode(nid, nodes_map, topo, mode=mode, log_level="ERROR", out_queue=0, ecmp=ecmp,
+                                   spf_throttle=(0, 0, 0), dv_throttle=(0, 0, 0)) for nid in topo}
+        for node in self.nodes.values():
+            node.net = self
+        if mode == "lsr":
+            # LSDB straight from the topology; this bench is about forwarding, not flooding LSAs
+            for node in self.nodes.values():
+                for origin, nbrs in topo.items():
+                    node.lsr.graph.set_row(origin, nbrs)
+                node.lsr._mark_changed()
+                node._routing_tick()
+        else:
+            for _ in range(3 * len(topo)):
+                for node in self.nodes.values():
+                    node._routing_tick()
+                self.drain()
+
+    def drain(self):
+        while self.q:
+            src, dst, msg = self.q.popleft()
+            if msg.type == "message":
+                self.load[(src, dst)] += 1
+                self.paths.setdefault(msg.hdr.get("flow"), []).append((src, dst))
+            self.nodes[dst]._process_msg(msg)
+
+class SimNode(RouterNode):
+    def _send(self, target, wire):
+        self.net.q.append((self.node_id, target, wire))
+
+    def _broadcast_wire(self, wire):
+        pass  # LSR LSAs are not needed here (LSDB is preloaded)
+
+    def on_data_local(self, msg):
+        self.net.delivered += 1
+
+def run(name, topo, src, dst, mode, ecmp, flows, repeat=3):
+    net = Net(topo, mode, ecmp)
+    node = net.nodes[src]
+    for r in range(repeat):
+        for f in range(flows):
+            m = Message("message", src, dst, 32, f"f{f}-{r}", alg=mode, hdr={"flow": f})
+            node._process_msg(m)
+            net.drain()
+    # a flow must keep one path across its packets (ordering)
+    per_flow = {f: tuple(p) for f, p in net.paths.items()}
+    stable = all(len(p) % repeat == 0 and p[:len(p) // repeat] * repeat == p for p in per_flow.values())
+    first = {l: c for l, c in net.load.items() if l[0] == src}
+    return {"topo": name, "mode": mode, "ecmp": ecmp, "flows": flows, "delivered": net.delivered,
+            "links_used": len(net.load), "first_hop_split": "/".join(str(c) for _, c in sorted(first.items())),
+            "max_link_load": max(net.load.values()), "flows_keep_path": stable}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--flows", type=int, default=400)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    for name, topo, src, dst in (("diamond", DIAMOND, "A", "D"), ("grid 5x5", grid(5, 5), "r0c0", "r4c4")):
+        for mode in ("lsr", "dvr"):
+            for ecmp in (False, True):
+                rows.append(run(name, topo, src, dst, mode, ecmp, args.flows))
+    report("per-link load, many flows src->dst (lower max_link_load = more throughput)", rows)
+
+if __name__ == "__main__":
+    main()
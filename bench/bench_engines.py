@@ -0,0 +1,71 @@
+"""Threaded RouterNode vs AsyncRouterNode: throughput and latency on the A–D line."""
+from __future__ import annotations
+import argparse, threading, time
+from common import free_port, report
+from async_node import AsyncRouterNode
+from messages import make_msg, payload_value
+from node import RouterNode
+from tcp_pool import ConnectionPool
+
+TOPO = {"A": {"B": 1.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"B": 1.0, "D": 1.0}, "D": {"C": 1.0}}
+
+def make_counting(base):
+    class Counting(base):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            self.lat: list[float] = []
+            self.expect = 0
+            self.done = threading.Event()
+
+        def on_data_local(self, msg):
+            self.lat.append(time.perf_counter() - float(payload_value(msg)))
+            if len(self.lat) >= self.expect:
+                self.done.set()
+    return Counting
+
+def pct(xs: list[float], p: float) -> float:
+    if not xs:
+        return float("nan")
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+def run(engine: str, n_msgs: int, clients: int) -> dict:
+    cls = make_counting(AsyncRouterNode if engine == "asyncio" else RouterNode)
+    nodes_map = {nid: ("127.0.0.1", free_port()) for nid in TOPO}
+    nodes = {nid: cls(nid, nodes_map, TOPO, mode="flooding", log_level="ERROR",
+                      transport="tcp", hello_period=3600) for nid in TOPO}
+    for n in nodes.values():
+        n.start()
+    time.sleep(0.3)
+    nodes["D"].expect = n_msgs
+    per_client = n_msgs // clients
+
+    def client():
+        pool = ConnectionPool(lambda k: nodes_map[k])
+        for _ in range(per_client):
+            pool.send("A", make_msg("flooding", "data", "A", "D", 8, repr(time.perf_counter())))
+        pool.close()
+
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=client) for _ in range(clients)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    nodes["D"].done.wait(timeout=60.0)
+    dt = time.perf_counter() - t0
+    for n in nodes.values():
+        n.stop()
+    lat = nodes["D"].lat
+    return {"engine": engine, "clients": clients, "msgs": per_client * clients, "delivered": len(lat),
+            "msgs_per_s": len(lat) / dt, "p50_ms": pct(lat, 0.5) * 1e3, "p99_ms": pct(lat, 0.99) * 1e3}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--msgs", type=int, default=2000)
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 16])
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(engine, args.msgs, c) for c in args.clients for engine in ("threads", "asyncio")]
+    report("engine comparison (A-D flooding, tcp)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""FIB lookups vs routing-table lookups on the forwarding path, with the routing thread swapping tables."""
+from __future__ import annotations
+import argparse, hashlib, random, threading, time
+from common import report, timed
+from dijkstra import build_routing_table, dijkstra
+from messages import Message
+from node import RouterNode
+from topogen import random_graph
+
+def old_next_hop(node, msg):
+    # previous data path: wire id -> name, then the dict-of-dicts routing table
+    dst = node._from_wire_id(msg.dst)
+    entry = node.routing_table.get(dst)
+    if not entry:
+        return None
+    hops = entry.get("next_hops") or ([entry["next_hop"]] if entry.get("next_hop") else [])
+    hops = [h for h in hops if h != node.node_id and node.is_neighbor_active(h)]
+    if not hops:
+        b = entry.get("backup")
+        return b if b and node.is_neighbor_active(b) else None
+    if len(hops) == 1:
+        return hops[0]
+    h = hashlib.blake2b(node._flow_key(msg), digest_size=8, key=node._flow_seed).digest()
+    return hops[int.from_bytes(h, "little") % len(hops)]
+
+def fib_next_hop(node, msg):
+    entry = node.fib.get(msg.dst)
+    return node.next_hop_for(msg, entry) if entry is not None else None
+
+def tables(topo, me, k):
+    # k versions of the table (link costs perturbed), cycled by the writer
+    rng = random.Random(1)
+    out = []
+    for _ in range(k):
+        t = {u: {v: w * rng.uniform(0.8, 1.2) for v, w in n.items()} for u, n in topo.items()}
+        out.append(build_routing_table(dijkstra(t, me, ecmp=True), me))
+    return out
+
+def run(nodes, lookup, readers, swaps_per_s, duration):
+    topo = random_graph(nodes, 4, seed=nodes)
+    me = "n0"
+    node = RouterNode(me, {n: ("127.0.0.1", 0) for n in topo}, topo, mode="lsr", log_level="ERROR", out_queue=0)
+    versions = tables(topo, me, 4)
+    node.routing_table = versions[0]
+    msgs = [Message("message", me, d, 8, "x", alg="lsr", hdr={"flow": i}) for i, d in enumerate(topo) if d != me]
+    valid = {m.dst: {h for t in versions for h in (t[m.dst].get("next_hops") or [])} for m in msgs}
+    stop = threading.Event()
+    counts, bad = [0] * readers, [0]
+    swaps = [0]
+
+    def reader(i):
+        n, fn, local = 0, lookup, msgs
+        while not stop.is_set():
+            for m in local:
+                h = fn(node, m)
+                if h not in valid[m.dst]:
+                    bad[0] += 1
+            n += len(local)
+        counts[i] = n
+
+    def writer():
+        period = 1.0 / swaps_per_s if swaps_per_s else None
+        while period and not stop.is_set():
+            swaps[0] += 1
+            node.routing_table = versions[swaps[0] % len(versions)]
+            time.sleep(period)
+
+    ths = [threading.Thread(target=reader, args=(i,)) for i in range(readers)] + [threading.Thread(target=writer)]
+    for t in ths:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in ths:
+        t.join()
+    return sum(counts) / duration, bad[0], swaps[0], node
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nodes", type=int, default=1000)
+    ap.add_argument("--readers", type=int, default=2)
+    ap.add_argument("--duration", type=float, default=2.0)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    for swaps in (0, 10, 100):
+        for name, fn in (("routing_table", old_next_hop), ("fib", fib_next_hop)):
+            rate, bad, n_swaps, node = run(args.nodes, fn, args.readers, swaps, args.duration)
+            rows.append({"lookup": name, "swaps_per_s": swaps, "readers": args.readers, "lookups_per_s": int(rate),
+                         "swaps": n_swaps, "bad_hops": bad, "fib_version": node.fib.version})
+    node.routing_table = node.routing_table
+    compile_ms = 1e3 * timed(lambda: setattr(node, "routing_table", node.routing_table), 5)
+    report(f"next-hop lookups, {args.nodes} destinations (FIB compile per swap: {compile_ms:.2f} ms)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Per-hop transit cost (parse + rewrite hops/prev + serialize) vs payload size."""
+from __future__ import annotations
+import argparse, json
+from common import report, same_wire, timed
+from messages import make_msg, normalize_incoming, set_header, ensure_header_id_ts
+
+def hop_full(raw: bytes) -> str:
+    # previous behaviour: full json.loads, dict copy, full json.dumps
+    msg = json.loads(raw.decode("utf-8"))
+    ensure_header_id_ts(msg)
+    fwd = dict(msg)
+    fwd["hops"] = int(fwd["hops"]) - 1
+    set_header(fwd, "prev", "B")
+    return json.dumps(fwd, ensure_ascii=False)
+
+def hop_split(raw: bytes) -> str:
+    msg = normalize_incoming(raw)
+    return msg.forward(int(msg.hops) - 1, "B").to_wire()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000, 1_000_000])
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    texts = {"plain": "hello world ", "escaped": "héllo \"w\" "}
+    for kind, size in [(k, s) for k in texts for s in args.sizes]:
+        unit = texts[kind]
+        raw = make_msg("flooding", "data", "A", "D", 8, (unit * (size // len(unit) + 1))[:size]).encode("utf-8")
+        assert same_wire(hop_full(raw), hop_split(raw))
+        n = max(20, 200_000 // size)
+        t_full = timed(lambda: [hop_full(raw) for _ in range(n)], repeat=3) / n
+        t_split = timed(lambda: [hop_split(raw) for _ in range(n)], repeat=3) / n
+        rows.append({"text": kind, "payload_B": size, "full_us": t_full * 1e6, "split_us": t_split * 1e6,
+                     "speedup": t_full / t_split})
+    report("forwarding hop cost", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""CSR graph vs Dict[str, Dict[str, float]]: memory per edge, SPF time, and LSDB->graph rebuild per LSA."""
+from __future__ import annotations
+import argparse, random, tracemalloc
+from common import report, timed
+from dijkstra import dijkstra
+from graph import CSRGraph, LinkStateGraph, dijkstra_csr
+from topogen import grid, random_graph
+
+def _alloc(fn):
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    obj = fn()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return obj, used
+
+def run(name, topo):
+    names = list(topo)
+    # rebuilt from scratch so both measurements count every allocation
+    d, dict_bytes = _alloc(lambda: {u: {v: float(w) for v, w in n.items()} for u, n in topo.items()})
+    g = CSRGraph.from_dict(topo)
+    edges = g.num_edges
+    src = names[0]
+    t_dict = timed(lambda: dijkstra(d, src), 3)
+    t_csr = timed(lambda: dijkstra_csr(g, 0), 3)
+    t_csr_named = timed(lambda: dijkstra(g, src), 3)  # + next hops and names, same output as the dict run
+    # LinkStateGraph: one LSA changes one row; rebuild the CSR
+    ls = LinkStateGraph()
+    for u, n in topo.items():
+        ls.set_row(u, n)
+    ls.csr()
+    rng = random.Random(1)
+    def one_lsa():
+        u = rng.choice(names)
+        ls.set_row(u, {v: w + 1.0 for v, w in topo[u].items()})
+        ls.csr()
+    t_patch = timed(one_lsa, 5)
+    t_full = timed(lambda: CSRGraph.from_dict(topo), 1)
+    return {"topo": name, "nodes": len(names), "edges": edges,
+            "dict_B_per_edge": round(dict_bytes / edges, 1), "csr_B_per_edge": round(g.memory_bytes() / edges, 1),
+            "spf_dict_ms": 1e3 * t_dict, "spf_csr_ms": 1e3 * t_csr, "spf_csr_named_ms": 1e3 * t_csr_named,
+            "csr_patch_ms": 1e3 * t_patch, "csr_full_build_ms": 1e3 * t_full}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,50000,100000")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        side = int(n ** 0.5)
+        rows.append(run("random", random_graph(n, 4, seed=n)))
+        rows.append(run("grid", grid(side, side, 1, 10, seed=n)))
+    report("CSR graph vs nested dicts", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Hot paths one by one: wire parse/dump, headers, flooding dedup, SPF + table, LSR/DVR updates, TCP 4-node chain."""
+from __future__ import annotations
+import argparse, json, random
+from common import report, timed
+from dijkstra import build_routing_table, dijkstra
+from dvr import DVR
+from flooding import Flooding
+from graph import LinkStateGraph
+from lsr import LSR
+from messages import Message, dumps, get_header, make_msg, normalize_incoming, set_header
+from topogen import grid, random_graph
+
+class _Node:
+    """Just enough of RouterNode for Flooding/LSR/DVR: sends are dropped, every neighbor is alive."""
+    def __init__(self, node_id, topo):
+        self.node_id = node_id
+        self.topology = topo
+        self.neighbors = set(topo.get(node_id, {}))
+        self.nodes_map = {n: n for n in topo}
+        self.sent = 0
+
+    def _to_wire_id(self, n):
+        return n
+
+    def _from_wire_id(self, w):
+        return w
+
+    def is_neighbor_active(self, n):
+        return True
+
+    def cost_to(self, n):
+        return self.topology[self.node_id][n]
+
+    def _send(self, n, wire):
+        self.sent += 1
+
+    def _log(self, *a, **kw):
+        pass
+
+    def _kick_routing(self):
+        pass
+
+    def on_data_local(self, msg):
+        pass
+
+def _row(path, size, param, seconds, ops):
+    us = 1e6 * seconds / ops
+    return {"path": path, "param": param, "size": size, "us_per_op": us, "ops_per_s": 1e6 / us if us else 0.0}
+
+def wire_paths(payloads, n):
+    rows = []
+    for size in payloads:
+        raw = make_msg("flooding", "data", "A", "D", 8, "x" * size)
+        k = max(20, n * 100 // max(100, size))
+        rows.append(_row("normalize_incoming", size, "payload_B", timed(lambda: [normalize_incoming(raw) for _ in range(k)], 3), k))
+        msg = normalize_incoming(raw)
+        rows.append(_row("dumps(Message)", size, "payload_B", timed(lambda: [dumps(msg) for _ in range(k)], 3), k))
+        d = json.loads(raw)
+        rows.append(_row("dumps(dict)", size, "payload_B", timed(lambda: [dumps(d) for _ in range(k)], 3), k))
+    d = json.loads(make_msg("flooding", "data", "A", "D", 8, "x"))
+    m = normalize_incoming(d)
+    rows.append(_row("get_header(dict)", 1, "-", timed(lambda: [get_header(d, "alg") for _ in range(n)], 3), n))
+    rows.append(_row("set_header(dict)", 1, "-", timed(lambda: [set_header(d, "prev", "B") for _ in range(n)], 3), n))
+    rows.append(_row("get_header(Message)", 1, "-", timed(lambda: [get_header(m, "alg") for _ in range(n)], 3), n))
+    rows.append(_row("set_header(Message)", 1, "-", timed(lambda: [set_header(m, "prev", "B") for _ in range(n)], 3), n))
+    return rows
+
+def flooding_dedup(n):
+    topo = {"A": {"B": 1.0, "C": 1.0, "D": 1.0}, "B": {}, "C": {}, "D": {}}
+    node = _Node("A", topo)
+    msgs = [Message("message", "X", "Z", 8, "x", id=f"m{i}") for i in range(n)]
+    fresh = Flooding()
+    t_new = timed(lambda: [fresh.handle_message(node, m) for m in msgs], 1)
+    t_dup = timed(lambda: [fresh.handle_message(node, m) for m in msgs], 3)  # every id already seen
+    return [_row("Flooding.handle_message new", n, "msgs", t_new, n),
+            _row("Flooding.handle_message dup", n, "msgs", t_dup, n)]
+
+def routing_paths(sizes):
+    rows = []
+    for n in sizes:
+        side = int(n ** 0.5)
+        topo = grid(side, side, 1, 10, seed=n)
+        src = next(iter(topo))
+        rows.append(_row("dijkstra+build_routing_table", len(topo), "nodes",
+                         timed(lambda: build_routing_table(dijkstra(topo, src), src), 3), 1))
+        # LSR: one LSA changes, then the topology view is rebuilt
+        lsr = LSR(src)
+        for u, nbrs in topo.items():
+            lsr.graph.set_row(u, nbrs)
+        lsr.build_topology()
+        names = list(topo)
+        rng = random.Random(1)
+        def one_lsa():
+            u = rng.choice(names)
+            lsr.graph.set_row(u, {v: w * rng.uniform(0.5, 2.0) for v, w in topo[u].items()})
+            lsr.build_topology()
+        rows.append(_row("LSR.build_topology (1 LSA)", len(topo), "nodes", timed(one_lsa, 3), 1))
+        # DVR: neighbors' vectors cover every destination; one local link cost flips
+        rt = random_graph(n, 4, seed=n)
+        me = "n0"
+        node = _Node(me, rt)
+        dvr = DVR(me)
+        dvr.update_local_links(node)
+        for nb in node.neighbors:
+            res = dijkstra(rt, nb)
+            dvr.on_receive_info(node, Message("info", nb, me, 1, {"routing_table": [[d, c] for d, c in res.dist.items()
+                                                                                  if c < float("inf")], "full": True}))
+        nb = sorted(node.neighbors)[0]
+        base = rt[me][nb]
+        flip = [base]
+        def one_change():
+            flip[0] = base * 3 if flip[0] == base else base
+            rt[me][nb] = flip[0]
+            dvr.update_local_links(node)
+        rows.append(_row("DVR.update_local_links (1 link)", n, "nodes", timed(one_change, 3), 1))
+    return rows
+
+def tcp_chain(payloads, msgs):
+    from bench_tcp_pool import run  # starts 4 RouterNodes on localhost ports
+    rows = []
+    for size in payloads:
+        r = run(msgs, False, size)
+        row = _row("tcp chain A-B-C-D", size, "payload_B", r["secs"], max(1, r["delivered"]))
+        row["delivered"] = r["delivered"]  # short of msgs when the outbound queue dropped data
+        row["dropped"] = r["dropped"]
+        rows.append(row)
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--payloads", default="100,10000,100000")
+    ap.add_argument("--sizes", default="100,1000,10000", help="topology sizes (nodes)")
+    ap.add_argument("--n", type=int, default=20_000, help="iterations for the per-message paths")
+    ap.add_argument("--tcp-msgs", type=int, default=2000)
+    ap.add_argument("--no-tcp", action="store_true")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    payloads = [int(x) for x in args.payloads.split(",")]
+    rows = wire_paths(payloads, args.n) + flooding_dedup(args.n)
+    rows += routing_paths([int(x) for x in args.sizes.split(",")])
+    if not args.no_tcp:
+        rows += tcp_chain(payloads, args.tcp_msgs)
+    report("hot paths", rows)
+
+if __name__ == "__main__":
+    main()
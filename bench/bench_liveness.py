@@ -0,0 +1,95 @@
+"""Link cost churn under RTT jitter (raw vs smoothed/quantized) and failure detection time (dead_after vs fast probes)."""
+from __future__ import annotations
+import argparse, time
+from common import report
+from memnet import MemoryNetwork
+from node import RouterNode
+from topogen import grid, line
+
+def _set_table(self, table):
+    # count tables that differ from the previous one (the FIB version bumps on every recompute)
+    old = getattr(self, "_routing_table", None) or {}
+    key = lambda t: {d: (e.get("next_hop"), e.get("cost")) for d, e in t.items()}
+    if key(old) != key(table):
+        self.route_changes = getattr(self, "route_changes", 0) + 1
+    RouterNode.routing_table.fset(self, table)
+
+class Smoothed(RouterNode):
+    routing_table = RouterNode.routing_table.setter(_set_table)
+
+class RawRtt(Smoothed):
+    """The old behavior: the last RTT sample is the link cost."""
+    def cost_to(self, neighbor):
+        m = self.nei_metrics.get(neighbor)
+        return m.rtt_ms if (m and m.rtt_ms != float("inf")) else super().cost_to(neighbor)
+
+def churn(label, cls, mode, side, latency, jitter, hello, duration):
+    topo = grid(side, side)
+    net = MemoryNetwork(latency=latency, seed=1)
+    for a in topo:
+        for b in topo[a]:
+            net.set_link(a, b, jitter=jitter, both=False)
+    nodes = [cls(n, {k: k for k in topo}, topo, mode=mode, transport="memory", network=net, log_level="ERROR",
+                 hello_period=hello, dead_after=10 * hello) for n in topo]
+    for node in nodes:
+        node.start()
+    time.sleep(3 * hello)  # first RTT samples in, tables built
+    v0 = sum(getattr(node, "route_changes", 0) for node in nodes)
+    s0 = net.stats()["sent"]
+    time.sleep(duration)
+    changes = sum(getattr(node, "route_changes", 0) for node in nodes) - v0
+    ctrl = net.stats()["sent"] - s0
+    for node in nodes:
+        node.stop()
+    net.close()
+    return {"case": label, "mode": mode, "nodes": len(nodes), "jitter_ms": 1000 * jitter,
+            "route_changes_per_s": changes / duration, "ctrl_msgs_per_s": ctrl / duration}
+
+def detect(label, hello, dead_after, detect_mult, probe_interval, runs):
+    times, ctrl = [], []
+    for i in range(runs):
+        topo = line(2)
+        a, b = sorted(topo)
+        net = MemoryNetwork(seed=i)
+        nodes = [RouterNode(n, {k: k for k in topo}, topo, mode="dvr", transport="memory", network=net,
+                            log_level="ERROR", hello_period=hello, dead_after=dead_after,
+                            detect_mult=detect_mult, probe_interval=probe_interval) for n in topo]
+        for node in nodes:
+            node.start()
+        time.sleep(2 * hello + 0.13 * i)  # fail at a different point of the hello cycle each run
+        s0 = net.stats()["sent"]
+        t0 = time.perf_counter()
+        net.set_link(a, b, loss=1.0)  # silent failure: sends still "succeed"
+        while nodes[0].is_neighbor_active(b) and time.perf_counter() - t0 < 3 * dead_after:
+            time.sleep(0.002)
+        times.append(time.perf_counter() - t0)
+        ctrl.append((net.stats()["sent"] - s0) / times[-1])
+        for node in nodes:
+            node.stop()
+        net.close()
+    times.sort()
+    return {"case": label, "hello_s": hello, "dead_after_s": dead_after, "runs": runs,
+            "detect_mean_s": sum(times) / runs, "detect_max_s": times[-1],
+            "ctrl_msgs_per_s": sum(ctrl) / runs}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--side", type=int, default=3, help="grid side for the churn case")
+    ap.add_argument("--mode", default="dvr", choices=["dvr", "lsr"])
+    ap.add_argument("--latency", type=float, default=0.002)
+    ap.add_argument("--jitter", type=float, default=0.002)
+    ap.add_argument("--hello", type=float, default=0.1)
+    ap.add_argument("--duration", type=float, default=3.0)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [churn(label, cls, args.mode, args.side, args.latency, args.jitter, args.hello, args.duration)
+            for label, cls in (("raw rtt", RawRtt), ("smoothed+buckets", Smoothed))]
+    report("link cost churn under jitter", rows)
+    hello = 5 * args.hello
+    rows = [detect("dead_after only", hello, 3 * hello, 0, 0.05, args.runs),
+            detect("fast probes 3x50ms", hello, 3 * hello, 3, 0.05, args.runs)]
+    report("silent link failure detection", rows)
+
+if __name__ == "__main__":
+    main()
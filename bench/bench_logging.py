@@ -0,0 +1,63 @@
+"""Flooding throughput of one node with logging off, at INFO written inline, and at INFO through the ring/writer."""
+from __future__ import annotations
+import argparse, os, sys, tempfile, time
+from common import report
+from memnet import MemoryNetwork
+from messages import Message
+from node import RouterNode
+import nodelog
+
+TOPO = {"B": {"A": 1.0, "C": 1.0, "D": 1.0, "E": 1.0},
+        "A": {"B": 1.0}, "C": {"B": 1.0}, "D": {"B": 1.0}, "E": {"B": 1.0}}
+
+class SinkNode(RouterNode):
+    """Forwarding without a wire: sends are counted and dropped."""
+    def _send(self, target_node, wire):
+        self.sent += 1
+
+def run(n: int, label: str, payload: int, **kw) -> dict:
+    node = SinkNode("B", {k: k for k in TOPO}, TOPO, mode="flooding", transport="memory",
+                    network=MemoryNetwork(), out_queue=0, **kw)
+    node.sent = 0
+    msgs = [Message("message", "A", "Z", 8, "x" * payload, alg="flooding", prev="A", id=f"m{i}")
+            for i in range(n)]
+    # stdout goes to a line-buffered file, as when run.py starts the node
+    fd, path = tempfile.mkstemp(suffix=".log")
+    os.close(fd)
+    old = sys.stdout
+    sys.stdout = open(path, "w", buffering=1, encoding="utf-8")
+    try:
+        t0 = time.perf_counter()
+        for m in msgs:
+            node._process_msg(m)
+        fwd = time.perf_counter() - t0
+        nodelog.flush()  # what is still queued for the writer
+        total = time.perf_counter() - t0
+    finally:
+        sys.stdout.close()
+        sys.stdout = old
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {"logging": label, "msgs": n, "fwd_msgs_per_s": n / fwd, "fwd_us": 1e6 * fwd / n,
+            "incl_flush_us": 1e6 * total / n, "log_kB": size / 1024.0, "sends": node.sent}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20_000)
+    ap.add_argument("--payload", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs per case")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    cases = [
+        ("off (ERROR)", dict(log_level="ERROR")),
+        ("INFO inline", dict(log_level="INFO", log_sync=True)),
+        ("INFO ring", dict(log_level="INFO")),
+        ("INFO ring FWD=1/100", dict(log_level="INFO", log_sampling="FWD=1/100")),
+        ("INFO ring jsonl", dict(log_level="INFO", log_format="jsonl")),
+    ]
+    rows = [min((run(args.n, label, args.payload, **kw) for _ in range(args.repeat)), key=lambda r: r["fwd_us"])
+            for label, kw in cases]
+    report("flooding throughput vs logging", rows)
+
+if __name__ == "__main__":
+    main()
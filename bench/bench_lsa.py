@@ -0,0 +1,50 @@
+"""LSR control bytes per minute and SPF runs avoided on a 100-node simulated topology: full LSAs vs deltas + bare refreshes."""
+from __future__ import annotations
+import argparse, random, time
+from common import report
+from sim import Simulator, load_topology
+
+def run(spec, label, deltas, minutes, changes_per_min, seed):
+    topo = load_topology(spec)
+    sim = Simulator(topo, mode="lsr", seed=seed)
+    for node in sim.nodes.values():
+        node.lsr.deltas = deltas
+    warm = 20.0
+    sim.run(warm)
+    rng = random.Random(seed)
+    links = sorted({tuple(sorted((u, v))) for u in topo for v in topo[u]})
+    end = warm + 60.0 * minutes
+    for _ in range(int(changes_per_min * minutes)):
+        a, b = rng.choice(links)
+        sim.set_cost(rng.uniform(warm, end - 5.0), a, b, float(rng.randint(1, 10)))
+    lsas = lambda k: sum(n.lsr.stats()["lsa"][k] for n in sim.nodes.values())
+    before = {k: lsas(k) for k in ("new", "old", "spf_skipped", "delta_miss", "sent_full", "sent_delta", "sent_refresh")}
+    lsa0 = sim.ctrl_bytes_by_type["info/lsr"]
+    sim.mark()
+    t0 = time.perf_counter()
+    sim.run(end)
+    r = sim.report()
+    d = {k: lsas(k) - v for k, v in before.items()}
+    lsa_bytes = sim.ctrl_bytes_by_type["info/lsr"] - lsa0
+    n = len(sim.nodes)
+    return {"topo": spec, "lsa": label, "nodes": n, "cost_changes": int(changes_per_min * minutes),
+            "ctrl_kB_per_min": r["ctrl_kB_per_node"] * n / minutes,
+            "lsa_kB_per_min": lsa_bytes / 1e3 / minutes, "lsas_full": d["sent_full"],
+            "lsas_delta": d["sent_delta"], "lsas_refresh": d["sent_refresh"], "installed": d["new"], "dup_ignored": d["old"],
+            "spf_runs": r["spf_runs"], "spf_avoided": d["spf_skipped"], "delta_miss": d["delta_miss"],
+            "wrong_routes": r["wrong_routes"], "cpu_s": time.perf_counter() - t0}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--topos", default="grid:10x10,random:100")
+    ap.add_argument("--minutes", type=float, default=2.0, help="virtual minutes measured after a 20 s warm-up")
+    ap.add_argument("--changes", type=float, default=30.0, help="random link cost changes per minute")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(spec, label, deltas, args.minutes, args.changes, args.seed)
+            for spec in args.topos.split(",") for label, deltas in (("full", False), ("delta", True))]
+    report("LSR control overhead (virtual time, 1 ms links, hello 5 s)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Many RouterNodes in one process over transport="memory": route convergence and delivery per algorithm."""
+from __future__ import annotations
+import argparse, random, sys, threading, time
+from common import report
+from graph import CSRGraph, spf_csr
+from async_node import AsyncRouterNode, SharedLoop
+from memnet import MemoryNetwork
+from messages import Message
+from node import RouterNode
+from topogen import grid
+
+class Counting:
+    def cost_to(self, neighbor):
+        # static topology costs: in one busy process RTTs measure our own queueing, not the links
+        return float(self.topology[self.node_id][neighbor])
+
+    def on_data_local(self, msg):
+        if msg.type == "message":
+            self.bench_rx.add(msg.id)
+
+class Node(Counting, RouterNode):
+    pass
+
+class AsyncNode(Counting, AsyncRouterNode):
+    pass
+
+def reference_costs(topo):
+    """Dijkstra costs from every node on the static topology the bench routes on."""
+    g = CSRGraph.from_dict(topo)
+    return {s: dict(zip(g.names, spf_csr(g, g.index[s])[0])) for s in g.names}
+
+def converged(nodes, ref):
+    # the installed FIB, not just a full table: data is forwarded on it as soon as we return
+    for name, node in nodes.items():
+        fib = node.fib
+        for d, c in ref[name].items():
+            if d == name:
+                continue
+            e = fib.get(node._to_wire_id(d))
+            if e is None or not e.hops or abs(e.cost - c) > 1e-6 * max(1.0, c):
+                return False
+    return True
+
+def neighbors_up(nodes):
+    # a hello round done everywhere: peers know each other (and have negotiated the codec)
+    return all(n in node.nei_metrics for node in nodes.values() for n in node.neighbors)
+
+def run(side, mode, engine, latency, loss, bandwidth, messages, timeout):
+    topo = grid(side, side)
+    net = MemoryNetwork(latency=latency, loss=loss, bandwidth=bandwidth, seed=1)
+    nodes_map = {n: n for n in topo}
+    rx = set()
+    cls = Node if engine == "thread" else AsyncNode
+    # "shared": every node on one event loop; "asyncio": a loop (thread) per node; "thread": 3 threads per node
+    shared = SharedLoop() if engine == "shared" else None
+    t0 = time.perf_counter()
+    nodes = {}
+    for nid in topo:
+        node = cls(nid, nodes_map, topo, mode=mode, transport="memory", network=net, log_level="ERROR",
+                   hello_period=0.5, dead_after=5.0)
+        node.bench_rx = rx
+        nodes[nid] = node
+    if shared is not None:
+        shared.start(nodes.values())
+    else:
+        for node in nodes.values():
+            node.start()
+    t_start = time.perf_counter() - t0
+    t_conv = None
+    ref = reference_costs(topo) if mode != "flooding" else None
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if neighbors_up(nodes) and (ref is None or converged(nodes, ref)):
+            t_conv = time.perf_counter() - t0
+            break
+        time.sleep(0.05)
+    ctrl = net.stats()
+    rng = random.Random(2)
+    names = list(topo)
+    sent = []
+    for i in range(messages):
+        s, d = rng.sample(names, 2)
+        m = Message("message", s, d, 2 * side + 4, "x", id=f"b{i}", alg=mode)
+        nodes[s]._process_msg(m)
+        sent.append(m.id)
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and len(rx) < len(sent):
+        time.sleep(0.02)
+    data = net.stats()
+    threads = threading.active_count()
+    for node in nodes.values():
+        node.running = False  # all at once, so the loops wind down in parallel
+    for node in nodes.values():
+        node.stop()
+    net.close()
+    if shared is not None:
+        shared.close()
+    ok = t_conv is not None and len(rx) == len(sent)
+    return {"ok": "yes" if ok else "FAIL", "nodes": len(topo), "mode": mode, "engine": engine, "threads": threads,
+            "start_s": t_start, "converged_s": t_conv if t_conv is not None else "-",
+            "ctrl_msgs": ctrl["sent"], "delivered": f"{len(rx)}/{len(sent)}",
+            "wire_msgs_per_data": (data["sent"] - ctrl["sent"]) / max(1, len(sent))}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sides", default="5,10,20", help="grid side lengths (nodes = side^2)")
+    ap.add_argument("--modes", default="flooding,dvr")
+    ap.add_argument("--engine", default="shared", choices=["shared", "asyncio", "thread"])
+    ap.add_argument("--latency", type=float, default=0.001)
+    ap.add_argument("--loss", type=float, default=0.0)
+    ap.add_argument("--bandwidth", type=float, default=0.0, help="bytes/s per link, 0 = unlimited")
+    ap.add_argument("--messages", type=int, default=200)
+    ap.add_argument("--timeout", type=float, default=120.0, help="seconds to converge, then to deliver")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(int(s), mode, args.engine, args.latency, args.loss, args.bandwidth, args.messages, args.timeout)
+            for s in args.sides.split(",") for mode in args.modes.split(",")]
+    report(f"transport=memory, grid, engine={args.engine}, latency={args.latency}s loss={args.loss} "
+           f"bw={args.bandwidth or 'inf'}", rows)
+    if any(r["ok"] != "yes" for r in rows):
+        # a row that did not converge or deliver everything is a failure, not a number
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""normalize -> route -> dumps per message: plain dict pipeline vs the Message object."""
+from __future__ import annotations
+import argparse, tracemalloc
+from common import report, same_wire, timed
+from messages import (make_msg, normalize_incoming, parse_any, _normalize_dict, ensure_header_id_ts,
+                      get_header, set_header, dumps)
+
+def pipeline_dict(raw: bytes) -> str:
+    # pre-Message behaviour: headers re-converted on every get/set
+    msg = _normalize_dict(parse_any(raw))
+    ensure_header_id_ts(msg)
+    alg = str(get_header(msg, "alg", "flooding")).lower()
+    ensure_header_id_ts(msg)
+    mid = str(get_header(msg, "id"))
+    prev = get_header(msg, "prev")
+    fwd = dict(msg)
+    fwd["hops"] = int(msg.get("hops", 0)) - 1
+    set_header(fwd, "prev", "B")
+    _ = (alg, mid, prev, msg.get("to"), msg.get("from"), str(get_header(msg, "id")))
+    return dumps(fwd)
+
+def pipeline_message(raw: bytes) -> str:
+    msg = normalize_incoming(raw)
+    alg = str(msg.alg or "flooding").lower()
+    mid = msg.id
+    prev = msg.prev
+    fwd = msg.forward(int(msg.hops) - 1, "B")
+    _ = (alg, mid, prev, msg.dst, msg.src, msg.id)
+    return fwd.to_wire()
+
+def measure(fn, raws: list[bytes]) -> dict:
+    cpu_us = timed(lambda: [fn(r) for r in raws], repeat=5) / len(raws) * 1e6
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [normalize_incoming(r) if fn is pipeline_message else _normalize_dict(parse_any(r)) for r in raws]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del kept
+    return {"us_per_msg": cpu_us, "held_blocks_per_msg": blocks / len(raws), "held_B_per_msg": size / len(raws)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--msgs", type=int, default=20_000)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    raws = [make_msg("flooding", "data", "A", "D", 8, f"hola {i}").encode("utf-8") for i in range(args.msgs)]
+    assert same_wire(pipeline_dict(raws[0]), pipeline_message(raws[0]))
+    rows = [{"pipeline": "dict", **measure(pipeline_dict, raws)},
+            {"pipeline": "Message", **measure(pipeline_message, raws)}]
+    report("normalize -> route -> dumps", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""LSR convergence after a node restart (fresh process, empty LSDB) with and without the database exchange."""
+from __future__ import annotations
+import argparse, random, time
+from common import report
+from dijkstra import INF
+from graph import CSRGraph, spf_csr
+from lsr import LSR
+from sim import Simulator, load_topology
+
+def node_wrong(sim, n):
+    """Routes of node n whose cost differs from Dijkstra on the live topology."""
+    g = CSRGraph.from_dict(sim.live_topology())
+    dist, _, _ = spf_csr(g, g.index[n])
+    table = sim.nodes[n].routing_table
+    wrong = 0
+    for d, c in zip(g.names, dist):
+        e = table.get(d)
+        have = float(e["cost"]) if e and e.get("next_hop") is not None else INF
+        if not (c == INF and have == INF) and abs(have - c) > 1e-6 * max(1.0, c):
+            wrong += 1
+    return wrong
+
+def run(spec, label, exchange, down_for, latency, step, limit, seed):
+    LSR.db_exchange = exchange
+    try:
+        topo = load_topology(spec)
+        sim = Simulator(topo, mode="lsr", latency=latency, seed=seed)
+        n = random.Random(seed).choice(sorted(topo))
+        t_crash = 37.0  # between two of the sim's (synchronized) 15 s refreshes
+        sim.restart_node(t_crash, n, down_for)
+        sim.run(t_crash + down_for)
+        boot = sim.now
+        sim.mark()
+        t0 = time.perf_counter()
+        t_node = t_all = None
+        while sim.now < boot + limit and t_all is None:
+            sim.run(sim.now + step)
+            if t_node is None and node_wrong(sim, n) == 0:
+                t_node = sim.now - boot
+            if t_node is not None and sim.wrong_routes() == 0:
+                t_all = sim.now - boot
+        st = sim.nodes[n].lsr.stats()["db"]
+        return {"topo": spec, "db_exchange": label, "down_s": down_for, "restarted": n,
+                "node_converged_s": t_node if t_node is not None else "-",
+                "all_converged_s": t_all if t_all is not None else "-",
+                "dbd_sent": st["dbd_sent"], "req_sent": st["req_sent"],
+                "lsus_to_it": sum(x.lsr.lsu_sent for x in sim.nodes.values()), "cpu_s": time.perf_counter() - t0}
+    finally:
+        LSR.db_exchange = True
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--topos", default="grid:10x10,random:100")
+    ap.add_argument("--down", default="1,20", help="seconds the node stays down (below/above dead_after=15)")
+    ap.add_argument("--latency", type=float, default=0.001)
+    ap.add_argument("--step", type=float, default=0.005, help="virtual seconds between convergence checks")
+    ap.add_argument("--limit", type=float, default=20.0)
+    ap.add_argument("--seed", type=int, default=3)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(spec, label, exchange, float(down), args.latency, args.step, args.limit, args.seed)
+            for spec in args.topos.split(",") for down in args.down.split(",")
+            for label, exchange in (("off", False), ("on", True))]
+    report("LSR convergence after a restart (virtual time, hello 5 s)", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Incremental SPF vs full Dijkstra on single-link changes (cost up/down, link down/up)."""
+from __future__ import annotations
+import argparse, random
+from common import report, timed
+from dijkstra import INF, IncrementalSPF, dijkstra
+from topogen import grid, random_graph
+
+def _changes(topo, rng, k):
+    """k symmetric single-link events, each undone right after so the graph stays stable."""
+    edges = [(u, v) for u, n in topo.items() for v in n if u < v]
+    out = []
+    for _ in range(k):
+        u, v = rng.choice(edges)
+        w = topo[u][v]
+        kind = rng.choice(("up", "down", "fail"))
+        nw = None if kind == "fail" else (w * 3 if kind == "up" else max(1.0, w / 3))
+        out.append([(u, v, nw), (v, u, nw)])
+        out.append([(u, v, w), (v, u, w)])
+    return out
+
+def _apply(topo, deltas):
+    for u, v, w in deltas:
+        if w is None:
+            topo[u].pop(v, None)
+        else:
+            topo[u][v] = w
+
+def run(name, topo, k, check):
+    src = next(iter(topo))
+    rng = random.Random(1)
+    events = _changes(topo, rng, k)
+    cur = {u: dict(n) for u, n in topo.items()}
+
+    def full():
+        for d in events:
+            _apply(cur, d)
+            dijkstra(cur, src)
+
+    eng = IncrementalSPF(src, topo)
+
+    def inc():
+        for d in events:
+            eng.apply(d)
+
+    t_full = timed(full)
+    t_inc = timed(inc)
+    if check:
+        ref = dijkstra(cur, src)
+        assert all(eng.dist.get(v, INF) == d for v, d in ref.dist.items())
+    return {"topo": name, "nodes": len(topo), "events": len(events),
+            "full_ms_per_evt": 1e3 * t_full / len(events), "inc_ms_per_evt": 1e3 * t_inc / len(events),
+            "speedup": t_full / t_inc, "avg_resettled": eng.resettled / len(events)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,50000")
+    ap.add_argument("--events", type=int, default=20)
+    ap.add_argument("--no-check", action="store_true")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        side = int(n ** 0.5)
+        rows.append(run("random", random_graph(n, 4, seed=n), args.events, not args.no_check))
+        rows.append(run("grid", grid(side, side, 1, 10, seed=n), args.events, not args.no_check))
+    report("SPF per link event: full Dijkstra vs IncrementalSPF", rows)
+
+if __name__ == "__main__":
+    main()
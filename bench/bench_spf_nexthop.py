@@ -0,0 +1,79 @@
+"""Next hops during relaxation vs walking prev afterwards; single-pass table, early exit and bidirectional lookups."""
+from __future__ import annotations
+import argparse, heapq, random
+from common import report, timed
+from dijkstra import PathResult, build_routing_table, dijkstra, routing_table, shortest_path
+from graph import CSRGraph
+from topogen import grid, line, scale_free
+
+def legacy_dijkstra(topology, source):
+    # dijkstra() + _compute_next_hops as they were: next hop = walk prev back to the source
+    dist = {v: float("inf") for v in topology}
+    prev = {v: None for v in topology}
+    dist[source] = 0.0
+    pq, visited = [(0.0, source)], set()
+    while pq:
+        d, u = heapq.heappop(pq)
+        if u in visited:
+            continue
+        visited.add(u)
+        for v, w in topology.get(u, {}).items():
+            if d + w < dist[v]:
+                dist[v], prev[v] = d + w, u
+                heapq.heappush(pq, (d + w, v))
+    nh = {}
+    for dst in prev:
+        if dst == source:
+            nh[dst] = source
+            continue
+        if prev[dst] is None:
+            nh[dst] = None
+            continue
+        cur, prv = dst, prev[dst]
+        while prv is not None and prv != source:
+            cur, prv = prv, prev[prv]
+        nh[dst] = cur if prv == source else None
+    return PathResult(dist=dist, prev=prev, next_hop=nh)
+
+def run(name, topo, legacy_max):
+    names = list(topo)
+    src = names[0]
+    g = CSRGraph.from_dict(topo)
+    rng = random.Random(1)
+    pairs = [tuple(rng.sample(names, 2)) for _ in range(20)]
+    res = dijkstra(topo, src)
+    row = {"topo": name, "nodes": len(names)}
+    if len(names) <= legacy_max:
+        old = legacy_dijkstra(topo, src)
+        assert old.dist == res.dist and old.next_hop == res.next_hop
+        row["legacy_ms"] = 1e3 * timed(lambda: build_routing_table(legacy_dijkstra(topo, src), src), 1)
+    else:
+        row["legacy_ms"] = "-"
+    row["dijkstra_ms"] = 1e3 * timed(lambda: build_routing_table(dijkstra(topo, src), src), 3)
+    row["table_1pass_ms"] = 1e3 * timed(lambda: routing_table(topo, src), 3)
+    row["table_csr_ms"] = 1e3 * timed(lambda: routing_table(g, src), 3)
+    # single-destination queries: full SPF vs early exit vs bidirectional, per query
+    for s, t in pairs:
+        c, p = shortest_path(g, s, t)
+        assert c == dijkstra(g, s, target=t).dist[t] == dijkstra(topo, s).dist[t] and p[0] == s and p[-1] == t
+    row["query_full_ms"] = 1e3 * timed(lambda: [dijkstra(g, s) for s, t in pairs[:5]], 1) / 5
+    row["query_target_ms"] = 1e3 * timed(lambda: [dijkstra(g, s, target=t) for s, t in pairs], 1) / len(pairs)
+    row["query_bidir_ms"] = 1e3 * timed(lambda: [shortest_path(g, s, t) for s, t in pairs], 1) / len(pairs)
+    return row
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--legacy-max", type=int, default=20000, help="skip the old O(V x depth) walk above this size")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = []
+    for n in (int(x) for x in args.sizes.split(",")):
+        side = int(n ** 0.5)
+        rows.append(run("chain", line(n), args.legacy_max))
+        rows.append(run("grid", grid(side, side, 1, 10, seed=n), args.legacy_max))
+        rows.append(run("scale_free", scale_free(n, 2, seed=n), args.legacy_max))
+    report("routing table from one SPF (ms) and single-destination queries (ms/query)", rows)
+
+if __name__ == "__main__":
+    main()
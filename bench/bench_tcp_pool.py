@@ -0,0 +1,68 @@
+"""Throughput of the A–D line over localhost TCP: per-message connections vs pooled framing."""
+from __future__ import annotations
+import argparse, socket, threading, time
+from common import free_port, report
+from messages import make_msg
+from node import RouterNode
+from tcp_pool import ConnectionPool
+
+TOPO = {"A": {"B": 1.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"B": 1.0, "D": 1.0}, "D": {"C": 1.0}}
+
+class CountingNode(RouterNode):
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.delivered = 0
+        self.done = threading.Event()
+        self.expect = 0
+        self.t_last = 0.0
+
+    def on_data_local(self, msg):
+        self.delivered += 1
+        self.t_last = time.perf_counter()
+        if self.delivered >= self.expect:
+            self.done.set()
+
+def run(n_msgs: int, legacy: bool, payload: int) -> dict:
+    nodes_map = {nid: ("127.0.0.1", free_port()) for nid in TOPO}
+    nodes = {nid: CountingNode(nid, nodes_map, TOPO, mode="flooding", log_level="ERROR",
+                               transport="tcp", hello_period=3600, tcp_legacy=legacy)
+             for nid in TOPO}
+    for n in nodes.values():
+        n.start()
+    time.sleep(0.3)
+    nodes["D"].expect = n_msgs
+    wires = [make_msg("flooding", "data", "A", "D", 8, "x" * payload) for _ in range(n_msgs)]
+    client = ConnectionPool(lambda k: nodes_map[k])
+    t0 = time.perf_counter()
+    for w in wires:
+        if legacy:
+            with socket.create_connection(nodes_map["A"], timeout=1.2) as s:
+                s.sendall(w.encode("utf-8"))
+        else:
+            client.send("A", w)
+    # data dropped by a full outbound queue never arrives: stop once delivery stalls
+    last, deadline = -1, time.perf_counter() + 60.0
+    while not nodes["D"].done.wait(0.5) and time.perf_counter() < deadline:
+        if nodes["D"].delivered == last:
+            break
+        last = nodes["D"].delivered
+    dt = max(0.0, nodes["D"].t_last - t0)  # up to the last delivery, not the stall wait
+    client.close()
+    dropped = sum(q["dropped"] for n in nodes.values() if n.outq for q in n.outq.stats().values())
+    for n in nodes.values():
+        n.stop()
+    got = nodes["D"].delivered
+    return {"mode": "legacy" if legacy else "pooled", "msgs": n_msgs, "payload_B": payload,
+            "delivered": got, "dropped": dropped, "secs": dt, "msgs_per_s": got / dt if dt else 0.0}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--msgs", type=int, default=2000)
+    ap.add_argument("--payload", type=int, default=100)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    rows = [run(args.msgs, True, args.payload), run(args.msgs, False, args.payload)]
+    report("tcp A-D flooding throughput", rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import json, socket, sys, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+def free_port() -> int:
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+def same_wire(a: str, b: str) -> bool:
+    """Wire equality modulo the headers list-vs-dict form."""
+    from messages import _headers_to_dict
+    da, db = json.loads(a), json.loads(b)
+    da["headers"], db["headers"] = _headers_to_dict(da.get("headers")), _headers_to_dict(db.get("headers"))
+    return da == db
+
+def timed(fn: Callable[[], Any], repeat: int = 1) -> float:
+    """Best wall time (s) of `repeat` runs of fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def report(title: str, rows: List[Dict[str, Any]]) -> None:
+    """Print rows as an aligned table, or as JSON lines with --json."""
+    if "--json" in sys.argv:
+        for r in rows:
+            print(json.dumps({"bench": title, **r}))
+        return
+    print(f"\n== {title} ==")
+    if not rows:
+        return
+    cols = list(rows[0].keys())
+    fmt = lambda v: f"{v:.3f}" if isinstance(v, float) else str(v)
+    width = {c: max(len(c), *(len(fmt(r.get(c, ""))) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(width[c]) for c in cols))
+    for r in rows:
+        print("  ".join(fmt(r.get(c, "")).ljust(width[c]) for c in cols))
@@ -0,0 +1,115 @@
+"""Run the bench suite, save results as JSON and optionally compare them with an earlier run.
+
+    python bench/run_all.py                      # full suite -> bench/results/<sha>-<time>.json
+    python bench/run_all.py --quick              # smaller sizes, for a quick check
+    python bench/run_all.py --compare bench/results/base.json --threshold 0.2
+"""
+from __future__ import annotations
+import argparse, json, platform, subprocess, sys, time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from common import ROOT, report
+
+RESULTS = ROOT / "bench" / "results"
+
+# script, args (full, quick), fields that identify a row across runs
+SUITE: List[Tuple[str, List[str], List[str], Tuple[str, ...]]] = [
+    ("bench_hotpaths.py", [], ["--sizes", "100,1000", "--n", "2000", "--payloads", "100,10000",
+                               "--tcp-msgs", "500"], ("path", "param", "size")),
+    ("bench_tcp_pool.py", [], ["--msgs", "500"], ("mode", "payload_B")),
+    ("bench_logging.py", [], ["--n", "5000", "--repeat", "1"], ("logging",)),
+]
+
+def metric_direction(name: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if the field is not compared."""
+    if name.endswith("per_s") or name.endswith("speedup"):
+        return 1
+    if name.endswith(("_us", "_ms", "_s")) or name in ("secs", "us_per_op"):
+        return -1
+    return 0
+
+def run_script(script: str, args: List[str]) -> List[Dict[str, Any]]:
+    out = subprocess.run([sys.executable, str(ROOT / "bench" / script), *args, "--json"],
+                         cwd=ROOT, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{script} exited {out.returncode}: {out.stderr.strip()[-500:]}")
+    rows = []
+    for line in out.stdout.splitlines():
+        if line.startswith("{"):
+            rows.append(json.loads(line))
+    return rows
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def row_key(script: str, row: Dict[str, Any], fields: Tuple[str, ...]) -> str:
+    return "|".join([script, str(row.get("bench", ""))] + [str(row.get(f, "")) for f in fields])
+
+def compare(base: Dict[str, Any], cur: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """One row per metric present in both runs; `regressed` when worse by more than threshold."""
+    old = {r["key"]: r for r in base["rows"]}
+    rows = []
+    for r in cur["rows"]:
+        b = old.get(r["key"])
+        if b is None:
+            continue
+        for m, v in r.items():
+            d = metric_direction(m)
+            bv = b.get(m)
+            if not d or not isinstance(v, (int, float)) or not isinstance(bv, (int, float)) or not bv:
+                continue
+            change = (v - bv) / bv
+            worse = -change if d > 0 else change
+            rows.append({"key": r["key"], "metric": m, "base": float(bv), "now": float(v),
+                         "change_pct": 100.0 * change, "regressed": worse > threshold})
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quick", action="store_true", help="smaller sizes and message counts")
+    ap.add_argument("--only", default="", help="comma-separated script names to run")
+    ap.add_argument("--out", default="", help="results file (default bench/results/<sha>-<time>.json)")
+    ap.add_argument("--compare", default="", help="earlier results file to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before it counts (0.25 = 25%%)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    cur = {"meta": {"commit": git_commit(), "python": platform.python_version(),
+                    "platform": platform.platform(), "machine": platform.machine(),
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": args.quick},
+           "rows": []}
+    for script, full, quick, fields in SUITE:
+        if only and script not in only and script[:-3] not in only:
+            continue
+        t0 = time.perf_counter()
+        rows = run_script(script, quick if args.quick else full)
+        for r in rows:
+            r["key"] = row_key(script, r, fields)
+        cur["rows"] += rows
+        print(f"{script}: {len(rows)} rows in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+
+    out = Path(args.out) if args.out else RESULTS / f"{cur['meta']['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(cur, indent=1))
+    print(f"results: {out}", file=sys.stderr)
+
+    if not args.compare:
+        return
+    base = json.loads(Path(args.compare).read_text())
+    rows = compare(base, cur, args.threshold)
+    report(f"{base['meta'].get('commit')} -> {cur['meta']['commit']}", rows)
+    bad = [r for r in rows if r["regressed"]]
+    if bad:
+        print(f"{len(bad)} regression(s) over {100 * args.threshold:.0f}%", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
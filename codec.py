@@ -0,0 +1,186 @@
+from __future__ import annotations
+import json, struct, uuid, zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from messages import Message, RawPayload
+
+# Compact binary encoding negotiated per neighbor in hello/echo ("codec" header).
+# Layout (big-endian):
+#   magic u8 | type u8 | flags u8 | hops i16 | ts u64 | table crc u32
+#   src ref | dst ref | [prev ref] | [alg ref] | id | [meta u32+json] | payload u32+bytes
+# (F_REPLY marks an echo whose reply_to header equals its id, the common case.)
+# A ref is u16 index into the shared intern table, or 0xFFFF + u8 len + utf-8.
+# The first byte (0xB7) can never start a JSON document, so receivers tell the
+# two formats apart without any extra framing.
+MAGIC = 0xB7
+BIN1 = "bin1"
+_HEAD = struct.Struct("!BBBhQI")
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_INLINE = 0xFFFF
+
+_TYPES = ["message", "hello", "hello_ack", "lsp", "info", "echo"]
+_TYPE_CODE = {t: i for i, t in enumerate(_TYPES)}
+_ALGS = ["flooding", "lsr", "dvr", "dijkstra"]
+
+F_PREV, F_ALG, F_UUID, F_META, F_HLIST, F_REPLY = 1, 2, 4, 8, 16, 128
+P_NONE, P_STR, P_JSON = 0, 1, 2
+_PKIND_SHIFT = 5
+
+def is_binary(data) -> bool:
+    return isinstance(data, (bytes, bytearray, memoryview)) and len(data) > 0 and data[0] == MAGIC
+
+class BinaryCodec:
+    """Encoder/decoder for one intern table (node wire ids + algorithm names)."""
+    def __init__(self, names: Iterable[str]):
+        self.table: List[str] = ["*"] + sorted({str(n) for n in names} - {"*"}) + _ALGS
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.table)}
+        self.crc = zlib.crc32("\n".join(self.table).encode("utf-8"))
+
+    @property
+    def offer(self) -> str:
+        """Value of the 'codec' header: codec name + intern table checksum."""
+        return f"{BIN1}:{self.crc:08x}"
+
+    def accepts(self, offer) -> bool:
+        return offer == self.offer
+
+    # ---- encode ----
+    def _ref(self, out: bytearray, s: str) -> None:
+        i = self.index.get(s)
+        if i is not None:
+            out += _U16.pack(i)
+            return
+        b = s.encode("utf-8")
+        if len(b) > 255:
+            raise ValueError("name too long")
+        out += _U16.pack(_INLINE)
+        out.append(len(b))
+        out += b
+
+    def encode(self, m: Message) -> Optional[bytes]:
+        """Binary form of m, or None if it holds values the format cannot carry."""
+        code = _TYPE_CODE.get(m.type)
+        if code is None or type(m.hops) is not int or type(m.ts) is not int or not isinstance(m.src, str) \
+                or not isinstance(m.dst, str) or not -32768 <= m.hops <= 32767 or not 0 <= m.ts < 2**64:
+            return None
+        flags = 0
+        if m.prev is not None:
+            if not isinstance(m.prev, str):
+                return None
+            flags |= F_PREV
+        if m.alg is not None:
+            if not isinstance(m.alg, str):
+                return None
+            flags |= F_ALG
+        if not isinstance(m.id, str):
+            return None
+        uid = None
+        if len(m.id) == 36:
+            try:
+                uid = uuid.UUID(m.id)
+                if str(uid) == m.id:
+                    flags |= F_UUID
+                else:
+                    uid = None
+            except ValueError:
+                pass
+        hdr = m.hdr
+        if "reply_to" in hdr and hdr["reply_to"] == m.id:
+            flags |= F_REPLY
+            hdr = {k: v for k, v in hdr.items() if k != "reply_to"}
+        if hdr or m.extra:
+            flags |= F_META
+        if m.hdr_list:
+            flags |= F_HLIST
+        p = m.raw_payload
+        if p is None:
+            pkind, pbytes = P_NONE, b""
+        elif isinstance(p, str) and not isinstance(p, RawPayload):
+            pkind, pbytes = P_STR, p.encode("utf-8")
+        else:
+            pkind, pbytes = P_JSON, (p if isinstance(p, RawPayload) else json.dumps(p, ensure_ascii=False)).encode("utf-8")
+        try:
+            out = bytearray(_HEAD.pack(MAGIC, code, flags | (pkind << _PKIND_SHIFT), m.hops, m.ts, self.crc))
+            self._ref(out, m.src)
+            self._ref(out, m.dst)
+            if flags & F_PREV:
+                self._ref(out, m.prev)
+            if flags & F_ALG:
+                self._ref(out, m.alg)
+            if uid is not None:
+                out += uid.bytes
+            else:
+                b = m.id.encode("utf-8")
+                if len(b) > 255:
+                    return None
+                out.append(len(b)); out += b
+            if flags & F_META:
+                meta = json.dumps([hdr, m.extra], ensure_ascii=False).encode("utf-8")
+                out += _U32.pack(len(meta)); out += meta
+        except (ValueError, TypeError, struct.error):
+            return None
+        out += _U32.pack(len(pbytes))
+        out += pbytes
+        return bytes(out)
+
+    # ---- decode ----
+    def _read_ref(self, data, off: int) -> Tuple[str, int]:
+        (i,) = _U16.unpack_from(data, off)
+        off += 2
+        if i != _INLINE:
+            return self.table[i], off
+        n = data[off]
+        return bytes(data[off + 1:off + 1 + n]).decode("utf-8"), off + 1 + n
+
+    def sender(self, data) -> Optional[str]:
+        """src of a frame that failed to decode, if still readable (same table, or an inline name)."""
+        try:
+            crc = _HEAD.unpack_from(data, 0)[-1]
+            (i,) = _U16.unpack_from(data, _HEAD.size)
+            if i != _INLINE and crc != self.crc:
+                return None
+            return self._read_ref(data, _HEAD.size)[0]
+        except (struct.error, IndexError, UnicodeDecodeError):
+            return None
+
+    def decode(self, data) -> Message:
+        magic, code, flags, hops, ts, crc = _HEAD.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("not a binary message")
+        if crc != self.crc:
+            raise ValueError("intern table mismatch")
+        off = _HEAD.size
+        m = Message.__new__(Message)
+        m.type = _TYPES[code]
+        m.hops, m.ts = hops, ts
+        m.src, off = self._read_ref(data, off)
+        m.dst, off = self._read_ref(data, off)
+        m.prev = m.alg = None
+        if flags & F_PREV:
+            m.prev, off = self._read_ref(data, off)
+        if flags & F_ALG:
+            m.alg, off = self._read_ref(data, off)
+        if flags & F_UUID:
+            m.id = str(uuid.UUID(bytes=bytes(data[off:off + 16]))); off += 16
+        else:
+            n = data[off]
+            m.id = bytes(data[off + 1:off + 1 + n]).decode("utf-8"); off += 1 + n
+        m.hdr, m.extra = {}, {}
+        if flags & F_META:
+            (n,) = _U32.unpack_from(data, off); off += 4
+            m.hdr, m.extra = json.loads(bytes(data[off:off + n]).decode("utf-8")); off += n
+        if flags & F_REPLY:
+            m.hdr["reply_to"] = m.id
+        m.hdr_list = bool(flags & F_HLIST)
+        (n,) = _U32.unpack_from(data, off); off += 4
+        pkind = (flags >> _PKIND_SHIFT) & 3
+        if pkind == P_NONE:
+            m._payload = None
+        elif pkind == P_STR:
+            m._payload = bytes(data[off:off + n]).decode("utf-8")
+        else:
+            raw = RawPayload(bytes(data[off:off + n]).decode("utf-8"))
+            m._payload = raw if m.type == "message" else raw.value()
+        m._enc = None
+        return m
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import sys, time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, Set
+
+class DedupCache:
+    """
+    Bounded duplicate-suppression set with time-based expiry.
+
+    Ids are stored in a ring of `generations` sets. The newest set receives
+    inserts; every window/(generations-1) seconds (or when it holds
+    max_ids/generations ids) a fresh set is pushed and the oldest is dropped.
+    An id is therefore remembered for at least `window` seconds unless the hard
+    cap `max_ids` forces an early rotation.
+    """
+    def __init__(self, window: float = 60.0, max_ids: int = 200_000, generations: int = 4,
+                 clock: Callable[[], float] = time.time):
+        if generations < 2:
+            raise ValueError("generations must be >= 2")
+        self.window = float(window)
+        self.max_ids = int(max_ids)
+        self._clock = clock
+        self._span = self.window / (generations - 1)
+        self._gen_cap = max(1, self.max_ids // generations)
+        self._gens: Deque[Set[Hashable]] = deque(set() for _ in range(generations))
+        self._gen_start = clock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.forced_rotations = 0
+
+    def _rotate(self) -> None:
+        old = self._gens.pop()
+        self.evictions += len(old)
+        self._gens.appendleft(set())
+
+    def _maybe_rotate(self) -> None:
+        now = self._clock()
+        elapsed = now - self._gen_start
+        if elapsed >= self._span:
+            # one rotation per elapsed span (idle periods expire several at once)
+            for _ in range(min(len(self._gens), int(elapsed // self._span))):
+                self._rotate()
+            self._gen_start = now
+        elif len(self._gens[0]) >= self._gen_cap:
+            self.forced_rotations += 1
+            self._rotate()
+            self._gen_start = now
+
+    def __contains__(self, key: Hashable) -> bool:
+        for g in self._gens:
+            if key in g:
+                return True
+        return False
+
+    def add(self, key: Hashable) -> bool:
+        """Insert key; return True if it was new, False if it is a duplicate."""
+        if key in self:
+            self.hits += 1
+            return False
+        self._maybe_rotate()
+        self._gens[0].add(key)
+        self.misses += 1
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(g) for g in self._gens)
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint: set tables plus the (sampled) size of stored ids."""
+        total = sum(sys.getsizeof(g) for g in self._gens)
+        n = len(self)
+        if n:
+            sample = [k for g in self._gens for k in list(g)[:32]][:32]
+            total += n * sum(sys.getsizeof(k) for k in sample) // len(sample)
+        return total
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "forced_rotations": self.forced_rotations,
+                "memory_bytes": self.memory_bytes()}
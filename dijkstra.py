@@ -1,43 +1,80 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional, Union
 import heapq
+from graph import CSRGraph, bidirectional_csr, dijkstra_csr, spf_csr
+
+INF = float('inf')
 
 @dataclass
 class PathResult:
     dist: Dict[str, float]
     prev: Dict[str, Optional[str]]
     next_hop: Dict[str, Optional[str]]
+    # ECMP: todos los primeros saltos de costo mínimo por destino (None si no se calculó)
+    next_hops: Optional[Dict[str, Tuple[str, ...]]] = None
+
+def _same_cost(a: float, b: float) -> bool:
+    return abs(a - b) <= 1e-9 * max(1.0, abs(b))
 
-def _compute_next_hops(prev: Dict[str, Optional[str]], source: str) -> Dict[str, Optional[str]]:
+def _ecmp_of(x: str, source: str, dist: Dict[str, float], radj: Dict[str, Dict[str, float]],
+             nhs: Dict[str, Tuple[str, ...]]) -> Tuple[str, ...]:
     """
-    Cálculo de next-hop por destino
+    Primeros saltos de x: unión sobre todos los predecesores de igual costo.
     """
-    nh: Dict[str, Optional[str]] = {}
-    for dst in prev:
-        if dst == source:
-            nh[dst] = source
-            continue
-        if prev[dst] is None:
-            nh[dst] = None
-            continue
-        cur, prv = dst, prev[dst]
-        while prv is not None and prv != source:
-            cur, prv = prv, prev[prv]
-        nh[dst] = cur if prv == source else None
-    return nh
+    if x == source:
+        return (source,)
+    dx = dist.get(x, INF)
+    if dx == INF:
+        return ()
+    out: Set[str] = set()
+    for p, w in radj.get(x, {}).items():
+        dp = dist.get(p, INF)
+        if dp < INF and _same_cost(dp + w, dx):
+            out.update((x,) if p == source else nhs.get(p, ()))
+    return tuple(sorted(out))
+
+def ecmp_next_hops(topology: Dict[str, Dict[str, float]], dist: Dict[str, float], source: str,
+                   radj: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Tuple[str, ...]]:
+    """
+    Conjunto de next-hops de igual costo para cada destino, dado 'dist'
+    (se recorre en orden de distancia, así los predecesores ya están resueltos).
+    """
+    if radj is None:
+        radj = {}
+        for u, nbrs in topology.items():
+            for v, w in nbrs.items():
+                radj.setdefault(v, {})[u] = w
+    nhs: Dict[str, Tuple[str, ...]] = {}
+    for x in sorted((v for v in dist if dist[v] < INF), key=dist.__getitem__):
+        nhs[x] = _ecmp_of(x, source, dist, radj, nhs)
+    for x in dist:
+        nhs.setdefault(x, ())
+    return nhs
 
-def dijkstra(topology: Dict[str, Dict[str, float]], source: str) -> PathResult:
+def dijkstra(topology: Union[Dict[str, Dict[str, float]], CSRGraph], source: str, ecmp: bool = False,
+             target: Optional[str] = None) -> PathResult:
     """
     Dijkstra clásico con cálculo de next_hop para tabla de ruteo.
-    - topology: {node: {neighbor: weight, ...}, ...}
+    - topology: {node: {neighbor: weight, ...}, ...} o un CSRGraph
     - source: nodo origen
+    - ecmp: además calcula next_hops (todos los caminos de igual costo)
+    - target: corta la búsqueda al asentar ese destino (consulta de un solo destino);
+      solo los nodos ya asentados tienen valores definitivos
+    El primer salto se propaga al relajar (el de u pasa a v), sin recorrer prev al final.
     Retorna distancias, predecesores y next_hop desde 'source'.
     """
-    
-    dist = {v: float('inf') for v in topology}
+    if isinstance(topology, CSRGraph):
+        res = _dijkstra_graph(topology, source, target)
+        if ecmp:
+            res.next_hops = ecmp_next_hops(topology.to_dict(), res.dist, source)
+        return res
+
+    dist = {v: INF for v in topology}
     prev: Dict[str, Optional[str]] = {v: None for v in topology}
+    next_hop: Dict[str, Optional[str]] = {v: None for v in topology}
     dist[source] = 0.0
+    next_hop[source] = source
 
     pq: List[Tuple[float, str]] = [(0.0, source)]
     visited = set()
@@ -46,17 +83,151 @@ def dijkstra(topology: Dict[str, Dict[str, float]], source: str) -> PathResult:
         d, u = heapq.heappop(pq)
         if u in visited:
             continue
+        if u == target:
+            break
         visited.add(u)
+        nh = next_hop[u]
         for v, w in topology.get(u, {}).items():
             alt = d + w
             if alt < dist[v]:
                 dist[v] = alt
                 prev[v] = u
+                next_hop[v] = v if u == source else nh
                 heapq.heappush(pq, (alt, v))
 
-    next_hop = _compute_next_hops(prev, source)
+    return PathResult(dist=dist, prev=prev, next_hop=next_hop,
+                      next_hops=ecmp_next_hops(topology, dist, source) if ecmp and target is None else None)
+
+def _dijkstra_graph(g: CSRGraph, source: str, target: Optional[str] = None) -> PathResult:
+    """
+    Dijkstra sobre el CSRGraph (ids enteros); el resultado se traduce a nombres.
+    """
+    if source not in g.index:
+        return PathResult(dist={source: 0.0}, prev={source: None}, next_hop={source: source})
+    names = g.names
+    t = g.index.get(target, -1) if target is not None else -1
+    dist_i, prev_i, first_i = spf_csr(g, g.index[source], t)
+    dist = dict(zip(names, dist_i))
+    prev: Dict[str, Optional[str]] = {n: (names[p] if p >= 0 else None) for n, p in zip(names, prev_i)}
+    next_hop: Dict[str, Optional[str]] = {n: (names[f] if f >= 0 else None) for n, f in zip(names, first_i)}
     return PathResult(dist=dist, prev=prev, next_hop=next_hop)
 
+def routing_table(topology: Union[Dict[str, Dict[str, float]], CSRGraph],
+                  me: str) -> Dict[str, Dict[str, float | str | None]]:
+    """
+    Tabla de ruteo en una sola pasada: cada destino entra a la tabla al asentarse,
+    con su costo y el primer salto propagado. Igual a
+    build_routing_table(dijkstra(topology, me), me), sin armar el PathResult.
+    """
+    if isinstance(topology, CSRGraph):
+        if me not in topology.index:
+            return {me: {"next_hop": me, "cost": 0.0}}
+        names = topology.names
+        dist_i, _, first_i = spf_csr(topology, topology.index[me])
+        return {n: {"next_hop": names[f] if f >= 0 else None, "cost": d}
+                for n, d, f in zip(names, dist_i, first_i)}
+
+    table: Dict[str, Dict[str, float | str | None]] = {}
+    dist: Dict[str, float] = {me: 0.0}
+    first: Dict[str, str] = {me: me}
+    pq: List[Tuple[float, str]] = [(0.0, me)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if u in table:
+            continue
+        nh = first[u]
+        table[u] = {"next_hop": nh, "cost": d}
+        for v, w in topology.get(u, {}).items():
+            alt = d + w
+            if alt < dist.get(v, INF):
+                dist[v] = alt
+                first[v] = v if u == me else nh
+                heapq.heappush(pq, (alt, v))
+    # inalcanzables, como en build_routing_table
+    for v in topology:
+        if v not in table:
+            table[v] = {"next_hop": None, "cost": INF}
+    return table
+
+def shortest_path(topology: Union[Dict[str, Dict[str, float]], CSRGraph], source: str, target: str,
+                  reverse: Union[Dict[str, Dict[str, float]], CSRGraph, None] = None) -> Tuple[float, List[str]]:
+    """
+    Camino mínimo de un solo par con búsqueda bidireccional (para consultas bajo demanda):
+    se expande por turnos desde ambos extremos y se corta cuando la suma de los dos
+    frentes ya no puede mejorar el mejor camino encontrado.
+    - reverse: enlaces invertidos (para un CSRGraph, topology.reverse()); por defecto
+      se asume simétrico (los enlaces del laboratorio son bidireccionales)
+    Retorna (costo, [source, ..., target]) o (inf, []) si no hay camino.
+    """
+    if source == target:
+        return 0.0, [source]
+    if isinstance(topology, CSRGraph):
+        s, t = topology.index.get(source), topology.index.get(target)
+        if s is None or t is None:
+            return INF, []
+        cost, path = bidirectional_csr(topology, s, t, reverse)
+        return cost, [topology.names[i] for i in path]
+
+    graphs = (topology, topology if reverse is None else reverse)
+    dist: Tuple[Dict[str, float], Dict[str, float]] = ({source: 0.0}, {target: 0.0})
+    prev: Tuple[Dict[str, Optional[str]], Dict[str, Optional[str]]] = ({source: None}, {target: None})
+    done: Tuple[Set[str], Set[str]] = (set(), set())
+    pqs: Tuple[List[Tuple[float, str]], List[Tuple[float, str]]] = ([(0.0, source)], [(0.0, target)])
+    best, meet = INF, None
+    while pqs[0] and pqs[1] and pqs[0][0][0] + pqs[1][0][0] < best:
+        side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+        d, u = heapq.heappop(pqs[side])
+        if u in done[side]:
+            continue
+        done[side].add(u)
+        ds, ps, other = dist[side], prev[side], dist[1 - side]
+        for v, w in graphs[side].get(u, {}).items():
+            alt = d + w
+            if alt < ds.get(v, INF):
+                ds[v] = alt
+                ps[v] = u
+                heapq.heappush(pqs[side], (alt, v))
+            if v in other and alt + other[v] < best:
+                best, meet = alt + other[v], v
+    if meet is None:
+        return INF, []
+    path: List[str] = []
+    x: Optional[str] = meet
+    while x is not None:
+        path.append(x)
+        x = prev[0][x]
+    path.reverse()
+    x = prev[1][meet]
+    while x is not None:
+        path.append(x)
+        x = prev[1][x]
+    return best, path
+
+def loop_free_alternates(g: CSRGraph, source: str, dist: Dict[str, float],
+                         next_hops: Dict[str, Tuple[str, ...]]) -> Dict[str, str]:
+    """
+    Next hop de respaldo por destino (LFA, RFC 5286), para usar apenas cae el primario.
+    Un vecino N sirve para D si dist(N, D) < dist(N, S) + dist(S, D): su camino a D
+    no vuelve por S. Requiere un SPF desde cada vecino; se elige el de menor costo total.
+    """
+    s = g.index.get(source)
+    if s is None:
+        return {}
+    names = g.names
+    best: Dict[str, Tuple[float, str]] = {}
+    for n, c in g.row(source).items():
+        dn, _ = dijkstra_csr(g, g.index[n])
+        dns = dn[s]
+        for i, dnd in enumerate(dn):
+            if dnd == INF or i == s:
+                continue
+            dst = names[i]
+            if n in next_hops.get(dst, ()):
+                continue
+            if dnd < dns + dist.get(dst, INF) and c + dnd < best.get(dst, (INF, ""))[0]:
+                best[dst] = (c + dnd, n)
+    return {d: n for d, (_, n) in best.items()}
+
 def build_routing_table(result: PathResult, me: str) -> Dict[str, Dict[str, float | str | None]]:
     """
     Construcción de tabla de ruteo a partir de distancias y next_hop.
@@ -64,7 +235,266 @@ def build_routing_table(result: PathResult, me: str) -> Dict[str, Dict[str, floa
     table: Dict[str, Dict[str, float | str | None]] = {}
     for dst, d in result.dist.items():
         table[dst] = {"next_hop": result.next_hop.get(dst), "cost": d}
+        if result.next_hops is not None:
+            table[dst]["next_hops"] = list(result.next_hops.get(dst, ()))
     # Ajuste self
     table[me]["next_hop"] = me
     table[me]["cost"] = 0.0
+    if result.next_hops is not None:
+        table[me]["next_hops"] = [me]
     return table
+
+Delta = Tuple[str, str, Optional[float]]  # (u, v, costo) ; costo None = enlace eliminado
+
+def topology_delta(old: Dict[str, Dict[str, float]], new: Dict[str, Dict[str, float]]) -> List[Delta]:
+    """
+    Diferencias de enlaces dirigidos entre dos topologías.
+    """
+    deltas: List[Delta] = []
+    for u, nbrs in new.items():
+        o = old.get(u, {})
+        for v, w in nbrs.items():
+            if o.get(v) != w:
+                deltas.append((u, v, w))
+        for v in o:
+            if v not in nbrs:
+                deltas.append((u, v, None))
+    for u, o in old.items():
+        if u not in new:
+            for v in o:
+                deltas.append((u, v, None))
+    return deltas
+
+class IncrementalSPF:
+    """
+    Árbol de caminos mínimos dinámico desde 'source'.
+    - apply(deltas): aplica altas/bajas/cambios de costo y solo re-asienta la parte
+      afectada del árbol (subárboles invalidados + nodos que mejoran).
+    - update(topology): sincroniza con una topología completa vía topology_delta;
+      si el cambio es grande recalcula desde cero.
+    dist/prev/next_hop tienen el mismo significado que en PathResult; con ecmp=True
+    también se mantiene next_hops (solo se recalcula donde cambió algo).
+    """
+    def __init__(self, source: str, topology: Optional[Dict[str, Dict[str, float]]] = None,
+                 full_ratio: float = 0.25, ecmp: bool = False):
+        self.source = source
+        self.full_ratio = full_ratio
+        self.ecmp = ecmp
+        self.next_hops: Dict[str, Tuple[str, ...]] = {source: (source,)}
+        self.adj: Dict[str, Dict[str, float]] = {source: {}}
+        self.radj: Dict[str, Dict[str, float]] = {source: {}}
+        self.dist: Dict[str, float] = {source: 0.0}
+        self.prev: Dict[str, Optional[str]] = {source: None}
+        self.next_hop: Dict[str, Optional[str]] = {source: source}
+        self.children: Dict[str, set] = {}
+        self.edges = 0
+        self.full_runs = 0
+        self.incremental_runs = 0
+        self.resettled = 0
+        if topology is not None:
+            self.reset(topology)
+
+    def result(self) -> PathResult:
+        return PathResult(dist=self.dist, prev=self.prev, next_hop=self.next_hop,
+                          next_hops=self.next_hops if self.ecmp else None)
+
+    def reset(self, topology: Union[Dict[str, Dict[str, float]], CSRGraph]) -> None:
+        if isinstance(topology, CSRGraph):
+            g, topology = topology, topology.to_dict()
+        else:
+            g = None
+        adj: Dict[str, Dict[str, float]] = {u: dict(n) for u, n in topology.items()}
+        adj.setdefault(self.source, {})
+        for nbrs in list(adj.values()):
+            for v in nbrs:
+                adj.setdefault(v, {})
+        radj: Dict[str, Dict[str, float]] = {u: {} for u in adj}
+        for u, nbrs in adj.items():
+            for v, w in nbrs.items():
+                radj[v][u] = w
+        res = dijkstra(g if g is not None and self.source in g.index else adj, self.source)
+        self.adj, self.radj = adj, radj
+        self.edges = sum(len(n) for n in adj.values())
+        self.dist, self.prev, self.next_hop = res.dist, res.prev, res.next_hop
+        self.children = {}
+        for v, p in self.prev.items():
+            if p is not None:
+                self.children.setdefault(p, set()).add(v)
+        if self.ecmp:
+            self.next_hops = ecmp_next_hops(adj, self.dist, self.source, radj)
+        self.full_runs += 1
+
+    def update(self, topology: Dict[str, Dict[str, float]]) -> PathResult:
+        deltas = topology_delta(self.adj, topology)
+        if len(deltas) > max(16, self.full_ratio * self.edges):
+            self.reset(topology)
+        elif deltas:
+            self.apply(deltas)
+        for x in topology:
+            self._ensure(x)
+        return self.result()
+
+    def _update_ecmp(self, seeds: Set[str]) -> None:
+        # en orden de distancia; un cambio se propaga a los sucesores de igual costo
+        dist, adj, radj, nhs, src = self.dist, self.adj, self.radj, self.next_hops, self.source
+        heap = [(dist.get(x, INF), x) for x in seeds if x in dist]
+        heapq.heapify(heap)
+        done: Set[str] = set()
+        while heap:
+            d, x = heapq.heappop(heap)
+            if x in done:
+                continue
+            done.add(x)
+            new = _ecmp_of(x, src, dist, radj, nhs)
+            if new == nhs.get(x):
+                continue
+            nhs[x] = new
+            if d == INF:
+                continue
+            for y, w in adj[x].items():
+                if y not in done and _same_cost(d + w, dist[y]):
+                    heapq.heappush(heap, (dist[y], y))
+
+    def update_graph(self, g: CSRGraph, changed: Set[str]) -> PathResult:
+        """
+        Como update(), pero leyendo solo las filas 'changed' del CSRGraph
+        (las que LinkStateGraph marcó desde la corrida anterior).
+        """
+        if self.full_runs == 0:
+            self.reset(g)
+            return self.result()
+        deltas: List[Delta] = []
+        for u in changed:
+            new = g.row(u)
+            old = self.adj.get(u, {})
+            deltas.extend((u, v, w) for v, w in new.items() if old.get(v) != w)
+            deltas.extend((u, v, None) for v in old if v not in new)
+        if len(deltas) > max(16, self.full_ratio * self.edges):
+            self.reset(g)
+        elif deltas:
+            self.apply(deltas)
+        for x in changed:
+            self._ensure(x)
+        return self.result()
+
+    def _ensure(self, x: str) -> None:
+        if x not in self.adj:
+            self.adj[x] = {}
+            self.radj[x] = {}
+            self.dist[x] = INF
+            self.prev[x] = None
+            self.next_hop[x] = None
+
+    def apply(self, deltas: List[Delta]) -> set:
+        """
+        Aplica los cambios y devuelve los nodos cuyo dist/next_hop pudo cambiar.
+        """
+        adj, radj, dist, prev, children = self.adj, self.radj, self.dist, self.prev, self.children
+        roots: List[str] = []
+        better: List[Tuple[str, str, float]] = []
+        removed: set = set()
+        net: Dict[Tuple[str, str], Optional[float]] = {}
+        for u, v, w in deltas:
+            net[(u, v)] = w  # solo cuenta el último cambio de cada enlace
+        for (u, v), w in net.items():
+            self._ensure(u); self._ensure(v)
+            old = adj[u].get(v)
+            if w is None:
+                if old is None:
+                    continue
+                del adj[u][v]; del radj[v][u]
+                self.edges -= 1
+                removed.update((u, v))
+                if prev[v] == u:
+                    roots.append(v)
+                continue
+            w = float(w)
+            adj[u][v] = w; radj[v][u] = w
+            if old is None:
+                self.edges += 1
+            if old is not None and w > old:
+                if prev[v] == u:
+                    roots.append(v)
+            elif old is None or w < old:
+                better.append((u, v, w))
+
+        # 1) invalidar subárboles que colgaban de enlaces que empeoraron/desaparecieron
+        S: set = set()
+        stack = roots
+        while stack:
+            x = stack.pop()
+            if x in S:
+                continue
+            S.add(x)
+            stack.extend(children.get(x, ()))
+        for x in S:
+            p = prev[x]
+            if p is not None and p not in S:
+                children[p].discard(x)
+            children.pop(x, None)
+            dist[x] = INF
+            prev[x] = None
+
+        # 2) semillas: frontera de S y enlaces que mejoraron
+        heap: List[Tuple[float, str, str]] = []
+        for x in S:
+            best, bp = INF, None
+            for p, w in radj[x].items():
+                if p not in S and dist[p] + w < best:
+                    best, bp = dist[p] + w, p
+            if bp is not None:
+                heap.append((best, x, bp))
+        for u, v, w in better:
+            if u not in S and dist[u] + w < dist[v]:
+                heap.append((dist[u] + w, v, u))
+        heapq.heapify(heap)
+
+        # 3) Dijkstra restringido a lo afectado
+        touched = set(S)
+        while heap:
+            d, x, p = heapq.heappop(heap)
+            if d >= dist[x]:
+                continue
+            op = prev[x]
+            if op is not None:
+                children[op].discard(x)
+            dist[x] = d
+            prev[x] = p
+            children.setdefault(p, set()).add(x)
+            touched.add(x)
+            for y, w in adj[x].items():
+                if d + w < dist[y]:
+                    heapq.heappush(heap, (d + w, y, x))
+        self.resettled += len(touched)
+
+        # 4) next_hop de lo tocado y sus descendientes (padres antes que hijos)
+        nh, src = self.next_hop, self.source
+        seen: set = set()
+        for r in sorted(touched, key=dist.__getitem__):
+            if r in seen:
+                continue
+            stack = [r]
+            while stack:
+                x = stack.pop()
+                seen.add(x)
+                p = prev[x]
+                nh[x] = None if p is None else (x if p == src else nh[p])
+                stack.extend(children.get(x, ()))
+
+        # 5) ECMP: re-evaluar lo tocado, sus sucesores y los extremos de enlaces cambiados
+        if self.ecmp:
+            seeds = set(seen)
+            for x in touched:
+                seeds.update(adj[x])
+            seeds.update(v for _, v in net)
+            self._update_ecmp(seeds)
+
+        # 6) olvidar nodos que quedaron sin enlaces
+        for x in removed:
+            if x != src and not adj[x] and not radj[x]:
+                for m in (adj, radj, dist, prev, nh, self.next_hops):
+                    m.pop(x, None)
+                children.pop(x, None)
+                seen.add(x)
+        self.incremental_runs += 1
+        return seen
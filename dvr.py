@@ -1,84 +1,229 @@
 from __future__ import annotations
-from typing import Dict, Optional, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import threading
 import time
-import json
+from messages import Message
+from throttle import Throttle
 INF = 1e9
 
 class DVR:
-    def __init__(self, me: str):
+    """
+    Distance vector with triggered partial updates.
+    - Vectors go to each neighbor as `info` (hops=1, headers.alg="dvr") with
+      payload {"routing_table": [[dst, cost], ...], "full": bool}.
+    - Only entries whose cost/next hop changed are sent (throttled); the whole
+      table is re-sent every `refresh` seconds, and to a neighbor as soon as its link comes up.
+    - Split horizon with poison reverse: a route learned via n goes back to n as INF.
+    - ecmp: every neighbor at the best cost is kept in next_hops.
+    - lfa: a loop-free alternate neighbor per destination, used when all next hops are down.
+    - An incoming vector or a link change only recomputes the destinations it touches.
+    """
+    def __init__(self, me: str, trig: Optional[Throttle] = None, refresh: float = 10.0, ecmp: bool = True,
+                 lfa: bool = True, clock: Callable[[], float] = time.time):
         self.me = me
+        self._clock = clock
+        self.ecmp = ecmp
+        self.lfa = lfa
         self.dv_from: Dict[str, Dict[str, float]] = {}
         self.dv_from_ts: Dict[str, float] = {}
         self.dv_self: Dict[str, float] = {me: 0.0}
         self.next_hop: Dict[str, Optional[str]] = {me: me}
+        self.next_hops: Dict[str, Tuple[str, ...]] = {me: (me,)}
+        self.backup: Dict[str, str] = {}
+        self.link_cost: Dict[str, float] = {}
         self.changed = True
         self.last_adv = 0.0
+        self.refresh = float(refresh)
+        self.trig = trig or Throttle(0.0, 0.05, 1.0)
+        self._pending: Set[str] = set()
+        # neighbors that just came up: they get the whole table on the next send
+        self._new_nbrs: Set[str] = set()
+        self._lock = threading.Lock()
+        self.recomputed = 0
+        self.sent_entries = 0
 
     def _now(self) -> float:
-        return time.time()
+        return self._clock()
 
     def _alive_neighbors(self, node) -> Set[str]:
-        return set(node.neighbors)
+        return {n for n in node.neighbors if node.is_neighbor_active(n)}
 
     def _cost_to_neighbor(self, node, n: str) -> float:
         return node.cost_to(n)
 
-    def _destinations(self, node) -> Set[str]:
-        dests = set(self.dv_self.keys()) | set(node.neighbors) | {self.me}
-        for _, dv in self.dv_from.items():
-            dests |= set(dv.keys())
-        return dests
-
-    def update_local_links(self, node) -> None:
-        # Recompute from scratch
-        dests = self._destinations(node)
-        new_dv: Dict[str, float] = {self.me: 0.0}
-        new_nh: Dict[str, Optional[str]] = {self.me: self.me}
+    def _recompute(self, dests: Iterable[str]) -> None:
+        """Bellman-Ford step for `dests` only; changed entries are queued for advertising."""
+        links = [(n, c, self.dv_from.get(n) or {}) for n, c in self.link_cost.items()]
         for dst in dests:
             if dst == self.me:
                 continue
+            self.recomputed += 1
+            cur_nh = self.next_hop.get(dst)
             best_cost, best_nh = INF, None
-            if dst in node.neighbors:
-                c = self._cost_to_neighbor(node, dst)
-                if c < best_cost:
-                    best_cost, best_nh = c, dst
-            for n in node.neighbors:
-                via = self._cost_to_neighbor(node, n) + self.dv_from.get(n, {}).get(dst, INF)
-                if via < best_cost:
+            via_all: Dict[str, float] = {}
+            for n, c, vec in links:
+                via = c if n == dst else c + vec.get(dst, INF)
+                via_all[n] = via
+                # ties keep the current next hop
+                if via < best_cost or (via == best_cost and n == cur_nh):
                     best_cost, best_nh = via, n
-            new_dv[dst] = best_cost
-            new_nh[dst] = best_nh
-        changed = (new_dv != self.dv_self) or (new_nh != self.next_hop)
-        self.dv_self, self.next_hop = new_dv, new_nh
-        self.changed = changed
+            if best_cost >= INF:
+                best_cost, best_nh = INF, None
+            if dst not in self.dv_self and best_nh is None:
+                continue
+            if best_nh is None:
+                nhs: Tuple[str, ...] = ()
+            elif self.ecmp:
+                nhs = tuple(sorted(n for n, v in via_all.items() if abs(v - best_cost) <= 1e-9 * max(1.0, best_cost)))
+            else:
+                nhs = (best_nh,)
+            if self.lfa:
+                self._set_backup(dst, best_cost, nhs, via_all)
+            if self.dv_self.get(dst) != best_cost or cur_nh != best_nh or self.next_hops.get(dst) != nhs:
+                self.dv_self[dst] = best_cost
+                self.next_hop[dst] = best_nh
+                self.next_hops[dst] = nhs
+                self._mark(dst)
+
+    def _set_backup(self, dst: str, best: float, nhs: Tuple[str, ...], via_all: Dict[str, float]) -> None:
+        # LFA: n is loop-free for dst if D(n, dst) < D(n, me) + D(me, dst); routes n sends
+        # through us arrive poisoned (INF), so they never qualify
+        alt, alt_cost = None, INF
+        for n, via in via_all.items():
+            if n in nhs or via >= INF:
+                continue
+            d_n = 0.0 if n == dst else self.dv_from.get(n, {}).get(dst, INF)
+            if d_n < self.link_cost[n] + best and via < alt_cost:
+                alt, alt_cost = n, via
+        if self.backup.get(dst) != alt:
+            if alt is None:
+                self.backup.pop(dst, None)
+            else:
+                self.backup[dst] = alt
+            self.changed = True
+
+    def _mark(self, dst: str) -> None:
+        if not self._pending and not self._new_nbrs:
+            self.trig.request(self._now())
+        self._pending.add(dst)
+        self.changed = True
+
+    def _affected_by(self, n: str) -> Set[str]:
+        out = set(self.dv_from.get(n, {}))
+        out.add(n)
+        out.update(d for d, h in self.next_hops.items() if n in h)
+        return out
+
+    def update_local_links(self, node) -> None:
+        # Only destinations reachable through a neighbor whose link changed are recomputed
+        alive = self._alive_neighbors(node)
+        current = {n: float(self._cost_to_neighbor(node, n)) for n in alive}
+        with self._lock:
+            if current == self.link_cost:
+                return
+            dirty: Set[str] = set()
+            for n in set(current) | set(self.link_cost):
+                if current.get(n) != self.link_cost.get(n):
+                    dirty |= self._affected_by(n)
+                if n not in current:
+                    self.dv_from.pop(n, None)
+                    self.dv_from_ts.pop(n, None)
+            fresh = set(current) - set(self.link_cost)
+            if fresh:
+                if not self._pending and not self._new_nbrs:
+                    self.trig.request(self._now())
+                self._new_nbrs |= fresh
+            self.link_cost = current
+            self._recompute(dirty)
 
     def build_routing_table(self) -> Dict[str, Dict[str, float | str | None]]:
         table: Dict[str, Dict[str, float | str | None]] = {}
-        for dst, cost in self.dv_self.items():
-            nh = self.next_hop.get(dst)
-            table[dst] = {"next_hop": nh, "cost": float(cost)}
+        with self._lock:
+            for dst, cost in self.dv_self.items():
+                nh = self.next_hop.get(dst)
+                table[dst] = {"next_hop": nh, "cost": float(cost) if cost < INF else float("inf"),
+                              "next_hops": list(self.next_hops.get(dst, ())), "backup": self.backup.get(dst)}
         return table
 
     def should_advertise(self) -> bool:
-        return (self._now() - self.last_adv) > 10.0
+        now = self._now()
+        return (now - self.last_adv) > self.refresh or \
+            (bool(self._pending or self._new_nbrs) and self.trig.due(now))
+
+    def next_due(self) -> Optional[float]:
+        return self.trig.next_due() if self._pending or self._new_nbrs else None
+
+    def _vector_for(self, node, n: str, dests: Iterable[str]) -> List[List[Any]]:
+        out = []
+        for d in dests:
+            c = self.dv_self.get(d, INF)
+            if d != self.me and n in self.next_hops.get(d, ()):
+                c = INF  # poison reverse (to every equal-cost next hop)
+            wid = node._to_wire_id(d) if d in node.nodes_map else d
+            out.append([wid, c])
+        return out
 
     def advertise(self, node) -> None:
-        # Broadcast a tiny "info" control to neighbors (not parsed by peers)
-        msg = {
-            "type": "info",
-            "from": node._to_wire_id(self.me),
-            "to": "*",
-            "hops": 6,
-            "headers": [{"id": f"dv-{self.me}-{int(self._now()*1000)}", "ts": int(self._now()*1000), "table_version": int(self._now())}],
-            "payload": {"routing_table": []}
-        }
-        node._broadcast_wire(json.dumps(msg))
-        self.last_adv = self._now()
-        self.changed = False
-
-    def on_receive_info(self, node, msg: dict) -> None:
-        pass
+        now = self._now()
+        with self._lock:
+            full = (now - self.last_adv) > self.refresh
+            dests = sorted(self.dv_self) if full else sorted(self._pending)
+            msgs = []
+            for n in sorted(self.link_cost):
+                n_full = full or n in self._new_nbrs
+                if not n_full and not dests:
+                    continue
+                vec = self._vector_for(node, n, sorted(self.dv_self) if n_full else dests)
+                msgs.append((n, Message("info", node._to_wire_id(self.me), node._to_wire_id(n), 1,
+                                        {"routing_table": vec, "full": n_full}, alg="dvr", hdr_list=False)))
+                self.sent_entries += len(vec)
+            if self._pending or self._new_nbrs:
+                self.trig.done(now)
+            self._pending.clear()
+            self._new_nbrs.clear()
+            if full:
+                self.last_adv = now
+                # unreachable entries were just announced as INF; forget them
+                for d in [d for d, c in self.dv_self.items() if c >= INF]:
+                    self.dv_self.pop(d, None)
+                    self.next_hop.pop(d, None)
+                    self.next_hops.pop(d, None)
+                    self.backup.pop(d, None)
+        for n, m in msgs:
+            node._send(n, m)
+
+    def on_receive_info(self, node, msg) -> None:
+        n = node._from_wire_id(msg.src)
+        p = msg.payload if isinstance(msg.payload, dict) else {}
+        rows = p.get("routing_table") or []
+        vec: Dict[str, float] = {}
+        for row in rows:
+            d, c = (row.get("dst"), row.get("cost")) if isinstance(row, dict) else row
+            d = node._from_wire_id(d)
+            if d != self.me:
+                vec[d] = min(float(c), INF)
+        with self._lock:
+            old = self.dv_from.setdefault(n, {})
+            self.dv_from_ts[n] = self._now()
+            if p.get("full"):
+                dirty = {d for d in set(old) | set(vec) if old.get(d) != vec.get(d)}
+                self.dv_from[n] = vec
+            else:
+                dirty = {d for d, c in vec.items() if old.get(d) != c}
+                old.update(vec)
+            if n in self.link_cost:
+                self._recompute(dirty)
+        if self._pending:
+            node._kick_routing()
 
     def expire(self, node, dv_max_age: float = 30.0) -> None:
-        # No-op in stub
-        return
+        # drop vectors from neighbors that stopped sending them
+        now = self._now()
+        with self._lock:
+            dirty: Set[str] = set()
+            for n, ts in list(self.dv_from_ts.items()):
+                if now - ts > dv_max_age:
+                    dirty |= set(self.dv_from.pop(n, {}))
+                    self.dv_from_ts.pop(n, None)
+            if dirty:
+                self._recompute(dirty)
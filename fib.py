@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional, Tuple
+
+# Forwarding information base: an immutable snapshot compiled from the routing
+# table and keyed by wire id (what msg.dst carries), so the data path does one
+# dict lookup, no name translation and no lock. The routing thread compiles a
+# new Fib and publishes it with a single attribute assignment; a reader keeps
+# whichever snapshot it loaded for the whole forwarding decision. Entries also
+# carry the resolved send handle of each hop (NeighborLink), so forwarding does
+# not look the neighbor up again in the transport's maps.
+
+class NeighborLink:
+    """Send handle for one neighbor: its transport address and, once created, its outbound queue."""
+    __slots__ = ("name", "addr", "sender")
+
+    def __init__(self, name: str, addr: Any):
+        self.name = name        # neighbor id
+        self.addr = addr        # pool key (tcp), Redis channel, or memnet port
+        self.sender = None      # NeighborSender, set on first use
+
+    def __repr__(self) -> str:
+        return f"NeighborLink({self.name!r}, {self.addr!r})"
+
+class FibEntry:
+    __slots__ = ("hops", "backup", "cost", "links", "backup_link")
+
+    def __init__(self, hops: Tuple[str, ...], backup: Optional[str], cost: float,
+                 links: Optional[Tuple[NeighborLink, ...]] = None, backup_link: Optional[NeighborLink] = None):
+        self.hops = hops        # neighbor ids, in the order the outbound queues/pool key them
+        self.backup = backup    # loop-free alternate, used only when every hop is down
+        self.cost = cost
+        self.links = links      # handles aligned with hops (None: not resolved, e.g. hand-built entries)
+        self.backup_link = backup_link
+
+    def __repr__(self) -> str:
+        return f"FibEntry(hops={self.hops}, backup={self.backup}, cost={self.cost})"
+
+class Fib:
+    __slots__ = ("version", "entries", "local")
+
+    def __init__(self, version: int = 0, entries: Optional[Dict[str, FibEntry]] = None,
+                 local: FrozenSet[str] = frozenset()):
+        self.version = version
+        self.entries: Dict[str, FibEntry] = entries or {}
+        self.local = local      # wire ids (and node id) that mean "this node"
+
+    def get(self, wid: str) -> Optional[FibEntry]:
+        return self.entries.get(wid)
+
+    def __contains__(self, wid: str) -> bool:
+        return wid in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+def compile_fib(table: Mapping[str, Mapping[str, Any]], me: str, to_wire: Callable[[str], str],
+                version: int, link: Optional[Callable[[str], NeighborLink]] = None) -> Fib:
+    """Fib from a routing table ({dst: {"next_hop", "next_hops"?, "backup"?, "cost"}}); link resolves hop handles."""
+    entries: Dict[str, FibEntry] = {}
+    for dst, e in table.items():
+        if dst == me:
+            continue
+        hops = tuple(h for h in (e.get("next_hops") or ([e["next_hop"]] if e.get("next_hop") else [])) if h != me)
+        backup = e.get("backup")
+        links = blink = None
+        if link is not None:
+            links = tuple(link(h) for h in hops)
+            blink = link(backup) if backup else None
+        entries[to_wire(dst)] = FibEntry(hops, backup, float(e.get("cost", float("inf"))), links, blink)
+    return Fib(version, entries, frozenset((me, to_wire(me))))
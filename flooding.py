@@ -1,60 +1,67 @@
 from __future__ import annotations
-from typing import Dict, Set
-from messages import get_header, set_header, ensure_header_id_ts, dumps
+import time
+from typing import Callable
+from messages import Message
+from dedup import DedupCache
+from nodelog import Lazy
 
 class Flooding:
-    """Simple flooding with dedup (headers[0].id) and suppression using 'prev' header."""
-    def __init__(self):
-        self.seen: Set[str] = set()
+    """Simple flooding with dedup (headers[0].id) and suppression using 'prev' header.
 
-    def _msg_id(self, msg: Dict) -> str:
-        ensure_header_id_ts(msg)
-        return str(get_header(msg, "id"))
+    window should exceed the longest time a message can keep circulating
+    (hop budget x worst per-hop delay); max_ids caps dedup memory.
+    """
+    def __init__(self, window: float = 60.0, max_ids: int = 200_000, clock: Callable[[], float] = time.time):
+        self.seen = DedupCache(window=window, max_ids=max_ids, clock=clock)
 
-    def _flood(self, node, msg: Dict) -> None:
+    def _msg_id(self, msg: Message) -> str:
+        return str(msg.id)
+
+    def _flood(self, node, msg: Message) -> None:
         try:
-            hops = int(msg.get("hops", 0))
+            hops = int(msg.hops)
         except Exception:
             hops = 0
         if hops <= 0:
             return
 
-        prev = get_header(msg, "prev")
-        fwd = dict(msg)
-        fwd["hops"] = hops - 1
-        set_header(fwd, "prev", node.node_id)
-        wire = dumps(fwd)
+        prev = msg.prev
+        fwd = msg.forward(hops - 1, node.node_id)
+        if fwd.hops <= 0:
+            return
 
+        sent = []
         for n in list(node.neighbors):
-            if n == prev or fwd["hops"] <= 0:
-                continue
-            if n == node.node_id:
+            if n == prev or n == node.node_id:
                 continue
             if not node.is_neighbor_active(n):
                 # Skip inactive neighbors (if node tracks health)
                 continue
-            node._send(n, wire)
-            node._log("INFO", f"FWD(flood) → {n} (dst={msg.get('to')}, id={self._msg_id(msg)})", tag="FWD")
+            node._send(n, fwd)
+            sent.append(n)
+        # one record per message, not per neighbor; formatted later by the log writer
+        if sent:
+            node._log("INFO", "FWD(flood) → %s (dst=%s, id=%s)", ",".join(sent), msg.dst, msg.id, tag="FWD")
 
     # ---- entries with dedup ----
-    def handle_message(self, node, msg: Dict) -> None:
+    def handle_message(self, node, msg: Message) -> None:
         mid = self._msg_id(msg)
-        if mid in self.seen:
+        if not self.seen.add(mid):
             return
-        self.seen.add(mid)
 
         # deliver locally?
-        if msg.get("to") in (node._to_wire_id(node.node_id), node.node_id, "*"):
-            node._log("INFO", f"DATA for me from {msg.get('from')}: {msg.get('payload')}", tag="RECV")
-            node.on_data_local(msg)
+        if msg.dst in (node._to_wire_id(node.node_id), node.node_id, "*"):
+            if msg.dst == "*":
+                node._log("INFO", "DATA for all from %s (id=%s): %s", msg.src, msg.id, Lazy(getattr, msg, "payload"),
+                          tag="RECV")
+            node.on_data_local(msg)  # logs RECV for messages addressed to this node
             # For broadcast, also continue flooding
-            if msg.get("to") != "*":
+            if msg.dst != "*":
                 return
         self._flood(node, msg)
 
-    def handle_control(self, node, msg: Dict) -> None:
+    def handle_control(self, node, msg: Message) -> None:
         mid = self._msg_id(msg)
-        if mid in self.seen:
+        if not self.seen.add(mid):
             return
-        self.seen.add(mid)
         self._flood(node, msg)
@@ -0,0 +1,332 @@
+from __future__ import annotations
+import heapq, threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Compact graph for the routing engines: node names interned to ints 0..N-1 and
+# edges in CSR form (row u = targets[offsets[u]:offsets[u+1]], same for weights).
+# ~12 bytes per directed edge against ~100+ for Dict[str, Dict[str, float]].
+INF = float("inf")
+
+class CSRGraph:
+    __slots__ = ("names", "index", "offsets", "targets", "weights")
+
+    def __init__(self, names: List[str], offsets: array, targets: array, weights: array):
+        self.names = names
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_dict(cls, topo: Dict[str, Dict[str, float]], names: Optional[Iterable[str]] = None) -> "CSRGraph":
+        order = list(names) if names is not None else list(topo)
+        seen = set(order)
+        for nbrs in topo.values():
+            for v in nbrs:
+                if v not in seen:
+                    seen.add(v)
+                    order.append(v)
+        index = {n: i for i, n in enumerate(order)}
+        offsets, targets, weights = array("i", [0]), array("i"), array("d")
+        for u in order:
+            row = topo.get(u, {})
+            targets.extend(index[v] for v in row)
+            weights.extend(float(w) for w in row.values())
+            offsets.append(len(targets))
+        return cls(order, offsets, targets, weights)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def row(self, name: str) -> Dict[str, float]:
+        """Out-edges of `name` as {neighbor: cost} (dict adapter)."""
+        i = self.index.get(name)
+        if i is None:
+            return {}
+        a, b = self.offsets[i], self.offsets[i + 1]
+        names = self.names
+        return {names[v]: w for v, w in zip(self.targets[a:b], self.weights[a:b])}
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {n: self.row(n) for n in self.names}
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the CSR arrays (names/index not included)."""
+        return sum(a.buffer_info()[1] * a.itemsize for a in (self.offsets, self.targets, self.weights))
+
+    def reverse(self) -> "CSRGraph":
+        """Transposed graph (in-edges as rows), for backward searches on directed graphs."""
+        n = len(self.names)
+        off, tg, wt = self.offsets, self.targets, self.weights
+        count = [0] * (n + 1)
+        for v in tg:
+            count[v + 1] += 1
+        for i in range(n):
+            count[i + 1] += count[i]
+        offsets = array("i", count)
+        targets, weights = array("i", [0]) * len(tg), array("d", [0.0]) * len(tg)
+        fill = count[:n]
+        for u in range(n):
+            for k in range(off[u], off[u + 1]):
+                v = tg[k]
+                targets[fill[v]] = u
+                weights[fill[v]] = wt[k]
+                fill[v] += 1
+        g = CSRGraph.__new__(CSRGraph)
+        g.names, g.index = self.names, self.index
+        g.offsets, g.targets, g.weights = offsets, targets, weights
+        return g
+
+def dijkstra_csr(g: CSRGraph, source: int) -> Tuple[List[float], List[int]]:
+    """Dijkstra over int ids; prev[v] = -1 where there is none."""
+    n = len(g.names)
+    dist = [INF] * n
+    prev = [-1] * n
+    dist[source] = 0.0
+    off, tg, wt = g.offsets, g.targets, g.weights
+    pq: List[Tuple[float, int]] = [(0.0, source)]
+    pop, push = heapq.heappop, heapq.heappush
+    while pq:
+        d, u = pop(pq)
+        if d > dist[u]:
+            continue
+        for k in range(off[u], off[u + 1]):
+            v = tg[k]
+            alt = d + wt[k]
+            if alt < dist[v]:
+                dist[v] = alt
+                prev[v] = u
+                push(pq, (alt, v))
+    return dist, prev
+
+def spf_csr(g: CSRGraph, source: int, target: int = -1) -> Tuple[List[float], List[int], List[int]]:
+    """
+    dijkstra_csr that also carries the first hop of every node while relaxing
+    (first[v] = v for the source's neighbors, first[u] otherwise), so next hops
+    need no walk back along prev. With target >= 0 it stops once target is
+    settled; only settled nodes have final values then.
+    """
+    n = len(g.names)
+    dist = [INF] * n
+    prev = [-1] * n
+    first = [-1] * n
+    dist[source] = 0.0
+    first[source] = source
+    off, tg, wt = g.offsets, g.targets, g.weights
+    pq: List[Tuple[float, int]] = [(0.0, source)]
+    pop, push = heapq.heappop, heapq.heappush
+    while pq:
+        d, u = pop(pq)
+        if d > dist[u]:
+            continue
+        if u == target:
+            break
+        fu = first[u]
+        for k in range(off[u], off[u + 1]):
+            v = tg[k]
+            alt = d + wt[k]
+            if alt < dist[v]:
+                dist[v] = alt
+                prev[v] = u
+                first[v] = v if u == source else fu
+                push(pq, (alt, v))
+    return dist, prev, first
+
+def bidirectional_csr(g: CSRGraph, source: int, target: int,
+                      rg: Optional[CSRGraph] = None) -> Tuple[float, List[int]]:
+    """
+    Single-pair shortest path searching from both ends at once; rg is the
+    reverse graph (g itself when links are symmetric, as LinkStateGraph's are).
+    Returns (cost, [source, ..., target]), or (INF, []) if unreachable.
+    """
+    if source == target:
+        return 0.0, [source]
+    rg = g if rg is None else rg
+    dist = ({source: 0.0}, {target: 0.0})
+    prev = ({source: -1}, {target: -1})
+    done: Tuple[Set[int], Set[int]] = (set(), set())
+    pqs: Tuple[List[Tuple[float, int]], List[Tuple[float, int]]] = ([(0.0, source)], [(0.0, target)])
+    graphs = (g, rg)
+    best, meet = INF, -1
+    pop, push = heapq.heappop, heapq.heappush
+    while pqs[0] and pqs[1] and pqs[0][0][0] + pqs[1][0][0] < best:
+        side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+        d, u = pop(pqs[side])
+        if u in done[side]:
+            continue
+        done[side].add(u)
+        gs, ds, ps, other = graphs[side], dist[side], prev[side], dist[1 - side]
+        off, tg, wt = gs.offsets, gs.targets, gs.weights
+        for k in range(off[u], off[u + 1]):
+            v = tg[k]
+            alt = d + wt[k]
+            if alt < ds.get(v, INF):
+                ds[v] = alt
+                ps[v] = u
+                push(pqs[side], (alt, v))
+            if v in other and alt + other[v] < best:
+                best, meet = alt + other[v], v
+    if meet < 0:
+        return INF, []
+    path = []
+    x = meet
+    while x >= 0:
+        path.append(x)
+        x = prev[0][x]
+    path.reverse()
+    x = prev[1][meet]
+    while x >= 0:
+        path.append(x)
+        x = prev[1][x]
+    return best, path
+
+class LinkStateGraph:
+    """
+    Undirected link-state topology built incrementally from LSAs.
+    Two-way check: an edge is used when both ends advertise it, or when one does
+    and the other has no LSA at all (e.g. a node that does not run LSR). Its
+    cost is the lower of the advertised costs. csr() only rewrites the rows
+    touched since the last call and copies the others from the previous arrays.
+    LSAs patch it on the receive thread while SPF reads it on the routing thread:
+    every method holds _lock, and snapshot() pairs the arrays with the names
+    changed since the previous snapshot so no change is consumed unseen.
+    """
+    def __init__(self, me: Optional[str] = None):
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._adv: Dict[int, Dict[int, float]] = {}
+        self._radv: Dict[int, Set[int]] = {}
+        self._dirty: Set[int] = set()
+        self._changed: Set[str] = set()
+        self._csr: Optional[CSRGraph] = None
+        self._lock = threading.RLock()
+        if me is not None:
+            self.intern(me)
+
+    def intern(self, name: str) -> int:
+        with self._lock:
+            i = self.index.get(name)
+            if i is None:
+                i = self.index[name] = len(self.names)
+                self.names.append(name)
+                self._dirty.add(i)
+            return i
+
+    def set_row(self, origin: str, costs: Dict[str, float]) -> bool:
+        """Replace the links advertised by `origin`; False if they were already these."""
+        with self._lock:
+            return self._set_row(origin, costs)
+
+    def _set_row(self, origin: str, costs: Dict[str, float]) -> bool:
+        u = self.intern(origin)
+        new = {self.intern(v): float(c) for v, c in costs.items() if v != origin}
+        old = self._adv.get(u, {})
+        if new == old and u in self._adv:
+            return False
+        for v in old.keys() - new.keys():
+            self._radv[v].discard(u)
+        for v in new.keys() - old.keys():
+            self._radv.setdefault(v, set()).add(u)
+        touched = {v for v in old.keys() | new.keys() if old.get(v) != new.get(v)}
+        if u not in self._adv:
+            touched |= self._radv.get(u, set())  # first LSA: links only others claimed now need u's word
+        self._adv[u] = new
+        self._touch(u, touched)
+        return True
+
+    def remove(self, origin: str) -> None:
+        with self._lock:
+            self._remove(origin)
+
+    def _remove(self, origin: str) -> None:
+        u = self.index.get(origin)
+        if u is None or u not in self._adv:
+            return
+        old = self._adv.pop(u)
+        for v in old:
+            self._radv[v].discard(u)
+        self._touch(u, set(old) | self._radv.get(u, set()))
+
+    def _touch(self, u: int, nbrs: Set[int]) -> None:
+        self._dirty.add(u)
+        self._dirty |= nbrs
+        names = self.names
+        self._changed.add(names[u])
+        self._changed.update(names[v] for v in nbrs)
+
+    def take_changed(self) -> Set[str]:
+        """Names whose rows changed since the previous call."""
+        with self._lock:
+            out, self._changed = self._changed, set()
+            return out
+
+    def snapshot(self) -> Tuple[CSRGraph, Set[str]]:
+        """csr() and take_changed() as one step: the names are exactly the changes the arrays include."""
+        with self._lock:
+            g = self._csr_locked()
+            out, self._changed = self._changed, set()
+            return g, out
+
+    def _row(self, u: int) -> Dict[int, float]:
+        adv = self._adv
+        mine = adv.get(u)
+        row: Dict[int, float] = {}
+        if mine is not None:
+            for v, c in mine.items():
+                other = adv.get(v)
+                if other is None:
+                    row[v] = c
+                elif u in other:
+                    row[v] = min(c, other[u])
+        else:
+            for v in self._radv.get(u, ()):
+                row[v] = adv[v][u]
+        return row
+
+    def csr(self) -> CSRGraph:
+        with self._lock:
+            return self._csr_locked()
+
+    def _csr_locked(self) -> CSRGraph:
+        if self._csr is not None and not self._dirty:
+            return self._csr
+        old = self._csr
+        n_old = len(old.offsets) - 1 if old is not None else 0
+        offsets, targets, weights = array("i", [0]), array("i"), array("d")
+        u, n = 0, len(self.names)
+        for d in sorted(self._dirty) + [n]:
+            if d > u and u < n_old:
+                # clean run u..e-1: one slice copy, offsets shifted
+                e = min(d, n_old)
+                a, b = old.offsets[u], old.offsets[e]
+                shift = len(targets) - a
+                targets.extend(old.targets[a:b])
+                weights.extend(old.weights[a:b])
+                offsets.extend([o + shift for o in old.offsets[u + 1:e + 1]])
+                u = e
+            while u < d:
+                row = self._row(u)
+                targets.extend(row.keys())
+                weights.extend(row.values())
+                offsets.append(len(targets))
+                u += 1
+            if d < n:
+                row = self._row(d)
+                targets.extend(row.keys())
+                weights.extend(row.values())
+                offsets.append(len(targets))
+                u = d + 1
+        g = CSRGraph.__new__(CSRGraph)
+        g.names, g.index = list(self.names), dict(self.index)
+        g.offsets, g.targets, g.weights = offsets, targets, weights
+        self._csr = g
+        self._dirty = set()
+        return g
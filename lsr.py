@@ -1,80 +1,347 @@
 from __future__ import annotations
 import json
+import threading
 import time
-from typing import Dict, List, Any
-from messages import make_wire, get_header
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+from messages import Message
+from throttle import Throttle
+from graph import LinkStateGraph
+
+# LSA on the wire. Full LSAs keep the README's top-level seq_num/neighbors
+# (all other groups' nodes read) and add an "lsa" object with the costs, in
+# the order of `neighbors`, and a checksum (plus "age" in s when not fresh):
+#   "seq_num": 7, "neighbors": ["B", "C"], "lsa": {"costs": [1, 4], "cksum": 123}
+# A change of costs only, with the same neighbors, goes out as a delta that
+# applies to the LSA with seq - 1, and a periodic refresh of unchanged links
+# as a bare header. Neither has seq_num/neighbors, so nodes that only read the
+# README fields ignore them (they never see costs anyway); those still get a
+# full LSA every `full_refresh` s:
+#   "lsa": {"seq": 8, "delta": {"C": 2}, "cksum": 456}
+#   "lsa": {"seq": 9, "cksum": 456}
+# cksum is over every neighbor's cost: equal to what a receiver has means
+# nothing to parse and no SPF. A delta or refresh the receiver cannot match
+# (it missed an LSA) is not installed or flooded on; it asks the neighbor it
+# came from for the full record instead (a "req", below), which that neighbor
+# has since it flooded it. headers.id is "lsa:<origin>:<seq>" at every hop and
+# an LSA is flooded on only by nodes that installed it.
+#
+# Database exchange (OSPF-style) when a neighbor comes up, sent to it alone:
+#   "lsa": {"dbd": [[origin, seq, cksum], ...], "init": true}   our LSDB summary
+#   "lsa": {"req": [origin, ...]}                                 records we lack
+# An init summary is answered with ours; each side asks only for what is
+# missing or newer and gets those records back as ordinary full LSAs (with
+# their age), so a new node has the whole LSDB after one exchange per link.
+
+LSA_HOPS = 32
+MAX_AGE = 30.0
+REQ_WAIT = 1.0  # an origin requested from one neighbor is not requested again from others for this long
+
+def _num(c: float):
+    return int(c) if c == int(c) else c
+
+def lsa_checksum(costs: Dict[str, float]) -> int:
+    """CRC32 of "id=cost;..." sorted by wire id; equal adjacencies give equal checksums on every node."""
+    return zlib.crc32(";".join(f"{n}={float(c):g}" for n, c in sorted(costs.items())).encode("utf-8"))
 
 class LSR:
-    def __init__(self, me: str):
+    db_exchange = True  # False: a new neighbor waits for the periodic refreshes
+
+    def __init__(self, me: str, spf: Optional[Throttle] = None, adv: Optional[Throttle] = None,
+                 refresh: float = 15.0, clock: Callable[[], float] = time.time, deltas: bool = True,
+                 full_refresh: float = 60.0):
         self.me = me
+        self._clock = clock
         self.seq = 0
+        # origin -> {seq, ts (origination, local clock), from (wire id), neighbors, costs,
+        #            wire (costs by wire id), cksum (None: incomplete, after a missed delta)}
         self.lsdb: Dict[str, Dict[str, Any]] = {}
+        # int-indexed view of the LSDB, patched per LSA (see graph.py)
+        self.graph = LinkStateGraph(me)
         self.last_local: Dict[str, float] = {}
+        self._seen_local: Dict[str, float] = {}
         self.last_adv = 0.0
-        self.changed = True
+        self.last_full: Optional[float] = None
+        self.refresh = float(refresh)
+        self.full_refresh = float(full_refresh)  # for nodes that only read seq_num/neighbors
+        self.deltas = deltas  # False: every LSA carries all costs (no deltas, no bare refreshes)
+        # SPF runs and own-LSA origination are throttled separately
+        self.spf = spf or Throttle()
+        self.adv = adv or Throttle()
+        self.changed = False
+        # LSAs installed / ignored (old seq) / installed without a topology change (no SPF)
+        self.lsa_new = 0
+        self.lsa_old = 0
+        self.spf_skipped = 0
+        self.delta_miss = 0  # deltas that did not reproduce the origin's checksum
+        self.sent_full = 0
+        self.sent_delta = 0
+        self.sent_refresh = 0
+        self._requested: Dict[str, Tuple[int, float]] = {}  # origin -> (seq asked for, when)
+        self.dbd_sent = 0
+        self.req_sent = 0
+        self.lsu_sent = 0
+        # the receive thread installs LSAs while the routing thread ages, advertises and runs SPF
+        self._lock = threading.RLock()
+        self._mark_changed()
 
     def _now(self) -> float:
-        return time.time()
+        return self._clock()
 
-    def expire(self, max_age: float = 30.0) -> None:
-        now = self._now()
-        for k in list(self.lsdb.keys()):
-            if (now - self.lsdb[k]["ts"]) > max_age:
-                self.lsdb.pop(k, None)
-                self.changed = True
+    def _mark_changed(self) -> None:
+        self.changed = True
+        self.spf.request(self._now())
+
+    def spf_due(self) -> bool:
+        return self.changed and self.spf.due(self._now())
+
+    def spf_snapshot(self):
+        """(CSR graph, names changed) for the SPF about to run; later LSAs count for the next run."""
+        with self._lock:
+            self.changed = False
+            return self.graph.snapshot()
+
+    def spf_done(self, elapsed: float) -> None:
+        with self._lock:
+            now = self._now()
+            self.spf.done(now, elapsed)
+            if self.changed:
+                self.spf.request(now)  # LSAs installed while SPF ran
+
+    def next_due(self) -> Optional[float]:
+        """Earliest pending SPF/advertisement deadline (LSR clock), if any."""
+        due = [t for t in (self.spf.next_due(), self.adv.next_due()) if t is not None]
+        return min(due) if due else None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {"spf": self.spf.stats(), "adv": self.adv.stats(),
+                "lsa": {"new": self.lsa_new, "old": self.lsa_old, "spf_skipped": self.spf_skipped,
+                        "delta_miss": self.delta_miss, "sent_full": self.sent_full,
+                        "sent_delta": self.sent_delta, "sent_refresh": self.sent_refresh},
+                "db": {"dbd_sent": self.dbd_sent, "req_sent": self.req_sent, "lsu_sent": self.lsu_sent}}
+
+    def expire(self, max_age: float = MAX_AGE) -> None:
+        with self._lock:
+            now = self._now()
+            for k in list(self.lsdb.keys()):
+                if k != self.me and (now - self.lsdb[k]["ts"]) > max_age:
+                    self.lsdb.pop(k, None)
+                    self.graph.remove(k)
+                    self._mark_changed()
 
     def should_advertise(self, node) -> bool:
-        # advertise if neighbors changed or every ~15s
+        with self._lock:
+            return self._should_advertise(node)
+
+    def _should_advertise(self, node) -> bool:
+        # advertise (throttled) when local links/costs change, or every `refresh` s
         now = self._now()
-        current = {n: node.cost_to(n) for n in node.neighbors}
-        if current != self.last_local:
+        current = {n: node.cost_to(n) for n in node.neighbors if node.is_neighbor_active(n)}
+        if current != self.last_local and current != self._seen_local:
+            self._seen_local = current
+            self.adv.request(now)
+            # our own links count locally right away; only their flooding is throttled
+            if self.graph.set_row(self.me, {n: float(c) for n, c in current.items()}):
+                self._mark_changed()
+        if self.adv.due(now) or (now - self.last_adv) > self.refresh:
             self.last_local = current
             return True
-        if (now - self.last_adv) > 15.0:
-            return True
         return False
 
     def advertise(self, node) -> None:
-        self.seq += 1
-        neighbors = list(sorted(self.last_local.keys()))
+        with self._lock:
+            self._advertise(node)
+
+    def _advertise(self, node) -> None:
+        now = self._now()
+        wid = node._to_wire_id
         costs = {n: float(c) for n, c in self.last_local.items()}
-        self.lsdb[self.me] = {"seq": self.seq, "ts": self._now(), "neighbors": set(neighbors), "costs": costs}
-        self.last_adv = self._now()
-        self.changed = True
+        wire_costs = {wid(n): c for n, c in costs.items()}
+        prev = self.lsdb.get(self.me)
+        full = (not self.deltas or prev is None or self.last_full is None or set(wire_costs) != set(prev["wire"])
+                or now - self.last_full >= self.full_refresh)
+        self.seq += 1
+        cksum = lsa_checksum(wire_costs)
+        same = prev is not None and cksum == prev["cksum"]
+        me = wid(self.me)
+        self.lsdb[self.me] = {"seq": self.seq, "ts": now, "from": me, "neighbors": set(costs), "costs": costs,
+                              "wire": wire_costs, "cksum": cksum}
+        if self.graph.set_row(self.me, costs):
+            self._mark_changed()
+        self.last_adv = now
+        self.adv.done(now)
+
+        if full:
+            self.last_full = now
+            self.sent_full += 1
+            node._broadcast_wire(self._full_wire(self.lsdb[self.me], now))
+            return
+        lsa: Dict[str, Any] = {"seq": int(self.seq), "cksum": cksum}
+        if same:
+            self.sent_refresh += 1
+        else:
+            old = prev["wire"]
+            lsa["delta"] = {n: _num(c) for n, c in wire_costs.items() if old.get(n) != c}
+            self.sent_delta += 1
+        d = {"type": "info", "from": me, "to": "*", "hops": LSA_HOPS,
+             "headers": {"alg": "lsr", "id": f"lsa:{me}:{self.seq}"}, "lsa": lsa}
+        node._broadcast_wire(json.dumps(d, ensure_ascii=False))
 
-        payload = None
+    def _full_wire(self, rec: Dict[str, Any], now: float) -> str:
+        me, wire = rec["from"], rec["wire"]
+        neighbors = sorted(wire)
+        lsa: Dict[str, Any] = {"costs": [_num(wire[n]) for n in neighbors], "cksum": rec["cksum"]}
+        age = round(now - rec["ts"], 3)
+        if age > 0:
+            lsa["age"] = age
         # Wire-level info with top-level fields per protocol
-        wire = json.dumps({
+        return json.dumps({
             "type": "info",
-            "from": node._to_wire_id(self.me),
+            "from": me,
             "to": "*",
-            "hops": 16,
-            "headers": {"alg": "lsr"},
-            "seq_num": int(self.seq),
-            "neighbors": [node._to_wire_id(n) for n in neighbors]
+            "hops": LSA_HOPS,
+            "headers": {"alg": "lsr", "id": f"lsa:{me}:{rec['seq']}"},
+            "seq_num": int(rec["seq"]),
+            "neighbors": neighbors,
+            "lsa": lsa,
         }, ensure_ascii=False)
-        node._broadcast_wire(wire)
-
-    def on_receive_lsp(self, node, msg: Dict) -> None:
-        p = msg.get("payload") or {}
-        origin = p.get("node") or msg.get("from")
-        seq = int(p.get("sequence", 0))
-        costs = p.get("costs") or {}
-        neighbors = set(p.get("neighbors") or [])
-        rec = self.lsdb.get(origin)
-        if rec and seq <= int(rec["seq"]):
+
+    # ----- database exchange -----
+    def _control(self, node, n: str, lsa: Dict[str, Any]) -> None:
+        node._send(n, json.dumps({"type": "info", "from": node._to_wire_id(self.me), "to": node._to_wire_id(n),
+                                  "hops": 1, "headers": {"alg": "lsr"}, "lsa": lsa}, ensure_ascii=False))
+
+    def send_dbd(self, node, n: str, init: bool = True) -> None:
+        """Send neighbor `n` our LSDB summary; init asks for its summary back."""
+        if not self.db_exchange:
             return
-        self.lsdb[origin] = {"seq": seq, "ts": self._now(), "neighbors": set(neighbors), "costs": costs}
-        self.changed = True
+        with self._lock:
+            dbd = [[r["from"], r["seq"], r["cksum"]] for r in self.lsdb.values() if r["cksum"] is not None]
+        lsa: Dict[str, Any] = {"dbd": dbd}
+        if init:
+            lsa["init"] = True
+        self.dbd_sent += 1
+        self._control(node, n, lsa)
+
+    def _on_dbd(self, node, n: str, lsa: Dict[str, Any]) -> None:
+        now = self._now()
+        want = []
+        for item in lsa.get("dbd") or []:
+            origin_w, seq = item[0], int(item[1])
+            origin = node._from_wire_id(origin_w)
+            if origin == self.me:
+                self._own_seq_seen(node, seq)
+                continue
+            rec = self.lsdb.get(origin)
+            if rec is None or seq > rec["seq"] or (seq == rec["seq"] and rec["cksum"] is None):
+                asked = self._requested.get(origin)
+                if asked and asked[0] >= seq and now - asked[1] < REQ_WAIT:
+                    continue  # already on its way from another neighbor
+                self._requested[origin] = (seq, now)
+                want.append(origin_w)
+        if lsa.get("init"):
+            self.send_dbd(node, n, init=False)
+        if want:
+            self.req_sent += 1
+            self._control(node, n, {"req": want})
+
+    def _on_req(self, node, n: str, lsa: Dict[str, Any]) -> None:
+        now = self._now()
+        for origin_w in lsa.get("req") or []:
+            rec = self.lsdb.get(node._from_wire_id(origin_w))
+            if rec is not None and rec["cksum"] is not None:
+                self.lsu_sent += 1
+                node._send(n, self._full_wire(rec, now))
+
+    def _request_full(self, node, msg: Message, origin: str, origin_w: str, seq: int, now: float) -> None:
+        # the neighbor that flooded it installed it, so it has the full record (the origin, on the first hop)
+        n = msg.prev or node._from_wire_id(msg.src)
+        asked = self._requested.get(origin)
+        if n not in node.neighbors or (asked and asked[0] >= seq and now - asked[1] < REQ_WAIT):
+            return
+        self._requested[origin] = (seq, now)
+        self.req_sent += 1
+        self._control(node, n, {"req": [origin_w]})
+
+    def _own_seq_seen(self, node, seq: int) -> None:
+        if seq > self.seq:
+            # ours from before a restart: continue past it with a full LSA
+            self.seq = seq
+            self.last_full = None
+            self.adv.request(self._now())
+            node._kick_routing()
+
+    def on_receive_lsp(self, node, msg: Message) -> bool:
+        """Install an LSA; True if it was new here (flood it on), False if old, ours or unreadable."""
+        with self._lock:
+            return self._receive_lsp(node, msg)
+
+    def _receive_lsp(self, node, msg: Message) -> bool:
+        ex = msg.extra
+        p = msg.payload if isinstance(msg.payload, dict) else {}
+        lsa = ex.get("lsa") if isinstance(ex.get("lsa"), dict) else {}
+        delta = None
+        if "seq_num" in ex:
+            origin_w, seq, nbrs = msg.src, int(ex["seq_num"]), list(ex.get("neighbors") or [])
+        elif "seq" in lsa and "cksum" in lsa:  # delta, or a bare refresh (empty delta)
+            origin_w, seq, nbrs, delta = msg.src, int(lsa["seq"]), None, lsa.get("delta") or {}
+        elif "sequence" in p:  # older payload form: {"node", "sequence", "neighbors", "costs": {id: cost}}
+            origin_w, seq, nbrs = p.get("node") or msg.src, int(p["sequence"]), list(p.get("neighbors") or [])
+            lsa = {"costs": p.get("costs") or {}}
+        elif "dbd" in lsa:
+            self._on_dbd(node, node._from_wire_id(msg.src), lsa)
+            return False
+        elif "req" in lsa:
+            self._on_req(node, node._from_wire_id(msg.src), lsa)
+            return False
+        else:
+            return False
+        origin = node._from_wire_id(origin_w)
+        now = self._now()
+        if origin == self.me:
+            self._own_seq_seen(node, seq)
+            return False
+        rec = self.lsdb.get(origin)
+        if rec and seq <= rec["seq"]:
+            self.lsa_old += 1
+            return False
+        age = float(lsa.get("age", 0) or 0)
+        if age >= MAX_AGE:
+            return False
+        cksum = lsa.get("cksum")
+        if rec and cksum is not None and cksum == rec["cksum"]:
+            # same links as what we have: only seq/age move, nothing to parse or recompute
+            self.lsa_new += 1
+            rec["seq"], rec["ts"] = seq, now - age
+            self.spf_skipped += 1
+            return True
+        if delta is not None:
+            wire = dict(rec["wire"]) if rec else {}
+            wire.update((n, float(c)) for n, c in delta.items())
+            if not delta or not rec or rec["seq"] != seq - 1 or lsa_checksum(wire) != cksum:
+                self.delta_miss += 1
+                self._request_full(node, msg, origin, origin_w, seq, now)
+                return False
+        else:
+            costs = lsa.get("costs")
+            if isinstance(costs, list) and len(costs) == len(nbrs):
+                wire = {n: float(c) for n, c in zip(nbrs, costs)}
+            else:
+                costs = costs if isinstance(costs, dict) else {}
+                wire = {n: float(costs.get(n, 1.0)) for n in nbrs}
+            if cksum is None:
+                cksum = lsa_checksum(wire)
+        self.lsa_new += 1
+        costs = {node._from_wire_id(n): c for n, c in wire.items()}
+        self.lsdb[origin] = {"seq": seq, "ts": now - age, "from": origin_w, "neighbors": set(costs),
+                             "costs": costs, "wire": wire, "cksum": cksum}
+        if self.graph.set_row(origin, costs):
+            self._mark_changed()
+            node._kick_routing()
+        else:
+            self.spf_skipped += 1
+        return True
 
     def build_topology(self) -> Dict[str, Dict[str, float]]:
-        topo: Dict[str, Dict[str, float]] = {}
-        for origin, rec in self.lsdb.items():
-            topo.setdefault(origin, {})
-            for n in rec["neighbors"]:
-                c = float(rec["costs"].get(n, 1.0))
-                topo[origin][n] = c
-                topo.setdefault(n, {})
-                if origin not in topo[n] or topo[n][origin] > c:
-                    topo[n][origin] = c
-        return topo
+        # dict adapter over the CSR graph (an edge costs the lower of both advertised costs)
+        return self.graph.csr().to_dict()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+import heapq, itertools, random, threading, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# In-process "wire" for transport="memory": many RouterNode instances in one
+# process exchange the same wire messages (JSON text or binary frames) they
+# would put on TCP/Redis, through per-link delivery with latency, loss and
+# bandwidth. A send to a detached node or a link that is down raises
+# ConnectionRefusedError, like a refused TCP connect, so fast reroute and the
+# neighbor-down logic behave as on sockets.
+
+class LinkProfile:
+    __slots__ = ("latency", "jitter", "loss", "bandwidth", "up", "busy_until")
+
+    def __init__(self, latency: float = 0.0, loss: float = 0.0, bandwidth: float = 0.0, jitter: float = 0.0):
+        self.latency = float(latency)      # one-way, seconds
+        self.jitter = float(jitter)        # extra uniform 0..jitter seconds per message
+        self.loss = float(loss)            # drop probability per message
+        self.bandwidth = float(bandwidth)  # bytes/s; 0 = unlimited
+        self.up = True
+        self.busy_until = 0.0              # serialization: next message starts after the previous one
+
+class MemoryNetwork:
+    """
+    Shared medium for transport="memory". Links are directed and take the
+    network-wide defaults unless set_link() overrides them. Delayed deliveries
+    are kept in one heap served by a single scheduler thread; with zero latency
+    and no bandwidth limit the receiver is called inline.
+    """
+    def __init__(self, latency: float = 0.0, loss: float = 0.0, bandwidth: float = 0.0,
+                 seed: Optional[int] = None):
+        self.default = (float(latency), float(loss), float(bandwidth))
+        self._links: Dict[Tuple[str, str], LinkProfile] = {}
+        self._ports: Dict[str, Callable[[object], None]] = {}
+        self._heap: List[Tuple[float, int, str, object]] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._rng = random.Random(seed)
+        self._thread: Optional[threading.Thread] = None
+        self._running = True
+        self.sent = 0
+        self.delivered = 0
+        self.lost = 0
+        self.bytes = 0
+
+    # ----- topology -----
+    def _link(self, a: str, b: str) -> LinkProfile:
+        link = self._links.get((a, b))
+        if link is None:
+            link = self._links[(a, b)] = LinkProfile(*self.default)
+        return link
+
+    def set_link(self, a: str, b: str, latency: Optional[float] = None, loss: Optional[float] = None,
+                 bandwidth: Optional[float] = None, jitter: Optional[float] = None, both: bool = True) -> None:
+        with self._cv:
+            for u, v in ((a, b), (b, a)) if both else ((a, b),):
+                link = self._link(u, v)
+                if latency is not None:
+                    link.latency = float(latency)
+                if loss is not None:
+                    link.loss = float(loss)
+                if bandwidth is not None:
+                    link.bandwidth = float(bandwidth)
+                if jitter is not None:
+                    link.jitter = float(jitter)
+
+    def set_up(self, a: str, b: str, up: bool = True) -> None:
+        """Bring the link a<->b down (sends fail on both ends) or back up."""
+        with self._cv:
+            self._link(a, b).up = up
+            self._link(b, a).up = up
+
+    # ----- ports -----
+    def attach(self, node_id: str, deliver: Callable[[object], None]) -> None:
+        with self._cv:
+            self._ports[node_id] = deliver
+
+    def detach(self, node_id: str) -> None:
+        with self._cv:
+            self._ports.pop(node_id, None)
+
+    def send(self, src: str, dst: str, data) -> None:
+        with self._cv:
+            deliver = self._ports.get(dst)
+            link = self._link(src, dst)
+            if deliver is None or not link.up:
+                raise ConnectionRefusedError(f"{dst} not reachable from {src}")
+            size = len(data)  # characters for JSON text, close enough to bytes for ASCII wires
+            self.sent += 1
+            self.bytes += size
+            if link.loss and self._rng.random() < link.loss:
+                self.lost += 1
+                return
+            now = time.monotonic()
+            due = now
+            if link.bandwidth:
+                due = link.busy_until = max(now, link.busy_until) + size / link.bandwidth
+            due += link.latency
+            if link.jitter:
+                due += self._rng.random() * link.jitter
+            if due > now:
+                heapq.heappush(self._heap, (due, next(self._seq), dst, data))
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="memnet", daemon=True)
+                    self._thread.start()
+                self._cv.notify()
+                return
+            self.delivered += 1
+        deliver(data)
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._cv.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if not self._running:
+                    return
+                _, _, dst, data = heapq.heappop(self._heap)
+                deliver = self._ports.get(dst)
+                if deliver is None:
+                    self.lost += 1  # receiver went away while the message was in flight
+                    continue
+                self.delivered += 1
+            deliver(data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cv:
+            return {"sent": self.sent, "delivered": self.delivered, "lost": self.lost, "bytes": self.bytes,
+                    "in_flight": len(self._heap)}
+
+    def close(self) -> None:
+        with self._cv:
+            self._running = False
+            self._heap.clear()
+            self._cv.notify()
+
+_default: Optional[MemoryNetwork] = None
+
+def default_network() -> MemoryNetwork:
+    """Process-wide network used by RouterNode(transport="memory") when none is given."""
+    global _default
+    if _default is None:
+        _default = MemoryNetwork()
+    return _default
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Any, Dict, List, Optional, Union
-import json, uuid, time
+from json.decoder import scanstring
+import json, re, uuid, time
 
 # Supported wire-level types
 WIRE_TYPES = {"message", "hello", "hello_ack", "lsp", "info", "echo"}
@@ -8,6 +9,23 @@ WIRE_TYPES = {"message", "hello", "hello_ack", "lsp", "info", "echo"}
 def now_ms() -> int:
     return int(time.time() * 1000)
 
+# Opt-in hop-by-hop trace: a message whose headers carry "trace" (a list, set by
+# the sender) collects one {"n": node, "rx": ms, "tx": ms} entry per node: rx when
+# the node takes it in, tx when it forwards it. Wall-clock ms with µs precision.
+
+def trace_ts() -> float:
+    return round(time.time() * 1000.0, 3)
+
+def trace_rx(trace: List[Dict[str, Any]], node: str) -> List[Dict[str, Any]]:
+    return trace + [{"n": node, "rx": trace_ts()}]
+
+def trace_tx(trace: List[Dict[str, Any]], node: str) -> List[Dict[str, Any]]:
+    # stamp the hop added on receive, or add one when the message starts here without an rx
+    last = trace[-1] if trace else None
+    if last is not None and last.get("n") == node and "tx" not in last:
+        return trace[:-1] + [dict(last, tx=trace_ts())]
+    return trace + [{"n": node, "tx": trace_ts()}]
+
 def new_header(extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Create a base header with id/ts; merge any extra fields."""
     h = {"id": str(uuid.uuid4()), "ts": now_ms()}
@@ -31,6 +49,8 @@ def _headers_from_dict(hd: Dict[str, Any]) -> List[Dict[str, Any]]:
 
 def ensure_header_id_ts(msg: Dict) -> None:
     """Guarantee headers exist and contain id and ts in the first header."""
+    if not isinstance(msg, dict):
+        return  # Message always carries id/ts
     hs = msg.get("headers")
     hd = _headers_to_dict(hs)
     changed = False
@@ -41,18 +61,225 @@ def ensure_header_id_ts(msg: Dict) -> None:
     if changed or not isinstance(hs, dict):
         msg["headers"] = _headers_from_dict(hd)
 
+# Wires at least this long are parsed with split_wire so a string payload is
+# never decoded/re-encoded by transit nodes; shorter ones are cheaper via json.loads.
+SPLIT_MIN = 4096
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+class RawPayload(str):
+    """A payload still in its serialized JSON form; dumps() splices it verbatim."""
+    def value(self) -> Any:
+        return json.loads(self)
+
+def payload_value(msg: Union["Message", Dict]) -> Any:
+    if isinstance(msg, Message):
+        return msg.payload
+    p = msg.get("payload")
+    return p.value() if isinstance(p, RawPayload) else p
+
+def _string_end(text: str, start: int) -> int:
+    """Index just past the JSON string starting at text[start] == '"'."""
+    q = text.find('"', start + 1)
+    if q < 0:
+        raise ValueError("unterminated string")
+    if text[q - 1] != "\\":
+        return q + 1
+    # escaped quotes inside: let the C scanner find the real end
+    return scanstring(text, start + 1)[1]
+
+def split_wire(text: str) -> Dict:
+    """
+    Parse a wire object field by field, keeping a string payload as RawPayload
+    (located with str.find, never decoded) for message-type wires.
+    """
+    ws = _WS.match
+    idx = ws(text, 0).end()
+    if text[idx:idx + 1] != "{":
+        raise ValueError("expected JSON object")
+    idx = ws(text, idx + 1).end()
+    out: Dict[str, Any] = {}
+    if text[idx:idx + 1] == "}":
+        return out
+    while True:
+        if text[idx:idx + 1] != '"':
+            raise ValueError(f"expected key at {idx}")
+        key, idx = scanstring(text, idx + 1)
+        idx = ws(text, idx).end()
+        if text[idx:idx + 1] != ":":
+            raise ValueError(f"expected ':' at {idx}")
+        idx = ws(text, idx + 1).end()
+        if key == "payload" and text[idx:idx + 1] == '"':
+            end = _string_end(text, idx)
+            out[key] = RawPayload(text[idx:end])
+            idx = end
+        else:
+            out[key], idx = _DECODER.raw_decode(text, idx)
+        idx = ws(text, idx).end()
+        c = text[idx:idx + 1]
+        if c == "}":
+            break
+        if c != ",":
+            raise ValueError(f"expected ',' or '}}' at {idx}")
+        idx = ws(text, idx + 1).end()
+    # only data messages travel with an opaque payload
+    p = out.get("payload")
+    if isinstance(p, RawPayload) and out.get("type") != "message":
+        out["payload"] = p.value()
+    return out
+
 def parse_any(data: Union[bytes, str, Dict]) -> Dict:
     if isinstance(data, bytes):
-        return json.loads(data.decode("utf-8"))
+        data = data.decode("utf-8")
     if isinstance(data, str):
+        if len(data) >= SPLIT_MIN:
+            return split_wire(data)
         return json.loads(data)
     if isinstance(data, dict):
         return dict(data)
     raise TypeError("parse_any expects bytes|str|dict")
 
-def normalize_incoming(raw) -> Dict:
-    msg = parse_any(raw)
+_TOP_KEYS = frozenset(("type", "from", "to", "hops", "headers", "payload"))
+
+class Message:
+    """
+    A wire message parsed once: top-level fields and the common headers
+    (id/ts/alg/prev) live in slots, other headers in `hdr`, other top-level
+    fields in `extra`. to_wire() reproduces the wire JSON.
+    """
+    __slots__ = ("type", "src", "dst", "hops", "id", "ts", "alg", "prev",
+                 "_payload", "extra", "hdr", "hdr_list", "_enc")
+
+    def __init__(self, type: str = "message", src: str = "", dst: str = "", hops: int = 0,
+                 payload: Any = None, id: Optional[str] = None, ts: Optional[int] = None,
+                 alg: Optional[str] = None, prev: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None, hdr: Optional[Dict[str, Any]] = None,
+                 hdr_list: bool = True):
+        self.type = type
+        self.src = src
+        self.dst = dst
+        self.hops = hops
+        self._payload = payload
+        self.id = id if id is not None else str(uuid.uuid4())
+        self.ts = ts if ts is not None else now_ms()
+        self.alg = alg
+        self.prev = prev
+        self.extra = extra if extra is not None else {}
+        self.hdr = hdr if hdr is not None else {}
+        self.hdr_list = hdr_list
+        self._enc = None
+
+    @property
+    def payload(self) -> Any:
+        p = self._payload
+        return p.value() if isinstance(p, RawPayload) else p
 
+    @payload.setter
+    def payload(self, value: Any) -> None:
+        self._payload = value
+
+    @property
+    def raw_payload(self) -> Any:
+        """Payload as received (possibly a still-serialized RawPayload)."""
+        return self._payload
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Message":
+        hs = d.get("headers")
+        hd = _headers_to_dict(hs)
+        m = cls.__new__(cls)
+        m.type = d.get("type", "message")
+        m.src = d.get("from", "")
+        m.dst = d.get("to", "")
+        m.hops = d.get("hops", 0)
+        m._payload = d.get("payload")
+        m.id = hd.pop("id") if "id" in hd else str(uuid.uuid4())
+        m.ts = hd.pop("ts") if "ts" in hd else now_ms()
+        m.alg = hd.pop("alg", None)
+        m.prev = hd.pop("prev", None)
+        m.hdr = hd
+        m.hdr_list = not isinstance(hs, dict)
+        m.extra = {k: v for k, v in d.items() if k not in _TOP_KEYS}
+        m._enc = None
+        return m
+
+    def get_header(self, key: str, default: Any = None) -> Any:
+        if key in _SLOT_HEADERS:
+            v = getattr(self, key)
+            return default if v is None else v
+        return self.hdr.get(key, default)
+
+    def set_header(self, key: str, value: Any) -> None:
+        self._enc = None
+        if key in _SLOT_HEADERS:
+            setattr(self, key, value)
+        else:
+            self.hdr[key] = value
+
+    def headers(self) -> Dict[str, Any]:
+        h: Dict[str, Any] = {"id": self.id, "ts": self.ts}
+        if self.alg is not None:
+            h["alg"] = self.alg
+        if self.prev is not None:
+            h["prev"] = self.prev
+        if self.hdr:
+            h.update(self.hdr)
+        return h
+
+    def to_dict(self) -> Dict[str, Any]:
+        h = self.headers()
+        d: Dict[str, Any] = {"type": self.type, "from": self.src, "to": self.dst, "hops": self.hops,
+                             "headers": [h] if self.hdr_list else h}
+        if self.extra:
+            d.update(self.extra)
+        d["payload"] = self._payload
+        return d
+
+    def to_wire(self) -> str:
+        return _dump_dict(self.to_dict())
+
+    def encoded(self, codec=None) -> Union[str, bytes]:
+        """
+        Wire form for one peer: codec.encode() when a codec is given and can carry
+        this message, JSON otherwise. Cached per codec, so a flood encodes once;
+        only set_header invalidates the cache (do not mutate a message after sending).
+        """
+        cache = self._enc
+        if cache is None:
+            cache = self._enc = {}
+        w = cache.get(codec)
+        if w is None:
+            w = codec.encode(self) if codec is not None else None
+            if w is None:
+                w = cache.get(None) or self.to_wire()
+                cache[None] = w
+            cache[codec] = w
+        return w
+
+    def copy(self) -> "Message":
+        m = Message.__new__(Message)
+        m.type, m.src, m.dst, m.hops = self.type, self.src, self.dst, self.hops
+        m.id, m.ts, m.alg, m.prev = self.id, self.ts, self.alg, self.prev
+        m._payload, m.extra, m.hdr, m.hdr_list = self._payload, self.extra, dict(self.hdr), self.hdr_list
+        m._enc = None
+        return m
+
+    def forward(self, hops: int, prev: str) -> "Message":
+        """Copy for the next hop; payload and extra fields are shared, not copied."""
+        m = self.copy()
+        m.hops = hops
+        m.prev = prev
+        tr = m.hdr.get("trace")
+        if tr is not None:
+            m.hdr["trace"] = trace_tx(tr, prev)
+        return m
+
+    def __repr__(self) -> str:
+        return f"Message(type={self.type!r}, src={self.src!r}, dst={self.dst!r}, hops={self.hops!r}, id={self.id!r})"
+
+_SLOT_HEADERS = frozenset(("id", "ts", "alg", "prev"))
+
+def _normalize_dict(msg: Dict) -> Dict:
     # ttl -> hops (compat)
     if "hops" not in msg and "ttl" in msg:
         try:
@@ -63,27 +290,27 @@ def normalize_incoming(raw) -> Dict:
     # data -> message (compat)
     if msg.get("type") == "data":
         msg["type"] = "message"
-        p = msg.get("payload")
+        p = payload_value(msg)
         if isinstance(p, dict) and set(p.keys()) == {"text"}:
             msg["payload"] = p["text"]
-
-    # headers normalize + id/ts
-    ensure_header_id_ts(msg)
-
-    # minimal defaults
-    msg.setdefault("from", "")
-    msg.setdefault("to", "")
-    msg.setdefault("type", "message")
-    msg.setdefault("payload", None)
-    msg.setdefault("hops", 0)
     return msg
 
-def get_header(msg: Dict, key: str, default: Any = None) -> Any:
+def normalize_incoming(raw) -> Message:
+    """Parse and normalize a wire message (compat ttl/data, id/ts headers) into a Message."""
+    if isinstance(raw, Message):
+        return raw
+    return Message.from_dict(_normalize_dict(parse_any(raw)))
+
+def get_header(msg: Union[Message, Dict], key: str, default: Any = None) -> Any:
+    if isinstance(msg, Message):
+        return msg.get_header(key, default)
     hs = msg.get("headers")
     hd = _headers_to_dict(hs)
     return hd.get(key, default)
 
-def set_header(msg: Dict, key: str, value: Any) -> None:
+def set_header(msg: Union[Message, Dict], key: str, value: Any) -> None:
+    if isinstance(msg, Message):
+        msg.set_header(key, value); return
     hs = msg.get("headers")
     hd = _headers_to_dict(hs)
     hd[key] = value
@@ -106,9 +333,19 @@ def make_wire(mtype: str,
     }
     return json.dumps(msg, ensure_ascii=False)
 
-def dumps(msg: Dict) -> str:
+def dumps(msg: Union[Message, Dict]) -> str:
     """Dump without changing ids beyond ensuring id/ts."""
+    if isinstance(msg, Message):
+        return msg.to_wire()
     ensure_header_id_ts(msg)
+    return _dump_dict(msg)
+
+def _dump_dict(msg: Dict) -> str:
+    p = msg.get("payload")
+    if isinstance(p, RawPayload):
+        # splice the untouched payload text after the (small) envelope
+        env = json.dumps({k: v for k, v in msg.items() if k != "payload"}, ensure_ascii=False)
+        return f'{env[:-1]}, "payload": {p}}}' if len(env) > 2 else f'{{"payload": {p}}}'
     return json.dumps(msg, ensure_ascii=False)
 
 # Convenience for CLI/tools: mirror the sample protocol in message.txt
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import bisect, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Per-node counters/gauges/histograms rendered in the Prometheus text format
+# (exposition 0.0.4) and served on an optional localhost port. Updates take no
+# lock: under contention an increment may be lost now and then, which is the
+# price of keeping the data path free of one. Gauges are filled by collectors
+# that run only when the endpoint is scraped.
+
+LabelValues = Tuple[str, ...]
+
+def _esc(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *lv: str, n: float = 1.0) -> None:
+        v = self.values
+        v[lv] = v.get(lv, 0.0) + n
+
+    def set_total(self, value: float, *lv: str) -> None:
+        """For totals some other object already keeps (read at scrape time)."""
+        self.values[lv] = float(value)
+
+    def samples(self) -> List[Tuple[str, LabelValues, Tuple[Tuple[str, str], ...], float]]:
+        return [(self.name, lv, (), v) for lv, v in list(self.values.items())]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *lv: str) -> None:
+        self.values[lv] = float(value)
+
+    def clear(self) -> None:
+        self.values = {}
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0)):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[LabelValues, List[float]] = {}  # lv -> per-bucket counts, +Inf, sum, count
+
+    def observe(self, x: float, *lv: str) -> None:
+        s = self.values.get(lv)
+        if s is None:
+            s = self.values[lv] = [0.0] * (len(self.buckets) + 3)
+        s[bisect.bisect_left(self.buckets, x)] += 1  # le is inclusive; past the last bucket lands in +Inf
+        s[-2] += x
+        s[-1] += 1
+
+    def samples(self):
+        out = []
+        for lv, s in list(self.values.items()):
+            acc = 0.0
+            for i, b in enumerate(self.buckets + (float("inf"),)):
+                acc += s[i]
+                out.append((self.name + "_bucket", lv, (("le", _fmt(b)),), acc))
+            out.append((self.name + "_sum", lv, (), s[-2]))
+            out.append((self.name + "_count", lv, (), s[-1]))
+        return out
+
+class Registry:
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self.const = tuple((const_labels or {}).items())
+        self._metrics: List = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def _add(self, m):
+        self._metrics.append(m)
+        return m
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), **kw) -> Histogram:
+        return self._add(Histogram(name, help, labels, **kw))
+
+    def collector(self, fn: Callable[[], None]) -> None:
+        """fn runs before every render; it sets the gauges that are cheaper to read than to track."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, lv, extra, v in m.samples():
+                pairs = self.const + tuple(zip(m.labels, lv)) + extra
+                lab = ",".join(f'{k}="{_esc(x)}"' for k, x in pairs)
+                lines.append(f"{name}{{{lab}}} {_fmt(v)}" if lab else f"{name} {_fmt(v)}")
+        return "\n".join(lines) + "\n"
+
+class RouterMetrics(Registry):
+    """What RouterNode tracks; node.py fills the gauges in its collector."""
+    def __init__(self, node_id: str):
+        super().__init__({"node": node_id})
+        self.received = self.counter("router_messages_received_total", "Messages processed, by type", ("type",))
+        self.sent = self.counter("router_messages_sent_total", "Messages handed to the transport, by type",
+                                 ("type",))
+        self.dropped = self.counter("router_messages_dropped_total",
+                                    "Messages dropped, by reason (ttl, no_route)", ("reason",))
+        self.send_errors = self.counter("router_send_errors_total", "Failed sends, by neighbor", ("neighbor",))
+        self.forward_seconds = self.histogram("router_forward_seconds",
+                                              "Time to process one data message (parse excluded)")
+        self.spf_seconds = self.histogram("router_spf_seconds", "SPF run time (LSR)")
+        self.dedup_hits = self.counter("router_dedup_hits_total", "Duplicates suppressed by flooding")
+        self.dedup_size = self.gauge("router_dedup_ids", "Message ids held by the dedup cache")
+        self.queue_depth = self.gauge("router_outbound_queue_depth", "Outbound queue depth, by neighbor",
+                                      ("neighbor",))
+        self.queue_dropped = self.counter("router_outbound_queue_dropped_total",
+                                          "Data dropped by a full outbound queue, by neighbor", ("neighbor",))
+        self.inbox_depth = self.gauge("router_inbox_depth", "Received messages waiting to be processed")
+        self.routes = self.gauge("router_routes", "Destinations in the FIB")
+        self.fib_version = self.gauge("router_fib_version", "FIB generation (bumps on every table change)")
+        self.neighbor_up = self.gauge("router_neighbor_up", "1 if the neighbor is considered alive",
+                                      ("neighbor",))
+        self.neighbor_rtt = self.gauge("router_neighbor_rtt_ms", "Smoothed hello/echo RTT, by neighbor",
+                                       ("neighbor",))
+        self.neighbor_cost = self.gauge("router_neighbor_cost", "Link cost derived from the smoothed RTT",
+                                        ("neighbor",))
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(registry: Registry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve registry at http://host:port/metrics from a daemon thread (port 0 picks a free one)."""
+    handler = type("MetricsHandler", (_Handler,), {"registry": registry})
+    srv = ThreadingHTTPServer((host, port), handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, name="metrics", daemon=True).start()
+    return srv
@@ -1,7 +1,7 @@
 from __future__ import annotations
-import socket, threading, time, json
+import hashlib, json, math, socket, threading, time
 from dataclasses import dataclass
-from typing import Dict, Tuple, Optional, Set, Any
+from typing import Any, Callable, Dict, Tuple, Optional, Set
 from queue import Queue
 
 try:
@@ -9,18 +9,66 @@ try:
 except Exception:
     redis = None
 
-from messages import normalize_incoming, make_wire, dumps, get_header, set_header
+from messages import Message, normalize_incoming, trace_rx
 from flooding import Flooding
 from lsr import LSR
 from dvr import DVR
-from dijkstra import dijkstra, build_routing_table
-
-LOG_LEVELS = {"ERROR": 0, "WARN": 1, "INFO": 2, "DEBUG": 3}
+from dijkstra import build_routing_table, IncrementalSPF, loop_free_alternates
+from fib import Fib, FibEntry, NeighborLink, compile_fib
+from tcp_pool import ConnectionPool, read_frames
+from codec import BinaryCodec, is_binary
+from outbound import OutboundQueues
+from memnet import MemoryNetwork, default_network
+from metrics import RouterMetrics, serve as serve_metrics
+from nodelog import LOG_LEVELS, Lazy, NodeLogger, flush as flush_logs
+from throttle import Throttle
+
+PROBE_FIRST = 0.25  # first hello to a neighbor marked down by a failed send, seconds
+QUIET_FACTOR = 1.5  # a neighbor silent for this many hello periods gets fast probes
+HELLO_PENDING_MAX = 256  # hellos awaiting an echo; the oldest go first (lost echoes never come back)
+
+# link cost from RTT: the smoothed RTT (RFC 6298 gains) is quantized into buckets
+# COST_MIN * COST_RATIO**k ms, and the cost only moves once the smoothed RTT is
+# COST_HYSTERESIS of a bucket past the edge, so jitter does not reach LSAs/vectors
+COST_MIN = 1.0
+COST_RATIO = 2.0
+COST_HYSTERESIS = 0.25
+
+def quantize_cost(srtt_ms: float, current: Optional[float] = None) -> float:
+    k = math.log(max(srtt_ms, COST_MIN) / COST_MIN, COST_RATIO)
+    if current is not None and abs(k - math.log(current / COST_MIN, COST_RATIO)) < 0.5 + COST_HYSTERESIS:
+        return current
+    return COST_MIN * COST_RATIO ** round(k)
+
+def _trace_line(msg: Message) -> str:
+    return json.dumps({"id": msg.id, "src": msg.src, "dst": msg.dst, "ts": msg.ts, "trace": msg.hdr["trace"]})
+
+def _host_port(addr: str) -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return host or "127.0.0.1", int(port)
 
 @dataclass
 class NeighborMetrics:
-    rtt_ms: float = float("inf")
+    rtt_ms: float = float("inf")     # last sample
     last_seen: float = 0.0
+    srtt_ms: float = float("inf")    # smoothed RTT
+    rttvar_ms: float = 0.0
+    cost: Optional[float] = None     # quantized srtt_ms, what cost_to() reports
+    probes: int = 0                  # fast probes sent since the neighbor went quiet
+    next_probe: float = 0.0
+
+    def sample(self, rtt_ms: float) -> bool:
+        """Fold one RTT sample in; True if the link cost changed."""
+        self.rtt_ms = rtt_ms
+        if self.srtt_ms == float("inf"):
+            self.srtt_ms, self.rttvar_ms = rtt_ms, rtt_ms / 2.0
+        else:
+            self.rttvar_ms += 0.25 * (abs(self.srtt_ms - rtt_ms) - self.rttvar_ms)
+            self.srtt_ms += 0.125 * (rtt_ms - self.srtt_ms)
+        cost = quantize_cost(self.srtt_ms, self.cost)
+        changed = cost != self.cost
+        self.cost = cost
+        return changed
 
 class RouterNode:
     def __init__(self, node_id: str, nodes_map: Dict[str, Tuple[str, int] | str],
@@ -28,8 +76,18 @@ class RouterNode:
                  log_level: str = "INFO",
                  transport: str = "tcp",
                  redis_host: Optional[str] = None, redis_port: Optional[int] = None, redis_pwd: Optional[str] = None,
-                 hello_period: float = 5.0, dead_after: float = 15.0):
+                 hello_period: float = 5.0, dead_after: float = 15.0,
+                 tcp_legacy: bool = False, codec: str = "auto", out_queue: int = 1024,
+                 spf_throttle: Tuple[float, float, float] = (0.05, 0.2, 5.0),
+                 lsa_throttle: Tuple[float, float, float] = (0.0, 1.0, 5.0),
+                 dv_throttle: Tuple[float, float, float] = (0.0, 0.05, 1.0),
+                 ecmp: bool = True, lfa: bool = True, network: Optional[MemoryNetwork] = None,
+                 clock: Optional[Callable[[], float]] = None, metrics_port: Optional[int] = None,
+                 log_format: str = "text", log_sampling: str = "", log_sync: bool = False,
+                 probe_interval: float = 0.05, detect_mult: int = 3):
         assert mode in {"dijkstra", "flooding", "lsr", "dvr"}
+        assert (transport or "tcp").lower() in {"tcp", "redis", "memory"}
+        assert codec in {"json", "auto"}
         self.node_id = node_id
         self.mode = mode
         self.nodes_map = nodes_map
@@ -37,53 +95,118 @@ class RouterNode:
         self.transport = (transport or "tcp").lower()
         self._server = None
         self.running = False
-        self._lock = threading.Lock()
+        # every protocol timer reads this clock (sim.py passes a virtual one)
+        self._clock = clock or time.time
         self._seq = 0
+        self._ack_pool: Optional[ConnectionPool] = None  # load-generator acks (send_cli --load)
+        # counters only exist when the metrics endpoint is on; every update is behind `is not None`
+        self.metrics_port = metrics_port
+        self.metrics: Optional[RouterMetrics] = RouterMetrics(node_id) if metrics_port is not None else None
+        self._metrics_srv = None
+        # tcp_legacy: one connection per message, unframed (other groups' nodes)
+        self.tcp_legacy = bool(tcp_legacy)
 
         if self.transport == "tcp":
             host, port = nodes_map[node_id]
             self._host, self._port = host, int(port)
             self._inv_names = {}
+            self._pool = ConnectionPool(lambda n: tuple(self.nodes_map[n]), timeout=1.2)
+            self._inbox: Queue = Queue()
+        elif self.transport == "memory":
+            # in-process network shared by every node of the simulation (see memnet.py)
+            self._net = network or default_network()
+            self._inv_names = {}
+            self._inbox = Queue()
         else:
             self._channel = str(nodes_map[node_id])
             self._redis_host = redis_host or "lab3.redesuvg.cloud"
             self._redis_port = int(redis_port or 6379)
             self._redis_pwd = redis_pwd or "UVGRedis2025"
-            if redis is None:
-                raise RuntimeError("Install redis: pip install redis")
-            self._redis = redis.Redis(host=self._redis_host, port=self._redis_port, password=self._redis_pwd)
-            self._pubsub = self._redis.pubsub()
-            self._pubsub.subscribe(self._channel)
+            self._connect_redis()
             # map channel->node id for logging
             self._inv_names = {str(v): str(k) for k, v in self.nodes_map.items()}
 
         # logging/timers
         self.log_level = log_level.upper()
         self._log_lvl = LOG_LEVELS.get(self.log_level, 2)
+        self.logger = NodeLogger(node_id, self.log_level, fmt=log_format, sampling=log_sampling,
+                                 sync=log_sync, clock=self._clock)
         self.hello_period = float(hello_period)
         self.dead_after = float(dead_after)
+        # BFD-style: a quiet neighbor gets detect_mult hellos probe_interval apart before it is
+        # declared down; detect_mult=0 leaves detection to dead_after alone
+        self.probe_interval = float(probe_interval)
+        self.detect_mult = int(detect_mult)
 
         # state
         self.neighbors: Set[str] = set(self.topology.get(self.node_id, {}).keys())
         self.neighbors.discard(self.node_id)
         self.nei_metrics: Dict[str, NeighborMetrics] = {}
-        self.routing_table: Dict[str, Dict[str, Any]] = {}
+        # routing_table is what the routing thread computes; fib is the compiled snapshot
+        # the data path reads (swapped on every table change, see the routing_table setter)
+        self._fib_version = 0
+        self._links: Dict[str, NeighborLink] = {}
+        self.fib = Fib()
+        self.routing_table = {}
         self._hello_out: Dict[str, float] = {}
 
+        # wire codec: JSON always; binary per neighbor once negotiated via hello/echo
+        self.codec = BinaryCodec(self._to_wire_id(n) for n in self.nodes_map)
+        self._offer_codec = codec == "auto" and not self.tcp_legacy
+        self._peer_codec: Dict[str, BinaryCodec] = {}
+
+        # per-neighbor outbound queues (out_queue=0: send inline in the caller's thread);
+        # memory sends never block, so they always go inline (no sender thread per neighbor)
+        self.out_queue = int(out_queue)
+        self.outq = OutboundQueues(self._deliver, self.out_queue) \
+            if self.out_queue > 0 and self.transport != "memory" else None
+
         # helpers
-        self.flood = Flooding()
-        self.lsr = LSR(self.node_id) if mode == "lsr" else None
-        self.dvr = DVR(self.node_id) if mode == "dvr" else None
+        self.flood = Flooding(clock=self._clock)
+        self.lsr = LSR(self.node_id, spf=Throttle(*spf_throttle), adv=Throttle(*lsa_throttle),
+                       clock=self._clock) if mode == "lsr" else None
+        self._route_wake = threading.Event()
+        self.ecmp = bool(ecmp)
+        self.lfa = bool(lfa)
+        # neighbors whose last send failed -> (next probe, backoff); cleared by their next hello/echo
+        self._down: Dict[str, Tuple[float, float]] = {}
+        self._spf = IncrementalSPF(self.node_id, ecmp=self.ecmp) if mode == "lsr" else None
+        self.dvr = DVR(self.node_id, trig=Throttle(*dv_throttle), ecmp=self.ecmp, lfa=self.lfa,
+                       clock=self._clock) if mode == "dvr" else None
+        # per-node hash key so equal-cost choices are not correlated hop after hop (a crc32 start value
+        # would only xor a constant into the result and keep the low bits polarized)
+        self._flow_seed = hashlib.blake2b(str(node_id).encode("utf-8"), digest_size=16).digest()
 
     # ========= Helpers ==========
-    def _log(self, level: str, msg: str, tag: str | None = None):
-        lvl = LOG_LEVELS.get(level.upper(), 2)
+    def _log(self, level: str, msg: str, *args: Any, tag: str | None = None, **fields: Any):
+        # msg is %-formatted with args by the log writer, only if the record passes level and sampling
+        lvl = LOG_LEVELS.get(level)
+        if lvl is None:
+            lvl = LOG_LEVELS.get(level.upper(), 2)
         if lvl <= self._log_lvl:
-            prefix = f"[{self.node_id}/{(tag or self.mode).upper()}]"
-            print(f"{prefix} {msg}")
+            self.logger.emit(lvl, (tag or self.mode).upper(), msg, args, fields)
 
     def _now(self) -> float:
-        return time.time()
+        return self._clock()
+
+    @property
+    def routing_table(self) -> Dict[str, Dict[str, Any]]:
+        return self._routing_table
+
+    @routing_table.setter
+    def routing_table(self, table: Dict[str, Dict[str, Any]]) -> None:
+        self._routing_table = table
+        self._fib_version += 1
+        to_wire = lambda n: self._to_wire_id(n) if n in self.nodes_map else n
+        self.fib = compile_fib(table, self.node_id, to_wire, self._fib_version, self._link)
+
+    def _link(self, n: str) -> NeighborLink:
+        # resolved once per neighbor; the FIB and the send path share it
+        link = self._links.get(n)
+        if link is None:
+            addr = str(self.nodes_map[n]) if self.transport == "redis" and n in self.nodes_map else n
+            link = self._links.setdefault(n, NeighborLink(n, addr))
+        return link
 
     def _next_seq(self) -> int:
         self._seq += 1
@@ -99,6 +222,8 @@ class RouterNode:
         return str(wid)
 
     def is_neighbor_active(self, n: str) -> bool:
+        if n in self._down:
+            return False
         m = self.nei_metrics.get(n)
         if not m:
             return True
@@ -106,109 +231,321 @@ class RouterNode:
 
     def cost_to(self, neighbor: str) -> float:
         m = self.nei_metrics.get(neighbor)
-        return m.rtt_ms if (m and m.rtt_ms != float('inf')) else float(self.topology.get(self.node_id, {}).get(neighbor, 1.0))
+        if m is not None and m.cost is not None:
+            return m.cost
+        return float(self.topology.get(self.node_id, {}).get(neighbor, 1.0))
 
     # ========= Sending ==========
+    def _connect_redis(self):
+        if redis is None:
+            raise RuntimeError("Install redis: pip install redis")
+        self._redis = redis.Redis(host=self._redis_host, port=self._redis_port, password=self._redis_pwd)
+        self._pubsub = self._redis.pubsub()
+        self._pubsub.subscribe(self._channel)
+
     def _bind_tcp(self):
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         host, port = self._host, self._port
         s.bind((host, port))
-        s.listen(8)
+        s.listen(128)
         self._server = s
 
-    def _send(self, target_node: str, wire: str):
+    def _encode_for(self, target_node: str, wire: Message | str) -> str | bytes:
+        if isinstance(wire, Message):
+            return wire.encoded(self._peer_codec.get(target_node))
+        return wire
+
+    def _decode(self, data) -> Message:
+        if is_binary(data):
+            try:
+                msg = self.codec.decode(data)
+            except Exception:
+                # the sender and we disagree on the format: JSON to it until hello/echo agree again
+                src = self.codec.sender(data)
+                if src is None:
+                    self._peer_codec.clear()
+                else:
+                    self._peer_codec.pop(self._from_wire_id(src), None)
+                raise
+            # a peer that sends binary can obviously read it back
+            src = self._from_wire_id(msg.src)
+            if src in self.neighbors and self._offer_codec:
+                self._peer_codec[src] = self.codec
+            return msg
+        return normalize_incoming(data)
+
+    def _send(self, target_node: str, wire: Message | str):
+        if self.metrics is not None:
+            self.metrics.sent.inc(wire.type if isinstance(wire, Message) else "raw")
+        if self.outq is None:
+            self._deliver(target_node, wire)
+            return
+        # data may be dropped under backpressure, control (hello/echo/info) never
+        control = not (isinstance(wire, Message) and wire.type == "message")
+        self.outq.put(target_node, wire, control)
+
+    def __init_subclass__(cls, **kw):
+        super().__init_subclass__(**kw)
+        # subclasses that hook _send (benches, the asyncio engine) keep seeing forwarded data
+        if "_send" in cls.__dict__ and "_send_link" not in cls.__dict__:
+            cls._send_link = lambda self, link, wire: self._send(link.name, wire)
+
+    def _send_link(self, link: NeighborLink, wire: Message) -> None:
+        # data path: the FIB already resolved the neighbor, so no name lookups here
+        if self.metrics is not None:
+            self.metrics.sent.inc(wire.type)
+        if self.outq is None:
+            self._deliver(link.name, wire)
+            return
+        s = link.sender
+        if s is None:
+            s = link.sender = self.outq.sender(link.name)
+        s.put(wire, False)
+
+    def _deliver(self, target_node: str, wire: Message | str):
+        self._deliver_link(self._links.get(target_node) or self._link(target_node), wire)
+
+    def _deliver_link(self, link: NeighborLink, wire: Message | str):
+        target_node = link.name
+        wire_out = self._encode_for(target_node, wire)
+        if self.transport == "memory":
+            try:
+                self._net.send(self.node_id, link.addr, wire_out)
+            except ConnectionError as e:
+                self._log("WARN", "memory send error to %s: %s", target_node, e)
+                self._on_send_failure(target_node, wire)
+            return
         if self.transport == "redis":
-            channel = str(self.nodes_map[target_node])
+            channel = link.addr
             try:
-                self._redis.publish(channel, wire)
+                self._redis.publish(channel, wire_out)
             except Exception as e:
-                self._log("WARN", f"Redis publish error to {channel}: {e}")
+                self._log("WARN", "Redis publish error to %s: %s", channel, e)
             return
         # tcp
-        host, port = self.nodes_map[target_node]
         try:
-            with socket.create_connection((host, port), timeout=1.2) as s:
-                s.sendall(wire.encode("utf-8"))
+            if self.tcp_legacy:
+                host, port = self.nodes_map[target_node]
+                with socket.create_connection((host, port), timeout=1.2) as s:
+                    s.sendall(wire_out.encode("utf-8") if isinstance(wire_out, str) else wire_out)
+            else:
+                self._pool.send(link.addr, wire_out)
         except Exception as e:
-            self._log("WARN", f"TCP send error to {target_node}: {e}")
-
-    def _broadcast_wire(self, wire: str):
+            self._log("WARN", "TCP send error to %s: %s", target_node, e)
+            self._on_send_failure(target_node, wire)
+
+    def _on_send_failure(self, target_node: str, wire: Message | str) -> None:
+        # fast reroute: the neighbor is out until it talks again; data goes to the next choice now
+        if self.metrics is not None:
+            self.metrics.send_errors.inc(target_node)
+        self._link_down(target_node)
+        if isinstance(wire, Message) and wire.type == "message" and wire.dst != "*" \
+                and self.mode in ("lsr", "dvr"):
+            alt = self.next_hop_for(wire)
+            if alt is not None and alt != target_node:
+                self._send(alt, wire)
+
+    def _link_down(self, n: str) -> None:
+        if n in self.neighbors and n not in self._down:
+            # probe with a hello soon instead of waiting a whole hello_period to notice it is back
+            wait = min(PROBE_FIRST, self.hello_period)
+            self._down[n] = (self._now() + wait, wait)
+            # it may come back as a fresh process without binary support: renegotiate
+            self._peer_codec.pop(n, None)
+            self._log("WARN", "neighbor %s unreachable, using alternates", n, tag="LINK")
+            self._kick_routing()
+
+    def _broadcast_wire(self, wire: Message | str):
         for n in list(self.neighbors):
             self._send(n, wire)
 
     # ========= Control handling ==========
     def _send_hello(self, n: str):
-        wire = make_wire("hello", self._to_wire_id(self.node_id), self._to_wire_id(n), 1, "HELLO", {"alg": self.mode})
-        msg = json.loads(wire)
-        hid = get_header(msg, "id")
-        self._hello_out[hid] = self._now()
-        self._send(n, wire)
-
-    def _on_hello(self, msg: dict) -> None:
-        src = self._from_wire_id(msg.get("from"))
+        msg = Message("hello", self._to_wire_id(self.node_id), self._to_wire_id(n), 1, "HELLO",
+                      alg=self.mode, hdr_list=False)
+        if self._offer_codec:
+            # offered on every hello: an echo without it means the peer cannot read binary (anymore)
+            msg.hdr["codec"] = self.codec.offer
+        out = self._hello_out
+        while len(out) >= HELLO_PENDING_MAX:
+            del out[next(iter(out))]
+        out[msg.id] = self._now()
+        self._send(n, msg)
+
+    def _echo_for(self, msg: Message, payload: Any) -> Message:
+        # echo keeps the request id/ts and points back to it (compatible with counterparty)
+        return Message("echo", self._to_wire_id(self.node_id), msg.src, 1, payload,
+                       id=msg.id, ts=msg.ts, hdr={"reply_to": msg.id})
+
+    def _on_hello(self, msg: Message) -> None:
+        src = self._from_wire_id(msg.src)
         self._update_last_seen(src)
-        # reply with echo (compatible with counterparty)
-        echo = {
-            "type": "echo",
-            "from": self._to_wire_id(self.node_id),
-            "to": msg.get("from"),
-            "hops": 1,
-            "headers": [ {"id": get_header(msg, "id"), "ts": get_header(msg, "ts"), "reply_to": get_header(msg, "id")} ],
-            "payload": {"seq": self._next_seq(), "ts": self._now()}
-        }
-        self._send(src, dumps(echo))
-
-    def _on_echo(self, msg: dict) -> None:
-        src = self._from_wire_id(msg.get("from"))
+        echo = self._echo_for(msg, {"seq": self._next_seq(), "ts": self._now()})
+        if self._offer_codec and self.codec.accepts(msg.hdr.get("codec")):
+            echo.hdr["codec"] = self.codec.offer
+            self._send(src, echo.to_wire())  # confirmation always goes out as JSON
+            self._peer_codec[src] = self.codec
+            return
+        self._peer_codec.pop(src, None)
+        self._send(src, echo)
+
+    def _on_echo(self, msg: Message) -> None:
+        src = self._from_wire_id(msg.src)
         self._update_last_seen(src)
-        rid = get_header(msg, "reply_to")
-        if rid:
-            ts_sent = self._hello_out.pop(rid, None)
-            if ts_sent is not None:
-                rtt_ms = (self._now() - ts_sent) * 1000.0
-                m = self.nei_metrics.get(src) or NeighborMetrics()
-                m.rtt_ms = rtt_ms; m.last_seen = self._now()
-                self.nei_metrics[src] = m
-                self._log("INFO", f"ECHO from {src} RTT={rtt_ms:.1f} ms", tag="HELLO")
+        rid = msg.hdr.get("reply_to")
+        ts_sent = self._hello_out.pop(rid, None) if rid else None
+        if self._offer_codec and self.codec.accepts(msg.hdr.get("codec")):
+            self._peer_codec[src] = self.codec
+        elif ts_sent is not None:
+            self._peer_codec.pop(src, None)  # answer to our hello without the codec
+        if ts_sent is not None:
+            rtt_ms = (self._now() - ts_sent) * 1000.0
+            m = self.nei_metrics[src]  # created by _update_last_seen above
+            if m.sample(rtt_ms):
+                self._log("INFO", "cost to %s now %s (srtt=%.2f ms)", src, m.cost, m.srtt_ms, tag="HELLO")
+                self._kick_routing()
+            self._log("INFO", "ECHO from %s RTT=%.1f ms srtt=%.2f ms", src, rtt_ms, m.srtt_ms, tag="HELLO")
 
     def _update_last_seen(self, n: str) -> None:
-        m = self.nei_metrics.get(n) or NeighborMetrics()
-        m.last_seen = self._now()
-        self.nei_metrics[n] = m
+        now = self._now()
+        m = self.nei_metrics.get(n)
+        # adjacency up: first word from n, or back after a failed send or dead_after of silence
+        up = m is None or n in self._down or now - m.last_seen >= self.dead_after
+        if m is None:
+            m = self.nei_metrics[n] = NeighborMetrics()
+        m.last_seen = now
+        m.probes = 0
+        if self._down.pop(n, None) is not None:
+            self._kick_routing()
+        if up and n in self.neighbors:
+            self._adjacency_up(n)
+
+    def _adjacency_up(self, n: str) -> None:
+        if self.mode == "lsr" and self.lsr:
+            self.lsr.send_dbd(self, n)
 
     # deliver local data hook
-    def on_data_local(self, msg: dict) -> None:
+    def on_data_local(self, msg: Message) -> None:
+        for_me = msg.dst in (self._to_wire_id(self.node_id), self.node_id)
         # If the message is for me, show it
-        try:
-            if msg.get('type') == 'message' and msg.get('to') in (self._to_wire_id(self.node_id), self.node_id):
-                self._log('INFO', f"DATA for me from {msg.get('from')}: {msg.get('payload')}", tag='RECV')
-        except Exception:
-            pass
+        if msg.type == "message" and for_me:
+            self._log("INFO", "DATA for me from %s (id=%s): %s", msg.src, msg.id, Lazy(getattr, msg, "payload"),
+                      tag="RECV")
+            if "trace" in msg.hdr:
+                # one record per traced delivery: what trace_analyze.py reads from the logs
+                self._log("INFO", "%s", Lazy(_trace_line, msg), tag="TRACE")
+        if msg.type == "message" and for_me and "ack_to" in msg.hdr:
+            self._send_ack(msg)
         # If it's an echo request targeted to me, bounce back
-        if msg.get("type") == "echo" and msg.get("to") in (self._to_wire_id(self.node_id), self.node_id):
-            reply = {
-                "type": "echo",
-                "from": self._to_wire_id(self.node_id),
-                "to": msg.get("from"),
-                "hops": 1,
-                "headers": [ {"id": get_header(msg, "id"), "ts": get_header(msg, "ts"), "reply_to": get_header(msg, "id")} ],
-                "payload": msg.get("payload")
-            }
-            self._send(self._from_wire_id(msg.get("from")), dumps(reply))
+        if msg.type == "echo" and for_me:
+            self._send(self._from_wire_id(msg.src), self._echo_for(msg, msg.raw_payload))
+
+    def _send_ack(self, msg: Message) -> None:
+        # end-to-end echo for send_cli --load: straight to the collector named in headers.ack_to
+        # ("host:port" on tcp, a channel on redis, a port id on memory), outside the routed network
+        addr = str(msg.hdr["ack_to"])
+        info = {"at": self._to_wire_id(self.node_id), "hops": msg.hops}
+        if "trace" in msg.hdr:
+            info["trace"] = msg.hdr["trace"]
+        wire = self._echo_for(msg, info).to_wire()
+        try:
+            if self.transport == "redis":
+                self._redis.publish(addr, wire)
+            elif self.transport == "memory":
+                self._net.send(self.node_id, addr, wire)
+            else:
+                if self._ack_pool is None:
+                    self._ack_pool = ConnectionPool(_host_port, timeout=1.2)
+                self._ack_pool.send(addr, wire)
+        except Exception as e:
+            self._log("WARN", "ack to %s failed: %s", addr, e)
+
+    # ========= Routed forwarding (LSR/DVR) ==========
+    def _flow_key(self, msg: Message) -> bytes:
+        # one flow = same from/to (+ optional headers.flow), so it keeps one path and stays ordered
+        return f"{msg.src}|{msg.dst}|{msg.hdr.get('flow', '')}".encode("utf-8")
+
+    def next_hop_for(self, msg: Message, entry: Optional[FibEntry] = None) -> Optional[str]:
+        if entry is None:
+            entry = self.fib.get(msg.dst)
+            if entry is None:
+                return None
+        link = self._link_for(msg, entry)
+        return link.name if link is not None else None
+
+    def _link_for(self, msg: Message, entry: FibEntry) -> Optional[NeighborLink]:
+        links = entry.links
+        if links is None:  # hand-built entry
+            links = tuple(self._link(h) for h in entry.hops)
+        if len(links) == 1 and self.is_neighbor_active(links[0].name):
+            return links[0]
+        links = [l for l in links if self.is_neighbor_active(l.name)]
+        if not links:
+            b = entry.backup
+            if not b or not self.is_neighbor_active(b):
+                return None
+            return entry.backup_link or self._link(b)
+        if len(links) == 1:
+            return links[0]
+        h = hashlib.blake2b(self._flow_key(msg), digest_size=8, key=self._flow_seed).digest()
+        return links[int.from_bytes(h, "little") % len(links)]
+
+    def _forward_routed(self, msg: Message) -> None:
+        if msg.dst == "*":
+            self.flood.handle_message(self, msg)
+            return
+        fib = self.fib  # one snapshot for the whole decision
+        if msg.dst in fib.local:
+            self.on_data_local(msg)
+            return
+        entry = fib.get(msg.dst)
+        if entry is None:
+            # unknown destination (no route yet): fall back to flooding
+            self._log("DEBUG", "no route to %s, flooding", msg.dst, tag="FWD")
+            self.flood.handle_message(self, msg)
+            return
+        link = self._link_for(msg, entry)
+        if link is None:
+            self._log("DEBUG", "no usable next hop to %s, dropped", msg.dst, tag="FWD")
+            if self.metrics is not None:
+                self.metrics.dropped.inc("no_route")
+            return
+        if int(msg.hops) - 1 <= 0:
+            if self.metrics is not None:
+                self.metrics.dropped.inc("ttl")
+            return
+        self._send_link(link, msg.forward(int(msg.hops) - 1, self.node_id))
+        self._log("DEBUG", "FWD → %s (dst=%s, id=%s, fib v%s)", link.name, msg.dst, msg.id, fib.version, tag="FWD")
+
+    def _forward_lsr(self, msg: Message) -> None:
+        self._forward_routed(msg)
+
+    def _forward_dvr(self, msg: Message) -> None:
+        self._forward_routed(msg)
 
     # ========= Message processing ==========
-    def _process_msg(self, msg: dict) -> None:
-        try:
-            mtype = msg.get("type")
-        except Exception:
+    def _process_msg(self, msg: Message) -> None:
+        m = self.metrics
+        if m is None:
+            self._dispatch(msg)
             return
+        m.received.inc(msg.type)
+        t0 = time.perf_counter()
+        self._dispatch(msg)
+        if msg.type == "message":
+            m.forward_seconds.observe(time.perf_counter() - t0)
+
+    def _dispatch(self, msg: Message) -> None:
+        mtype = msg.type
         # normalize hops
         try:
-            hops = int(msg.get("hops", 0))
+            hops = int(msg.hops)
         except Exception:
             hops = 0
         if hops <= 0 and mtype not in ("hello", "echo"):
+            if self.metrics is not None:
+                self.metrics.dropped.inc("ttl")
             return
 
         # control
@@ -219,25 +556,28 @@ class RouterNode:
             # Continue no-op
             return
         if mtype == "lsp":
-            if self.mode == "lsr" and self.lsr:
-                self.lsr.on_receive_lsp(self, msg)
+            if self.mode == "lsr" and self.lsr and not self.lsr.on_receive_lsp(self, msg):
+                return
             self.flood.handle_control(self, msg)
             return
 
         if mtype == "info":
-            alg = str(get_header(msg, "alg", "")).lower()
+            alg = str(msg.alg or "").lower()
             if self.mode == "lsr" and self.lsr and alg in ("lsr","lsp","dijkstra"):
+                # flood on only LSAs that were new here: old copies die at the first node that has them
                 try:
-                    self.lsr.on_receive_lsp(self, msg)
+                    new = self.lsr.on_receive_lsp(self, msg)
                 except Exception as e:
-                    self._log("WARN", f"LSR on_receive_lsp error: {e}", tag="LSR")
-                self.flood.handle_control(self, msg)
+                    self._log("WARN", "LSR on_receive_lsp error: %s", e, tag="LSR")
+                    new = False
+                if new:
+                    self.flood.handle_control(self, msg)
                 return
             if self.mode == "dvr" and self.dvr and alg in ("dvr",):
                 try:
                     self.dvr.on_receive_info(self, msg)
                 except Exception as e:
-                    self._log("WARN", f"DVR on_receive_info error: {e}", tag="DVR")
+                    self._log("WARN", "DVR on_receive_info error: %s", e, tag="DVR")
                 self.flood.handle_control(self, msg)
                 return
             self.flood.handle_control(self, msg)
@@ -246,7 +586,9 @@ class RouterNode:
 
         # data (message)
         if mtype == "message":
-            alg = str(get_header(msg, "alg", self.mode)).lower()
+            if "trace" in msg.hdr:
+                msg.set_header("trace", trace_rx(msg.hdr["trace"], self.node_id))
+            alg = str(msg.alg or self.mode).lower()
             if self.mode == "lsr" and alg in ("lsr", "dijkstra"):
                 self._forward_lsr(msg)
                 return
@@ -258,7 +600,7 @@ class RouterNode:
             return
 
         # unknown types: ignore
-        self._log("DEBUG", f"Ignored type={mtype}", tag="PROC")
+        self._log("DEBUG", "Ignored type=%s", mtype, tag="PROC")
 
     # ========= Loops =========
     def forwarding_loop(self):
@@ -272,16 +614,16 @@ class RouterNode:
                             continue
                         data = message.get("data")
                         try:
-                            msg = normalize_incoming(data)
+                            msg = self._decode(data)
                         except Exception:
                             continue
                         self._process_msg(msg)
                 except Exception as e:
-                    self._log("WARN", f"Redis listen error: {e}")
+                    self._log("WARN", "Redis listen error: %s", e)
                     time.sleep(0.2)
             return
 
-        # TCP server
+        # TCP server: one reader per connection, messages handled in processing_loop
         self._bind_tcp()
         while self.running:
             try:
@@ -291,74 +633,238 @@ class RouterNode:
                 continue
             except OSError:
                 break
-            with conn:
-                try:
-                    data = conn.recv(65536)
-                except Exception:
-                    continue
-                if not data:
-                    continue
-                try:
-                    msg = normalize_incoming(data)
-                except Exception:
-                    continue
-                self._process_msg(msg)
+            threading.Thread(target=self._serve_conn, args=(conn,), daemon=True).start()
+
+    def _serve_conn(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(None)
+            try:
+                for data in read_frames(conn):
+                    if not self.running:
+                        break
+                    self._inbox.put(data)
+            except Exception as e:
+                self._log("DEBUG", "TCP reader closed: %s", e, tag="PROC")
+
+    def processing_loop(self):
+        while self.running:
+            data = self._inbox.get()
+            if data is None:
+                break
+            try:
+                msg = self._decode(data)
+            except Exception:
+                continue
+            self._process_msg(msg)
+
+    def _probe_down(self) -> None:
+        # hello to neighbors marked down by a failed send, backing off up to hello_period;
+        # the echo clears the mark (a transient error at startup must not silence a link)
+        now = self._now()
+        for n, (due, wait) in list(self._down.items()):
+            if now >= due:
+                wait = min(wait * 2, self.hello_period)
+                self._down[n] = (now + wait, wait)
+                self._send_hello(n)
+
+    def _liveness_tick(self) -> None:
+        # BFD-style detection: a neighbor that has been silent for QUIET_FACTOR hello periods
+        # gets detect_mult hellos probe_interval apart; if none is answered it is down now,
+        # not at dead_after. Steady state adds no traffic: probes start only on silence.
+        now = self._now()
+        quiet = self.hello_period * QUIET_FACTOR
+        for n in list(self.neighbors) if self.detect_mult > 0 else ():
+            m = self.nei_metrics.get(n)
+            if m is None or n in self._down or now - m.last_seen < quiet or now < m.next_probe:
+                continue
+            if m.probes >= self.detect_mult:
+                m.probes = 0
+                self._link_down(n)
+                continue
+            m.probes += 1
+            m.next_probe = now + self.probe_interval
+            self._send_hello(n)
+        # hellos whose echo was lost
+        out, cut = self._hello_out, now - self.dead_after
+        while out:
+            k = next(iter(out))
+            if out[k] >= cut:
+                break
+            del out[k]
+
+    def _liveness_due(self) -> Optional[float]:
+        if self.detect_mult <= 0:
+            return None
+        quiet = self.hello_period * QUIET_FACTOR
+        due = None
+        for n, m in list(self.nei_metrics.items()):
+            if n in self._down or n not in self.neighbors:
+                continue
+            t = max(m.last_seen + quiet, m.next_probe)
+            due = t if due is None else min(due, t)
+        return due
+
+    def _routing_tick(self) -> None:
+        self._liveness_tick()
+        if self._down:
+            self._probe_down()
+        # LSR dynamic topo
+        if self.mode == "lsr" and self.lsr:
+            self.lsr.expire()
+            if self.lsr.should_advertise(self):
+                self.lsr.advertise(self)
+            if self.lsr.spf_due():
+                t0 = time.perf_counter()
+                g, changed = self.lsr.spf_snapshot()
+                res = self._spf.update_graph(g, changed)
+                table = build_routing_table(res, self.node_id)
+                if self.lfa:
+                    nhs = res.next_hops or {d: (h,) for d, h in res.next_hop.items() if h}
+                    for d, b in loop_free_alternates(g, self.node_id, res.dist, nhs).items():
+                        if d in table:
+                            table[d]["backup"] = b
+                self.routing_table = table
+                self.lsr.spf_done(time.perf_counter() - t0)
+                if self.metrics is not None:
+                    self.metrics.spf_seconds.observe(time.perf_counter() - t0)
+                self._log("DEBUG", "SPF %s", Lazy(self.lsr.spf.stats), tag="spf")
+        # DVR: link changes and expired vectors only touch the affected destinations
+        if self.mode == "dvr" and self.dvr:
+            self.dvr.expire(self)
+            self.dvr.update_local_links(self)
+            if self.dvr.changed:
+                self.dvr.changed = False
+                self.routing_table = self.dvr.build_routing_table()
+            if self.dvr.should_advertise():
+                self.dvr.advertise(self)
+
+    def _routing_delay(self) -> float:
+        """Seconds until the next routing tick: 1 s, or sooner if an SPF/LSA/DV update is due."""
+        proto = self.lsr or self.dvr
+        due = proto.next_due() if proto else None
+        live = self._liveness_due()
+        if live is not None:
+            due = live if due is None else min(due, live)
+        if self._down:
+            probe = min(d for d, _ in self._down.values())
+            due = probe if due is None else min(due, probe)
+        if due is None:
+            return 1.0
+        return min(1.0, max(0.0, due - self._now()))
+
+    def _kick_routing(self) -> None:
+        # new LSA/vector: wake the routing loop so the throttle's initial delay is honoured
+        self._route_wake.set()
+
+    def _hello_tick(self) -> None:
+        for n in list(self.neighbors):
+            self._send_hello(n)
 
     def routing_loop(self):
         while self.running:
             try:
-                # LSR dynamic topo
-                if self.mode == "lsr" and self.lsr:
-                    self.lsr.expire()
-                    if self.lsr.should_advertise(self):
-                        self.lsr.advertise(self)
-                    if self.lsr.changed:
-                        dyn_topo = self.lsr.build_topology()
-                        dyn_topo.setdefault(self.node_id, {})
-                        res = dijkstra(dyn_topo, self.node_id)
-                        self.routing_table = build_routing_table(res, self.node_id)
-                        self.lsr.changed = False
-                # DVR stub updates
-                if self.mode == "dvr" and self.dvr:
-                    self.dvr.update_local_links(self)
-                    self.routing_table = self.dvr.build_routing_table()
-                    if self.dvr.should_advertise():
-                        self.dvr.advertise(self)
-                time.sleep(1.0)
+                self._route_wake.clear()
+                self._routing_tick()
+                self._route_wake.wait(self._routing_delay())
             except Exception as e:
-                self._log("WARN", f"routing_loop error: {e}")
+                self._log("WARN", "routing_loop error: %s", e)
 
     def hello_loop(self):
         while self.running:
-            for n in list(self.neighbors):
-                self._send_hello(n)
+            self._hello_tick()
             time.sleep(self.hello_period)
 
+    # ========= Metrics ==========
+    def _start_metrics(self) -> None:
+        if self.metrics is None or self._metrics_srv is not None:
+            return
+        self.metrics.collector(self._collect_metrics)
+        self._metrics_srv = serve_metrics(self.metrics, int(self.metrics_port))
+        port = self._metrics_srv.server_address[1]
+        self._log("INFO", "metrics on http://127.0.0.1:%s/metrics", port, tag="start")
+
+    def _stop_metrics(self) -> None:
+        srv, self._metrics_srv = self._metrics_srv, None
+        if srv is not None:
+            srv.shutdown()
+            srv.server_close()
+
+    def _collect_metrics(self) -> None:
+        # runs in the HTTP thread on each scrape: read what the node already keeps
+        m = self.metrics
+        dd = self.flood.seen
+        m.dedup_hits.set_total(dd.hits)
+        m.dedup_size.set(len(dd))
+        m.queue_depth.clear()
+        if self.outq is not None:
+            for n, q in self.outq.stats().items():
+                m.queue_depth.set(q["depth"], n)
+                m.queue_dropped.set_total(q["dropped"], n)
+        inbox = getattr(self, "_inbox", None)
+        if inbox is not None:
+            m.inbox_depth.set(inbox.qsize())
+        fib = self.fib
+        m.routes.set(len(fib))
+        m.fib_version.set(fib.version)
+        # rebuilt on every scrape, so a neighbor that went down drops its rtt/cost series
+        m.neighbor_up.clear()
+        m.neighbor_rtt.clear()
+        m.neighbor_cost.clear()
+        for n in sorted(list(self.neighbors)):
+            up = self.is_neighbor_active(n)
+            m.neighbor_up.set(1.0 if up else 0.0, n)
+            nm = self.nei_metrics.get(n)
+            if up and nm and nm.srtt_ms != float("inf"):
+                m.neighbor_rtt.set(nm.srtt_ms, n)
+                m.neighbor_cost.set(nm.cost, n)
+
     # ========= Lifecycle =========
     def start(self):
         self.running = True
-        self._t_fwd = threading.Thread(target=self.forwarding_loop, daemon=True)
+        self._start_metrics()
+        if self.transport == "memory":
+            # no listener: the network hands frames straight to processing_loop
+            self._net.attach(self.node_id, self._inbox.put)
+        else:
+            self._t_fwd = threading.Thread(target=self.forwarding_loop, daemon=True)
+            self._t_fwd.start()
         self._t_rte = threading.Thread(target=self.routing_loop, daemon=True)
         self._t_hlo = threading.Thread(target=self.hello_loop, daemon=True)
-        self._t_fwd.start(); self._t_rte.start(); self._t_hlo.start()
+        self._t_rte.start(); self._t_hlo.start()
+        if self.transport in ("tcp", "memory"):
+            self._t_prc = threading.Thread(target=self.processing_loop, daemon=True)
+            self._t_prc.start()
         addr = f"TCP {getattr(self, '_host', '')}:{getattr(self, '_port', '')}" if self.transport == "tcp" \
-               else f"Redis ch={self._channel}"
-        self._log("INFO", f"Started ({self.mode}) {addr} neighbors={sorted(self.neighbors)}", tag="start")
+               else "memory" if self.transport == "memory" else f"Redis ch={self._channel}"
+        self._log("INFO", "Started (%s) %s neighbors=%s", self.mode, addr, sorted(self.neighbors), tag="start")
 
     def stop(self):
         self.running = False
+        self._route_wake.set()
+        self._stop_metrics()
         try:
             if self._server: self._server.close()
         except Exception:
             pass
+        if self.outq is not None:
+            self.outq.close()
+        if self.transport == "tcp":
+            self._inbox.put(None)
+            self._pool.close()
+        if self._ack_pool is not None:
+            self._ack_pool.close()
+        if self.transport == "memory":
+            self._net.detach(self.node_id)
+            self._inbox.put(None)
         if self.transport == "redis":
             try:
                 self._pubsub.unsubscribe()
             except Exception:
                 pass
+        flush_logs()
 
-    def forward_lsr(self, msg: dict) -> None:
+    def forward_lsr(self, msg: Message) -> None:
         return self._forward_lsr(msg)
 
-    def forward_dvr(self, msg: dict) -> None:
+    def forward_dvr(self, msg: Message) -> None:
         return self._forward_dvr(msg)
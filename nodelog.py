@@ -0,0 +1,183 @@
+from __future__ import annotations
+import atexit, collections, json, sys, threading, time
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+
+# Logging off the forwarding path. RouterNode._log checks the level (one int
+# compare), applies the tag's sampling/rate limit and appends an unformatted
+# record to a process-wide ring buffer; a single background writer formats
+# and writes whatever accumulated, every few ms, in one write() per batch.
+# A full ring drops its oldest records (counted, reported by the writer).
+# Messages use %-style args so nothing is formatted unless it gets written:
+#     self._log("DEBUG", "FWD → %s (dst=%s)", nh, msg.dst, tag="FWD")
+# Records are tuples of plain values (the logger goes by index) so the cyclic
+# GC untracks them; queued records that hold containers or objects get walked
+# by every collection and cost more than the formatting they defer. Pass
+# strings/numbers on hot paths and keep Lazy for rare, expensive arguments.
+
+LOG_LEVELS = {"ERROR": 0, "WARN": 1, "INFO": 2, "DEBUG": 3}
+LEVEL_NAMES = {v: k for k, v in LOG_LEVELS.items()}
+
+RING_SIZE = 65536
+FLUSH_EVERY = 0.05  # seconds between writer passes
+
+class Lazy:
+    """Log argument computed only if the record gets written: Lazy(getattr, msg, "payload")."""
+    __slots__ = ("fn", "args")
+
+    def __init__(self, fn: Callable[..., Any], *args: Any):
+        self.fn = fn
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.fn(*self.args))
+
+class _TagLimit:
+    """Keep 1 record in `every`, and at most `rate` per second (token bucket, burst = rate)."""
+    __slots__ = ("every", "rate", "n", "tokens", "last", "suppressed")
+
+    def __init__(self, every: int = 1, rate: float = 0.0):
+        self.every = max(1, int(every))
+        self.rate = float(rate)
+        self.n = 0
+        self.tokens = self.rate
+        self.last = time.monotonic()
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        self.n += 1
+        if self.every > 1 and self.n % self.every:
+            self.suppressed += 1
+            return False
+        if self.rate:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1.0:
+                self.suppressed += 1
+                return False
+            self.tokens -= 1.0
+        return True
+
+def parse_sampling(spec: str) -> Dict[str, _TagLimit]:
+    """'FWD=1/100,RECV=50/s' -> keep 1 in 100 FWD records, at most 50 RECV records per second."""
+    out: Dict[str, _TagLimit] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        tag, _, rule = item.partition("=")
+        rule = rule.strip().lower()
+        if rule.endswith("/s"):
+            out[tag.strip().upper()] = _TagLimit(rate=float(rule[:-2]))
+        elif rule.startswith("1/"):
+            out[tag.strip().upper()] = _TagLimit(every=int(rule[2:]))
+        else:
+            raise ValueError(f"bad sampling rule {item!r} (use TAG=1/N or TAG=R/s)")
+    return out
+
+class _Writer:
+    """One per process: drains the ring into each record's logger stream."""
+    def __init__(self, size: int = RING_SIZE):
+        self.ring: collections.deque = collections.deque(maxlen=size)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # serializes drains (writer thread vs flush())
+
+    def put(self, rec: Tuple) -> None:
+        ring = self.ring
+        if len(ring) == ring.maxlen:
+            self.dropped += 1
+        ring.append(rec)
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="nodelog", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(FLUSH_EVERY)
+            self.drain()
+
+    def drain(self) -> None:
+        with self._lock:
+            ring = self.ring
+            if not ring and not self.dropped:
+                return
+            out: Dict[TextIO, list] = {}
+            while ring:
+                rec = ring.popleft()
+                logger = _loggers[rec[0]]
+                try:
+                    line = logger.render(rec)
+                except Exception as e:  # a bad %-format must not kill the writer
+                    line = f"[log] could not format {rec[4]!r}: {e}"
+                out.setdefault(logger.stream(), []).append(line)
+            if self.dropped:
+                n, self.dropped = self.dropped, 0
+                out.setdefault(sys.stdout, []).append(f"[log] ring full, {n} records dropped")
+            for stream, lines in out.items():
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+
+_writer = _Writer()
+_loggers: list = []  # NodeLogger by index, referenced from records
+atexit.register(_writer.drain)
+
+def flush() -> None:
+    """Write everything queued so far (tests, shutdown)."""
+    _writer.drain()
+
+class NodeLogger:
+    """
+    Per-node front end. fmt="text" keeps the classic "[NODE/TAG] message" lines,
+    fmt="jsonl" writes one JSON object per record (ts, node, level, tag, msg and
+    any keyword fields). sync=True formats and writes in the caller, like print().
+    """
+    def __init__(self, node_id: str, level: str = "INFO", fmt: str = "text", sampling: str = "",
+                 out: Optional[TextIO] = None, sync: bool = False, clock: Callable[[], float] = time.time):
+        assert fmt in ("text", "jsonl")
+        self.node_id = node_id
+        self.level = LOG_LEVELS.get(str(level).upper(), 2)
+        self.fmt = fmt
+        self.limits = parse_sampling(sampling)
+        self.out = out  # None: whatever sys.stdout is at write time (run.py redirects it)
+        self.sync = sync
+        self.clock = clock
+        self.idx = len(_loggers)
+        _loggers.append(self)
+
+    def stream(self) -> TextIO:
+        return self.out or sys.stdout
+
+    def emit(self, lvl: int, tag: str, msg: str, args: tuple, fields: Dict[str, Any]) -> None:
+        lim = self.limits.get(tag)
+        if lim is not None and not lim.allow():
+            return
+        rec = (self.idx, self.clock(), lvl, tag, msg, args, fields or None)
+        if self.sync:
+            s = self.stream()
+            s.write(self.render(rec) + "\n")
+            s.flush()
+            return
+        _writer.put(rec)
+
+    def render(self, rec: Tuple) -> str:
+        _, ts, lvl, tag, msg, args, fields = rec
+        text = msg % args if args else msg
+        if self.fmt == "jsonl":
+            d = {"ts": ts, "node": self.node_id, "level": LEVEL_NAMES.get(lvl, str(lvl)), "tag": tag, "msg": text}
+            if fields:
+                d.update(fields)
+            return json.dumps(d, ensure_ascii=False, default=str)
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return f"[{self.node_id}/{tag}] {text}"
+
+    def suppressed(self) -> Dict[str, int]:
+        return {t: lim.suppressed for t, lim in self.limits.items()}
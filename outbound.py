@@ -0,0 +1,95 @@
+from __future__ import annotations
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+class NeighborSender:
+    """
+    Outbound queue for one neighbor, drained by its own thread so a slow or dead
+    neighbor only delays itself. Control traffic is never dropped and goes
+    first; data is bounded to `maxlen` and drops the oldest entry when full.
+    """
+    def __init__(self, name: str, deliver: Callable[[str, Any], None], maxlen: int = 1024):
+        self.name = name
+        self._deliver = deliver
+        self.maxlen = int(maxlen)
+        self._data: Deque[Any] = deque()
+        self._ctrl: Deque[Any] = deque()
+        self._cv = threading.Condition()
+        self._running = True
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._t = threading.Thread(target=self._run, name=f"send-{name}", daemon=True)
+        self._t.start()
+
+    @property
+    def depth(self) -> int:
+        return len(self._data) + len(self._ctrl)
+
+    def put(self, wire: Any, control: bool) -> None:
+        with self._cv:
+            if control:
+                self._ctrl.append(wire)
+            else:
+                if len(self._data) >= self.maxlen:
+                    self._data.popleft()
+                    self.dropped += 1
+                self._data.append(wire)
+            self.enqueued += 1
+            d = len(self._data) + len(self._ctrl)
+            if d > self.max_depth:
+                self.max_depth = d
+            self._cv.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while self._running and not self._ctrl and not self._data:
+                    self._cv.wait()
+                if not self._running:
+                    return
+                wire = self._ctrl.popleft() if self._ctrl else self._data.popleft()
+            self._deliver(self.name, wire)
+            self.sent += 1
+
+    def close(self) -> None:
+        with self._cv:
+            self._running = False
+            self._cv.notify()
+
+    def stats(self) -> Dict[str, int]:
+        return {"depth": self.depth, "max_depth": self.max_depth, "enqueued": self.enqueued,
+                "sent": self.sent, "dropped": self.dropped}
+
+class OutboundQueues:
+    """Lazily created NeighborSender per neighbor."""
+    def __init__(self, deliver: Callable[[str, Any], None], maxlen: int = 1024):
+        self._deliver = deliver
+        self.maxlen = int(maxlen)
+        self._senders: Dict[str, NeighborSender] = {}
+        self._guard = threading.Lock()
+
+    def sender(self, neighbor: str) -> NeighborSender:
+        s = self._senders.get(neighbor)
+        if s is None:
+            with self._guard:
+                s = self._senders.get(neighbor)
+                if s is None:
+                    s = self._senders[neighbor] = NeighborSender(neighbor, self._deliver, self.maxlen)
+        return s
+
+    def put(self, neighbor: str, wire: Any, control: bool) -> None:
+        self.sender(neighbor).put(wire, control)
+
+    def depths(self) -> Dict[str, int]:
+        return {n: s.depth for n, s in list(self._senders.items())}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        # list(): senders are added by other threads while a metrics scrape reads this
+        return {n: s.stats() for n, s in list(self._senders.items())}
+
+    def close(self) -> None:
+        for s in list(self._senders.values()):
+            s.close()
@@ -53,11 +53,47 @@ def parse_args():
     ap.add_argument("--redis-host", default="lab3.redesuvg.cloud")
     ap.add_argument("--redis-port", type=int, default=6379)
     ap.add_argument("--redis-pwd", default="UVGRedis2025")
-    ap.add_argument("--log", default="INFO")
+    ap.add_argument("--log", "--log-level", dest="log", default="INFO")  # run.py passes --log-level
     ap.add_argument("--hello-period", type=float, default=5.0)
     ap.add_argument("--dead-after", type=float, default=15.0)
+    ap.add_argument("--probe-interval", type=float, default=0.05,
+                    help="seconds between the fast hellos sent to a neighbor that went quiet")
+    ap.add_argument("--detect-mult", type=int, default=3,
+                    help="unanswered fast hellos before a quiet neighbor is down (0: wait for --dead-after)")
+    ap.add_argument("--engine", default="threads", choices=["threads", "asyncio"],
+                    help="threads: RouterNode polling threads; asyncio: AsyncRouterNode event loop")
+    ap.add_argument("--codec", default="auto", choices=["auto", "json"],
+                    help="auto: negotiate the binary codec with neighbors that offer it; json: never")
+    ap.add_argument("--out-queue", type=int, default=1024,
+                    help="per-neighbor outbound queue length for data (0 = send inline)")
+    ap.add_argument("--tcp-legacy", action="store_true",
+                    help="TCP: one unframed connection per message (interop with other groups)")
+    ap.add_argument("--spf-throttle", default="0.05,0.2,5",
+                    help="LSR SPF throttle: initial delay, hold, max hold (seconds)")
+    ap.add_argument("--lsa-throttle", default="0,1,5",
+                    help="LSR own-LSA origination throttle: initial delay, hold, max hold (seconds)")
+    ap.add_argument("--dv-throttle", default="0,0.05,1",
+                    help="DVR triggered-update throttle: initial delay, hold, max hold (seconds)")
+    ap.add_argument("--no-ecmp", action="store_true",
+                    help="LSR/DVR: a single next hop per destination instead of equal-cost multipath")
+    ap.add_argument("--no-lfa", action="store_true",
+                    help="LSR/DVR: do not precompute loop-free alternate next hops")
+    ap.add_argument("--metrics-port", type=int, default=None,
+                    help="serve Prometheus metrics on 127.0.0.1:PORT/metrics (off by default)")
+    ap.add_argument("--log-format", default="text", choices=["text", "jsonl"],
+                    help="text: [NODE/TAG] lines; jsonl: one JSON object per record")
+    ap.add_argument("--log-sample", default="",
+                    help="per-tag sampling/rate limits, e.g. FWD=1/100,RECV=50/s")
+    ap.add_argument("--log-sync", action="store_true",
+                    help="write each log line from the calling thread (no background writer)")
     return ap.parse_args()
 
+def parse_throttle(s: str) -> tuple[float, float, float]:
+    parts = [float(x) for x in s.split(",")]
+    if len(parts) != 3:
+        raise ValueError(f"expected initial,hold,max_hold: {s}")
+    return parts[0], parts[1], parts[2]
+
 def main():
     args = parse_args()
     topo = load_topo(args.topo)
@@ -70,9 +106,20 @@ def main():
             print("--names required for redis", file=sys.stderr); sys.exit(2)
         nodes_map = load_names(args.names)
     try:
-        rn = RouterNode(args.me, nodes_map, topo, mode=args.mode, log_level=args.log,
-                        transport=args.transport, redis_host=args.redis_host, redis_port=args.redis_port,
-                        redis_pwd=args.redis_pwd, hello_period=args.hello_period, dead_after=args.dead_after)
+        cls = RouterNode
+        if args.engine == "asyncio":
+            from async_node import AsyncRouterNode
+            cls = AsyncRouterNode
+        rn = cls(args.me, nodes_map, topo, mode=args.mode, log_level=args.log,
+                 transport=args.transport, redis_host=args.redis_host, redis_port=args.redis_port,
+                 redis_pwd=args.redis_pwd, hello_period=args.hello_period, dead_after=args.dead_after,
+                 probe_interval=args.probe_interval, detect_mult=args.detect_mult,
+                 tcp_legacy=args.tcp_legacy, codec=args.codec,
+                 out_queue=args.out_queue, spf_throttle=parse_throttle(args.spf_throttle),
+                 lsa_throttle=parse_throttle(args.lsa_throttle),
+                 dv_throttle=parse_throttle(args.dv_throttle), ecmp=not args.no_ecmp,
+                 lfa=not args.no_lfa, metrics_port=args.metrics_port,
+                 log_format=args.log_format, log_sampling=args.log_sample, log_sync=args.log_sync)
         rn.start()
         while True:
             time.sleep(1.0)
@@ -1,9 +1,10 @@
-import argparse, json, socket, time
+import argparse, json, math, socket, threading, time, uuid
 try:
     import redis
 except Exception:
     redis = None
-from messages import make_msg
+from messages import Message, make_msg, normalize_incoming
+from tcp_pool import ConnectionPool, read_frames
 
 class Transport:
     def __init__(self, transport: str, nodes_path: str = None, names_path: str = None,
@@ -38,6 +39,215 @@ class Transport:
         ch = self.channels[entry_node]
         self.r.publish(ch, wire)
 
+# ---------- load generation (--load) ----------
+# Messages carry headers.ack_to; the destination node echoes each one straight
+# back to the Collector (node.py _send_ack), which times it against the local
+# send time. Latency is end to end plus the ack's single direct hop.
+
+def percentile(sorted_vals, p):
+    """Nearest-rank percentile (p in 0..100) of an ascending list; None if empty."""
+    if not sorted_vals:
+        return None
+    k = int(math.ceil(p / 100.0 * len(sorted_vals))) - 1
+    return sorted_vals[max(0, min(len(sorted_vals) - 1, k))]
+
+class Collector:
+    """Receives the acks destinations send back and matches them to pending sends."""
+    def __init__(self, tr: Transport, listen: str = '127.0.0.1:0', trace_out=None):
+        self.cv = threading.Condition()
+        self.trace_out = trace_out  # open file: one JSON line per traced ack (see trace_analyze.py)
+        self.pending = {}   # id -> (perf_counter at send, mode)
+        self.expired = {}   # id -> mode, for acks that come back after --timeout
+        self.lat = {}       # mode -> [ms]
+        self.late = {}      # mode -> count
+        self.running = True
+        if tr.transport == 'tcp':
+            host, _, port = listen.rpartition(':')
+            self.srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.srv.bind((host or '127.0.0.1', int(port or 0)))
+            self.srv.listen(128)
+            self.srv.settimeout(0.5)
+            h, p = self.srv.getsockname()[:2]
+            self.addr = f'{h}:{p}'
+            threading.Thread(target=self._accept, daemon=True).start()
+        else:
+            self.addr = f'loadgen-{uuid.uuid4().hex[:8]}'
+            self.ps = tr.r.pubsub()
+            self.ps.subscribe(self.addr)
+            threading.Thread(target=self._listen_redis, daemon=True).start()
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.srv.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        with conn:
+            try:
+                for data in read_frames(conn):
+                    self._on_ack(data)
+            except OSError:
+                pass
+
+    def _listen_redis(self):
+        for m in self.ps.listen():
+            if not self.running:
+                break
+            if m.get('type') == 'message':
+                self._on_ack(m['data'])
+
+    def _on_ack(self, data):
+        now = time.perf_counter()
+        try:
+            msg = normalize_incoming(data)
+        except Exception:
+            return
+        rid = msg.hdr.get('reply_to') or msg.id
+        with self.cv:
+            e = self.pending.pop(rid, None)
+            if e is None:
+                mode = self.expired.pop(rid, None)
+                if mode is not None:
+                    self.late[mode] = self.late.get(mode, 0) + 1
+                return
+            rtt = (now - e[0]) * 1000.0
+            self.lat.setdefault(e[1], []).append(rtt)
+            self.cv.notify_all()
+            info = msg.payload
+            if self.trace_out is not None and isinstance(info, dict) and 'trace' in info:
+                self.trace_out.write(json.dumps({'id': rid, 'mode': e[1], 'dst': info.get('at'),
+                                                 'ack_ms': rtt, 'trace': info['trace']}) + '\n')
+
+    def track(self, mid, mode):
+        with self.cv:
+            self.pending[mid] = (time.perf_counter(), mode)
+
+    def forget(self, mid):
+        with self.cv:
+            self.pending.pop(mid, None)
+
+    def expire(self, timeout, mode=None):
+        """Move sends older than timeout (or all of `mode` with timeout=0) to expired; returns how many."""
+        cut = time.perf_counter() - timeout
+        with self.cv:
+            old = [k for k, (t, m) in self.pending.items() if t <= cut and (mode is None or m == mode)]
+            for k in old:
+                self.expired[k] = self.pending.pop(k)[1]
+            return len(old)
+
+    def close(self):
+        self.running = False
+        if hasattr(self, 'srv'):
+            self.srv.close()
+        else:
+            try:
+                self.ps.unsubscribe()
+            except Exception:
+                pass
+
+def parse_pairs(spec, nodes):
+    if spec == 'all':
+        return [(a, b) for a in nodes for b in nodes if a != b]
+    pairs = []
+    for item in spec.split(','):
+        a, _, b = item.strip().partition(':')
+        if a not in nodes or b not in nodes:
+            raise SystemExit(f'unknown node in pair {item!r}')
+        pairs.append((a, b))
+    return pairs
+
+def run_load(tr: Transport, args):
+    nodes = list(tr.nodes or tr.channels)
+    pairs = parse_pairs(args.pairs, nodes)
+    wire_id = (lambda n: tr.channels.get(n, n)) if tr.transport == 'redis' else (lambda n: n)
+    pool = ConnectionPool(lambda k: tr.nodes[k]) if tr.transport == 'tcp' else None
+    trace_out = open(args.trace_out, 'a', encoding='utf-8') if args.trace_out else None
+    col = Collector(tr, args.listen, trace_out)
+    payload = 'x' * args.payload
+    rows = []
+    try:
+        # one run = one network: the nodes route with their own --mode, headers.alg only labels the traffic
+        mode = args.mode
+        sent = errors = i = 0
+        t0 = time.perf_counter()
+        end = t0 + args.duration
+        interval = 1.0 / args.rate if args.rate > 0 else 0.0
+        next_t = t0
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            if interval:
+                if now < next_t:
+                    time.sleep(min(next_t, end) - now)
+                    continue
+                next_t += interval
+            if args.concurrency > 0:
+                with col.cv:
+                    while len(col.pending) >= args.concurrency and time.perf_counter() < end:
+                        col.cv.wait(0.05)
+                col.expire(args.timeout)
+                if time.perf_counter() >= end:
+                    break
+            src, dst = pairs[i % len(pairs)]
+            i += 1
+            hdr = {'ack_to': col.addr, 'seq': i}
+            if args.trace:
+                hdr['trace'] = []
+            msg = Message('message', wire_id(src), wire_id(dst), args.ttl, payload, alg=mode, hdr=hdr)
+            col.track(msg.id, mode)
+            try:
+                if pool is not None:
+                    pool.send(src, msg.to_wire())
+                else:
+                    tr.send_redis(src, msg.to_wire())
+                sent += 1
+            except OSError:
+                col.forget(msg.id)
+                errors += 1
+        span = time.perf_counter() - t0
+        # drain: wait for the stragglers, then count the rest as lost
+        stop = time.perf_counter() + args.timeout
+        with col.cv:
+            while any(m == mode for _, m in col.pending.values()) and time.perf_counter() < stop:
+                col.cv.wait(0.05)
+        col.expire(0.0, mode)
+        with col.cv:
+            lat = sorted(col.lat.get(mode, []))
+            late = col.late.get(mode, 0)
+        acked = len(lat)
+        rows.append({'mode': mode, 'pairs': len(pairs), 'sent': sent, 'errors': errors, 'acked': acked,
+                     'lost': sent - acked, 'loss_pct': 100.0 * (sent - acked) / sent if sent else 0.0,
+                     'late': late, 'sent_per_s': sent / span if span else 0.0,
+                     'acked_per_s': acked / span if span else 0.0,
+                     'p50_ms': percentile(lat, 50), 'p95_ms': percentile(lat, 95),
+                     'p99_ms': percentile(lat, 99), 'max_ms': lat[-1] if lat else None})
+    finally:
+        col.close()
+        if pool is not None:
+            pool.close()
+        if trace_out is not None:
+            trace_out.close()
+    return rows
+
+def print_rows(rows, as_json=False):
+    if as_json:
+        for r in rows:
+            print(json.dumps(r))
+        return
+    fmt = lambda v: '-' if v is None else (f'{v:.2f}' if isinstance(v, float) else str(v))
+    cols = list(rows[0]) if rows else []
+    width = {c: max(len(c), *(len(fmt(r[c])) for r in rows)) for c in cols}
+    print('  '.join(c.ljust(width[c]) for c in cols))
+    for r in rows:
+        print('  '.join(fmt(r[c]).ljust(width[c]) for c in cols))
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--transport', choices=['tcp','redis'], default='redis')
@@ -52,23 +262,46 @@ def main():
     ap.add_argument('--mode', choices=['dijkstra','flooding','lsr','dvr'], default='flooding')
     ap.add_argument('--ttl', type=int, default=8)
     ap.add_argument('--text', default='hola mundo')
+    # load generation: many messages over --pairs for --duration against a network running --mode
+    ap.add_argument('--load', action='store_true', help='generate load and report latency/loss (one row, --mode)')
+    ap.add_argument('--pairs', default='all', help="'all' or A:D,B:C (each message enters at its src)")
+    ap.add_argument('--duration', type=float, default=10.0, help='seconds of sending')
+    ap.add_argument('--rate', type=float, default=200.0, help='messages/s in total (0 = as fast as possible)')
+    ap.add_argument('--concurrency', type=int, default=0, help='max messages awaiting an ack (0 = no limit)')
+    ap.add_argument('--payload', type=int, default=64, help='payload size (bytes)')
+    ap.add_argument('--timeout', type=float, default=5.0, help='seconds before an unacked message counts as lost')
+    ap.add_argument('--listen', default='127.0.0.1:0', help='tcp: where nodes send the acks')
+    ap.add_argument('--json', action='store_true')
+    ap.add_argument('--trace', action='store_true', help='ask every hop to stamp headers.trace')
+    ap.add_argument('--trace-out', default='', help='--load: append the returned traces to this JSONL file')
     args = ap.parse_args()
 
     if args.transport == 'tcp' and not args.nodes:
         ap.error('--nodes required for tcp')
     if args.transport == 'redis' and not args.names:
         ap.error('--names required for redis')
+    if args.trace_out and not args.load:
+        ap.error('--trace-out needs --load (without it the destination logs the trace)')
 
     tr = Transport(args.transport, nodes_path=args.nodes, names_path=args.names,
                    redis_host=args.redis_host, redis_port=args.redis_port, redis_pwd=args.redis_pwd)
 
+    if args.load:
+        args.trace = args.trace or bool(args.trace_out)
+        print_rows(run_load(tr, args), args.json)
+        return
+
     payload = args.text
     src_wire = args.src
     dst_wire = args.dst
     if args.transport == 'redis':
         src_wire = tr.channels.get(args.src, args.src)
         dst_wire = tr.channels.get(args.dst, args.dst)
-    wire = make_msg(args.mode, 'data', src_wire, dst_wire, args.ttl, payload)
+    if args.trace:
+        wire = Message('message', src_wire, dst_wire, args.ttl, payload, alg=args.mode,
+                       hdr={'trace': []}).to_wire()
+    else:
+        wire = make_msg(args.mode, 'data', src_wire, dst_wire, args.ttl, payload)
     if args.transport == 'tcp':
         tr.send_tcp(args.entry, wire)
     else:
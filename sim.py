@@ -0,0 +1,365 @@
+from __future__ import annotations
+import argparse, heapq, itertools, json, random
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dijkstra import INF
+from graph import CSRGraph, spf_csr
+from messages import Message
+from node import RouterNode
+import topogen
+
+# Discrete-event simulation of RouterNodes on a virtual clock. Every node runs
+# the real Flooding/LSR/DVR code and _process_msg on real wire messages (each
+# send is encoded and decoded again); only time, the links and the timers are
+# simulated, so a 1000-node run takes CPU time instead of wall-clock minutes.
+
+MIN_TICK = 1e-4  # smallest gap between two routing ticks of one node
+
+class SimNode(RouterNode):
+    """RouterNode whose sends, timers and routing wake-ups go through a Simulator."""
+    sim: "Simulator"
+
+    def _deliver(self, target_node: str, wire: Message | str):
+        self.sim._transmit(self, target_node, wire)
+
+    def _kick_routing(self) -> None:
+        self.sim._wake(self, self.sim.now)
+
+    def cost_to(self, neighbor: str) -> float:
+        # link costs come from the scenario (scripted changes), not from measured RTT
+        return self.sim.cost(self.node_id, neighbor)
+
+    def on_data_local(self, msg: Message) -> None:
+        if msg.type == "message":
+            self.sim._delivered(self, msg)
+
+    def _set_routing_table(self, table: Dict[str, Dict[str, Any]]) -> None:
+        old = getattr(self, "_routing_table", None)
+        RouterNode.routing_table.fset(self, table)
+        sim = getattr(self, "sim", None)
+        if sim is not None and table != old:
+            sim._table_changed(self)
+
+    routing_table = property(RouterNode.routing_table.fget, _set_routing_table)
+
+class Simulator:
+    """
+    Event-driven network of SimNodes.
+    - topo: {node: {neighbor: cost}} (symmetric); link costs and up/down state
+      can be changed at scripted times with set_cost/fail_link/restore_link.
+    - latency: one-way delay per link in seconds (set_latency per link).
+    - Each node gets a routing tick when its protocol asks for one (throttles,
+      _kick_routing) or at least once a second, and a hello every hello_period.
+    mark() starts a measurement window and report() closes it: convergence is
+    the time of the last routing-table change in the window, checked against a
+    Dijkstra oracle on the live topology.
+    """
+    def __init__(self, topo: Dict[str, Dict[str, float]], mode: str = "dvr", latency: float = 0.001,
+                 hello_period: float = 5.0, dead_after: float = 15.0, seed: int = 0, **node_kwargs):
+        self.now = 0.0
+        self.mode = mode
+        self._q: List[Tuple[float, int, Callable, tuple]] = []
+        self._seq = itertools.count()
+        self._rng = random.Random(seed)
+        names = list(topo)
+        for nbrs in topo.values():
+            names.extend(v for v in nbrs if v not in topo and v not in names)
+        self.costs: Dict[str, Dict[str, float]] = {n: {} for n in names}
+        for u, nbrs in topo.items():
+            for v, c in nbrs.items():
+                if u != v:
+                    self.costs[u][v] = self.costs[v][u] = float(c)
+        self.latency = float(latency)
+        self._latency: Dict[frozenset, float] = {}
+        self.down: set = set()
+        self.events = 0
+        self.ctrl_msgs = 0
+        self.ctrl_bytes = 0
+        self.ctrl_by_type: Counter = Counter()
+        self.ctrl_bytes_by_type: Counter = Counter()
+        self.data_msgs = 0
+        self.data_sent: Dict[str, float] = {}
+        self.data_delivered: Dict[str, float] = {}
+        self.table_changes = 0
+        self.last_change: Optional[float] = None
+        self._mark: Dict[str, float] = {}
+        node_kwargs.setdefault("log_level", "ERROR")
+        self._node_args = dict(nodes_map={n: n for n in names}, hello_period=hello_period,
+                               dead_after=dead_after, **node_kwargs)
+        self.nodes: Dict[str, SimNode] = {}
+        for n in names:
+            self.nodes[n] = self._new_node(n)
+        for node in self.nodes.values():
+            self._wake(node, 0.0)
+            self.at(self._rng.uniform(0.0, hello_period), self._hello, node)
+        self.mark()
+
+    def _new_node(self, n: str) -> SimNode:
+        a = dict(self._node_args)
+        node = SimNode(n, a.pop("nodes_map"), self.costs, mode=self.mode, transport="memory", out_queue=0,
+                       clock=self.clock, **a)
+        node.sim = self
+        node._sim_tick_at = INF
+        node._sim_alive = True
+        return node
+
+    # ----- clock and event queue -----
+    def clock(self) -> float:
+        return self.now
+
+    def at(self, t: float, fn: Callable, *args) -> None:
+        heapq.heappush(self._q, (t, next(self._seq), fn, args))
+
+    def run(self, until: float) -> None:
+        """Process every event before `until`, then leave the clock there."""
+        q = self._q
+        while q and q[0][0] < until:
+            self.now, _, fn, args = heapq.heappop(q)
+            self.events += 1
+            fn(*args)
+        self.now = max(self.now, until)
+
+    # ----- links -----
+    def cost(self, a: str, b: str) -> float:
+        return self.costs[a].get(b, INF)
+
+    def set_latency(self, a: str, b: str, latency: float) -> None:
+        self._latency[frozenset((a, b))] = float(latency)
+
+    def set_cost(self, t: float, a: str, b: str, cost: float) -> None:
+        self.at(t, self._set_cost, a, b, float(cost))
+
+    def fail_link(self, t: float, a: str, b: str, detect: bool = True) -> None:
+        """Link a-b goes down at t. detect: both ends notice at once (loss of carrier);
+        otherwise only failed sends or dead_after reveal it."""
+        self.at(t, self._set_down, a, b, True, detect)
+
+    def restore_link(self, t: float, a: str, b: str) -> None:
+        self.at(t, self._set_down, a, b, False, True)
+
+    def _set_cost(self, a: str, b: str, cost: float) -> None:
+        self.costs[a][b] = self.costs[b][a] = cost
+        self._wake(self.nodes[a], self.now)
+        self._wake(self.nodes[b], self.now)
+
+    def _set_down(self, a: str, b: str, down: bool, notify: bool) -> None:
+        link = frozenset((a, b))
+        if down:
+            self.down.add(link)
+            if notify:
+                self.nodes[a]._link_down(b)
+                self.nodes[b]._link_down(a)
+        else:
+            self.down.discard(link)
+            if notify:
+                # carrier back: both ends say hello right away
+                self.nodes[a]._send_hello(b)
+                self.nodes[b]._send_hello(a)
+
+    def restart_node(self, t: float, n: str, down_for: float = 1.0) -> None:
+        """Node n crashes at t (its links go silent, neighbors are not told) and comes back
+        down_for seconds later as a fresh RouterNode that knows nothing, like run.py option 4."""
+        self.at(t, self._crash, n)
+        self.at(t + down_for, self._boot, n)
+
+    def _crash(self, n: str) -> None:
+        self.nodes[n]._sim_alive = False
+        for v in self.costs[n]:
+            self.down.add(frozenset((n, v)))
+
+    def _boot(self, n: str) -> None:
+        node = self.nodes[n] = self._new_node(n)
+        for v in self.costs[n]:
+            self.down.discard(frozenset((n, v)))
+        self._wake(node, self.now)
+        self._hello(node)  # a fresh node says hello to everyone at once
+
+    def live_topology(self) -> Dict[str, Dict[str, float]]:
+        down = self.down
+        return {u: {v: c for v, c in nbrs.items() if frozenset((u, v)) not in down}
+                for u, nbrs in self.costs.items()}
+
+    # ----- wire -----
+    def _transmit(self, src: SimNode, dst: str, wire: Message | str) -> None:
+        if dst not in self.costs[src.node_id] or frozenset((src.node_id, dst)) in self.down:
+            src._on_send_failure(dst, wire)
+            return
+        data = src._encode_for(dst, wire)
+        delay = self._latency.get(frozenset((src.node_id, dst)), self.latency)
+        self.at(self.now + delay, self._arrive, src.node_id, dst, data)
+
+    def _arrive(self, src: str, dst: str, data) -> None:
+        if frozenset((src, dst)) in self.down:
+            return  # lost in flight
+        node = self.nodes[dst]
+        try:
+            msg = node._decode(data)
+        except Exception:
+            return
+        if msg.type == "message":
+            self.data_msgs += 1
+        else:
+            self.ctrl_msgs += 1
+            self.ctrl_bytes += len(data)
+            kind = f"{msg.type}/{msg.alg or '-'}"
+            self.ctrl_by_type[kind] += 1
+            self.ctrl_bytes_by_type[kind] += len(data)
+        node._process_msg(msg)
+
+    # ----- timers -----
+    def _wake(self, node: SimNode, t: float) -> None:
+        if t < node._sim_tick_at:
+            node._sim_tick_at = t
+            self.at(t, self._tick, node, t)
+
+    def _tick(self, node: SimNode, t: float) -> None:
+        if node._sim_tick_at != t or not node._sim_alive:
+            return  # superseded by an earlier wake-up
+        node._sim_tick_at = INF
+        node._routing_tick()
+        self._wake(node, self.now + max(node._routing_delay(), MIN_TICK))
+
+    def _hello(self, node: SimNode) -> None:
+        if not node._sim_alive:
+            return  # replaced by restart_node
+        node._hello_tick()
+        self.at(self.now + node.hello_period, self._hello, node)
+
+    # ----- data -----
+    def send(self, t: float, src: str, dst: str, payload: Any = "x", hops: int = 64,
+             flow: Optional[Any] = None) -> None:
+        self.at(t, self._inject, src, dst, payload, hops, flow)
+
+    def _inject(self, src: str, dst: str, payload: Any, hops: int, flow: Optional[Any]) -> None:
+        hdr = {"flow": flow} if flow is not None else None
+        msg = Message("message", src, dst, hops, payload, alg=self.mode, hdr=hdr)
+        self.data_sent[msg.id] = self.now
+        self.nodes[src]._process_msg(msg)
+
+    def _delivered(self, node: SimNode, msg: Message) -> None:
+        if msg.id in self.data_sent and msg.id not in self.data_delivered:
+            self.data_delivered[msg.id] = self.now - self.data_sent[msg.id]
+
+    def _table_changed(self, node: SimNode) -> None:
+        self.table_changes += 1
+        self.last_change = self.now
+
+    # ----- measurement -----
+    def wrong_routes(self) -> int:
+        """Entries whose cost differs from Dijkstra on the live topology (missing routes count too)."""
+        if self.mode not in ("lsr", "dvr"):
+            return 0
+        g = CSRGraph.from_dict(self.live_topology())
+        names = g.names
+        wrong = 0
+        for i, n in enumerate(names):
+            dist, _, _ = spf_csr(g, i)
+            table = self.nodes[n].routing_table
+            for d, c in zip(names, dist):
+                e = table.get(d)
+                have = float(e["cost"]) if e and e.get("next_hop") is not None else INF
+                if c == INF and have == INF:
+                    continue
+                if abs(have - c) > 1e-6 * max(1.0, c):
+                    wrong += 1
+        return wrong
+
+    def _counters(self) -> Dict[str, float]:
+        spf = sum(n.lsr.spf.runs for n in self.nodes.values() if n.lsr)
+        dv = sum(n.dvr.recomputed for n in self.nodes.values() if n.dvr)
+        return {"t": self.now, "events": self.events, "ctrl_msgs": self.ctrl_msgs, "ctrl_bytes": self.ctrl_bytes,
+                "data_msgs": self.data_msgs, "spf_runs": spf, "dv_recomputed": dv,
+                "table_changes": self.table_changes}
+
+    def mark(self) -> None:
+        self._mark = self._counters()
+        self.last_change = None
+
+    def report(self, check: bool = True) -> Dict[str, Any]:
+        c, m = self._counters(), self._mark
+        n = len(self.nodes)
+        sent = [i for i, t in self.data_sent.items() if t >= m["t"]]
+        got = [self.data_delivered[i] for i in sent if i in self.data_delivered]
+        out: Dict[str, Any] = {
+            "t": round(c["t"], 6),
+            "converged_s": round(self.last_change - m["t"], 6) if self.last_change is not None else 0.0,
+            "ctrl_msgs_per_node": (c["ctrl_msgs"] - m["ctrl_msgs"]) / n,
+            "ctrl_kB_per_node": (c["ctrl_bytes"] - m["ctrl_bytes"]) / n / 1e3,
+            "spf_runs": c["spf_runs"] - m["spf_runs"],
+            "dv_recomputed": c["dv_recomputed"] - m["dv_recomputed"],
+            "table_changes": c["table_changes"] - m["table_changes"],
+            "events": c["events"] - m["events"],
+        }
+        if check:
+            out["wrong_routes"] = self.wrong_routes()
+        if sent:
+            out["data_delivered"] = f"{len(got)}/{len(sent)}"
+            out["data_latency_ms"] = 1e3 * sum(got) / len(got) if got else None
+        return out
+
+def load_topology(spec: str) -> Dict[str, Dict[str, float]]:
+    """A topo.json path, or a generator: line:N, ring:N, grid:RxC, random:N, scale_free:N."""
+    kind, _, arg = spec.partition(":")
+    if kind == "line":
+        return topogen.line(int(arg))
+    if kind == "ring":
+        return topogen.ring(int(arg))
+    if kind == "grid":
+        r, _, c = arg.partition("x")
+        return topogen.grid(int(r), int(c or r))
+    if kind == "random":
+        return topogen.random_graph(int(arg), 4, seed=int(arg))
+    if kind == "scale_free":
+        return topogen.scale_free(int(arg), 2, seed=int(arg))
+    from run_node import load_topo
+    return load_topo(spec)
+
+def _parse_event(spec: str) -> Tuple[float, str, str, str, Optional[float]]:
+    # fail:A-B@30  restore:A-B@45  cost:A-B=5@50  restart:A=2@60 (down 2 s)
+    kind, _, rest = spec.partition(":")
+    link, _, t = rest.rpartition("@")
+    link, _, cost = link.partition("=")
+    a, _, b = link.partition("-")
+    return float(t), kind, a, b, float(cost) if cost else None
+
+def main():
+    ap = argparse.ArgumentParser(description="Discrete-event simulation of flooding/LSR/DVR on a virtual clock")
+    ap.add_argument("--topo", default="config/topo.json", help="topo.json path or line:N|ring:N|grid:RxC|random:N|scale_free:N")
+    ap.add_argument("--mode", default="dvr", choices=["flooding", "lsr", "dvr"])
+    ap.add_argument("--until", type=float, default=60.0, help="virtual seconds to simulate")
+    ap.add_argument("--latency", type=float, default=0.001)
+    ap.add_argument("--hello", type=float, default=5.0)
+    ap.add_argument("--event", action="append", default=[],
+                    help="fail:A-B@T, restore:A-B@T, cost:A-B=C@T or restart:A=DOWN_S@T")
+    ap.add_argument("--traffic", type=int, default=0, help="data messages per phase between random pairs")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    topo = load_topology(args.topo)
+    sim = Simulator(topo, mode=args.mode, latency=args.latency, hello_period=args.hello, seed=args.seed)
+    events = sorted(_parse_event(e) for e in args.event)
+    bounds = sorted({t for t, *_ in events if t < args.until} | {args.until})
+    rng = random.Random(args.seed)
+    names = list(sim.nodes)
+    start, phase = 0.0, "start"
+    for end in bounds:
+        for t, kind, a, b, cost in events:
+            if t == start:
+                {"fail": lambda: sim.fail_link(t, a, b), "restore": lambda: sim.restore_link(t, a, b),
+                 "cost": lambda: sim.set_cost(t, a, b, cost),
+                 "restart": lambda: sim.restart_node(t, a, cost if cost is not None else 1.0)}[kind]()
+        for _ in range(args.traffic):
+            s, d = rng.sample(names, 2)
+            sim.send(rng.uniform(start + 0.5 * (end - start), end), s, d)
+        sim.mark()
+        sim.run(end)
+        row = {"phase": phase, "mode": args.mode, "nodes": len(names), **sim.report()}
+        print(json.dumps(row) if args.json else "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                                           for k, v in row.items()))
+        phase = ",".join(f"{kind}:{a}-{b}" if b else f"{kind}:{a}" for t, kind, a, b, _ in events if t == end) or "end"
+        start = end
+
+if __name__ == "__main__":
+    main()
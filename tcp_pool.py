@@ -0,0 +1,138 @@
+from __future__ import annotations
+import socket, struct, select, threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# 4-byte big-endian length prefix. A legacy (unframed) JSON sender always starts
+# with '{' or whitespace, which as a length would exceed MAX_FRAME, so both
+# formats can share the same listening port.
+_LEN = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+LEGACY_START = (b"{", b" ", b"\t", b"\r", b"\n")
+
+def encode_frame(data: bytes | str) -> bytes:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if len(data) > MAX_FRAME:
+        raise ValueError(f"frame too large: {len(data)} bytes")
+    return _LEN.pack(len(data)) + data
+
+class FrameReader:
+    """Incremental decoder for a byte stream of length-prefixed frames."""
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._buf += data
+        out: list[bytes] = []
+        while len(self._buf) >= _LEN.size:
+            (n,) = _LEN.unpack_from(self._buf)
+            if n > MAX_FRAME:
+                raise ValueError(f"frame too large: {n} bytes")
+            end = _LEN.size + n
+            if len(self._buf) < end:
+                break
+            out.append(bytes(self._buf[_LEN.size:end]))
+            del self._buf[:end]
+        return out
+
+def read_frames(conn: socket.socket, bufsize: int = 65536) -> Iterator[bytes]:
+    """
+    Yield every message received on a connection until the peer closes it.
+    Framed peers may send many messages per connection; legacy peers send one
+    raw JSON document and close, which is yielded whole (no 64 KiB limit).
+    """
+    first = conn.recv(bufsize)
+    if not first:
+        return
+    if first[:1] in LEGACY_START:
+        chunks = [first]
+        while True:
+            data = conn.recv(bufsize)
+            if not data:
+                break
+            chunks.append(data)
+        yield b"".join(chunks)
+        return
+    reader = FrameReader()
+    data = first
+    while data:
+        yield from reader.feed(data)
+        data = conn.recv(bufsize)
+
+class ConnectionPool:
+    """
+    Long-lived outbound TCP connections, one per neighbor.
+    Sends are serialized per neighbor; a stale or broken socket is dropped and
+    re-dialled once before the error is propagated to the caller.
+    """
+    def __init__(self, addr_of: Callable[[str], Tuple[str, int]], timeout: float = 1.2):
+        self._addr_of = addr_of
+        self.timeout = float(timeout)
+        self._socks: Dict[str, socket.socket] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self.connects = 0
+        self.reconnects = 0
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        lk = self._locks.get(key)
+        if lk is None:
+            with self._guard:
+                lk = self._locks.setdefault(key, threading.Lock())
+        return lk
+
+    def _dial(self, key: str) -> socket.socket:
+        s = socket.create_connection(self._addr_of(key), timeout=self.timeout)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socks[key] = s
+        self.connects += 1
+        return s
+
+    @staticmethod
+    def _is_stale(s: socket.socket) -> bool:
+        # The receiver never writes back, so a readable socket means EOF/RST.
+        try:
+            r, _, _ = select.select([s], [], [], 0)
+            if not r:
+                return False
+            return s.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    def _drop(self, key: str) -> None:
+        s = self._socks.pop(key, None)
+        if s is not None:
+            try:
+                s.close()
+            except OSError:
+                pass
+
+    def send(self, key: str, data: bytes | str) -> None:
+        frame = encode_frame(data)
+        with self._lock_for(key):
+            s = self._socks.get(key)
+            if s is not None and self._is_stale(s):
+                self._drop(key); s = None
+                self.reconnects += 1
+            fresh = s is None
+            if fresh:
+                s = self._dial(key)
+            try:
+                s.sendall(frame)
+            except OSError:
+                self._drop(key)
+                if fresh:
+                    raise
+                self.reconnects += 1
+                s = self._dial(key)
+                try:
+                    s.sendall(frame)
+                except OSError:
+                    self._drop(key)
+                    raise
+
+    def close(self, key: Optional[str] = None) -> None:
+        keys = [key] if key is not None else list(self._socks.keys())
+        for k in keys:
+            with self._lock_for(k):
+                self._drop(k)
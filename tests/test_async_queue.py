@@ -0,0 +1,37 @@
+from __future__ import annotations
+import asyncio
+
+from async_node import AsyncRouterNode
+from memnet import MemoryNetwork
+from messages import Message, normalize_incoming
+
+TOPO = {"A": {"B": 1}, "B": {"A": 1}}
+
+def test_full_queue_still_sends_control_and_drops_oldest_data():
+    net = MemoryNetwork()
+    got = []
+    net.attach("B", got.append)
+    a = AsyncRouterNode("A", {"A": "A", "B": "B"}, TOPO, mode="lsr", transport="memory", network=net,
+                        log_level="ERROR", out_queue=4, codec="json")
+
+    async def main():
+        a._loop = asyncio.get_running_loop()
+        a.running = True
+        # everything is queued before the writer task gets to run
+        for i in range(10):
+            a._send("B", Message(src="A", dst="B", payload=f"d{i}"))
+        a._send("B", Message(type="hello", src="A", dst="B"))
+        assert a._aqueues["B"].depth == 5
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if len(got) == 5:
+                break
+        a.running = False
+        for t in a._tasks:
+            t.cancel()
+
+    asyncio.run(main())
+    msgs = [normalize_incoming(w) for w in got]
+    assert msgs[0].type == "hello"
+    assert [m.payload for m in msgs[1:]] == ["d6", "d7", "d8", "d9"]
+    assert a._aqueues["B"].dropped == 6
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import pytest
+
+from dedup import DedupCache
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+def test_duplicate_within_window_is_suppressed():
+    clk = Clock()
+    c = DedupCache(window=60, generations=4, clock=clk)
+    assert c.add("a") is True
+    clk.t += 59
+    assert c.add("a") is False
+    assert (c.hits, c.misses) == (1, 1)
+
+def test_id_is_forgotten_after_window_plus_one_generation():
+    clk = Clock()
+    c = DedupCache(window=30, generations=4, clock=clk)  # one generation = 10 s
+    c.add("a")
+    for _ in range(3):
+        clk.t += 10
+        c.add(f"tick{clk.t}")  # rotations happen on insert
+    assert "a" in c  # 30 s old: still inside the window
+    clk.t += 10
+    c.add("later")
+    assert "a" not in c
+    assert c.add("a") is True
+
+def test_idle_period_expires_several_generations_at_once():
+    clk = Clock()
+    c = DedupCache(window=30, generations=4, clock=clk)
+    for i in range(5):
+        c.add(i)
+    clk.t += 1000
+    c.add("x")
+    assert len(c) == 1 and c.evictions == 5
+
+def test_hard_cap_forces_early_rotation():
+    clk = Clock()
+    c = DedupCache(window=60, max_ids=40, generations=4, clock=clk)  # 10 ids per generation
+    for i in range(100):
+        c.add(i)
+    assert len(c) <= 40
+    assert c.forced_rotations > 0 and c.evictions == 100 - len(c)
+    assert 99 in c and 0 not in c
+
+def test_needs_two_generations():
+    with pytest.raises(ValueError):
+        DedupCache(generations=1)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import random
+
+import pytest
+
+from dijkstra import INF, build_routing_table, dijkstra, routing_table, shortest_path
+from graph import CSRGraph
+from topogen import grid, random_graph, scale_free
+
+TOPOS = [("random", lambda: random_graph(300, 4, seed=4)), ("grid", lambda: grid(15, 15, 1.0, 9.0, seed=4)),
+         ("scale_free", lambda: scale_free(300, seed=4))]
+
+def path_cost(topo, path):
+    return sum(topo[u][v] for u, v in zip(path, path[1:]))
+
+def assert_first_hops_ok(topo, src, dist, next_hop):
+    # ties may pick either neighbor: any next hop that starts a shortest path is right
+    via = {n: dijkstra(topo, n).dist for n in topo[src]}
+    for v, d in dist.items():
+        if v != src and d < INF:
+            nh = next_hop[v]
+            assert abs(topo[src][nh] + via[nh][v] - d) <= 1e-9 * d, v
+
+@pytest.mark.parametrize("name,make", TOPOS)
+def test_dict_and_csr_agree_and_next_hops_start_shortest_paths(name, make):
+    topo = make()
+    src = sorted(topo)[0]
+    res, res_g = dijkstra(topo, src), dijkstra(CSRGraph.from_dict(topo), src)
+    assert res.dist == res_g.dist
+    assert_first_hops_ok(topo, src, res.dist, res.next_hop)
+    assert_first_hops_ok(topo, src, res_g.dist, res_g.next_hop)
+
+@pytest.mark.parametrize("name,make", TOPOS)
+def test_one_pass_table_matches_the_path_result(name, make):
+    topo = make()
+    src = sorted(topo)[0]
+    ref = build_routing_table(dijkstra(topo, src), src)
+    for table in (routing_table(topo, src), routing_table(CSRGraph.from_dict(topo), src)):
+        assert {d: e["cost"] for d, e in table.items()} == {d: e["cost"] for d, e in ref.items()}
+        assert_first_hops_ok(topo, src, {d: e["cost"] for d, e in table.items()},
+                             {d: e["next_hop"] for d, e in table.items()})
+
+@pytest.mark.parametrize("name,make", TOPOS)
+def test_single_pair_queries_match_full_spf(name, make):
+    topo = make()
+    g = CSRGraph.from_dict(topo)
+    rng = random.Random(4)
+    names = sorted(topo)
+    for _ in range(30):
+        s, t = rng.sample(names, 2)
+        full = dijkstra(topo, s).dist[t]
+        assert dijkstra(g, s, target=t).dist[t] == full
+        for graph in (topo, g):
+            c, p = shortest_path(graph, s, t)
+            assert abs(c - full) <= 1e-9 * full and p[0] == s and p[-1] == t
+            assert abs(path_cost(topo, p) - c) <= 1e-9 * c
+
+def test_unreachable_target():
+    topo = {"A": {"B": 1.0}, "B": {"A": 1.0}, "C": {}}
+    assert shortest_path(topo, "A", "C") == (INF, [])
+    assert shortest_path(CSRGraph.from_dict(topo), "A", "C") == (INF, [])
+    assert routing_table(topo, "A")["C"] == {"next_hop": None, "cost": INF}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dvr import DVR, INF
+from messages import Message
+from sim import Simulator
+from throttle import Throttle
+from topogen import line
+
+class Stub:
+    """Just enough of a RouterNode for DVR: neighbors, costs, wire ids and a send log."""
+    def __init__(self, me, costs):
+        self.node_id = me
+        self.costs = dict(costs)
+        self.neighbors = set(costs)
+        self.nodes_map = {}
+        self.sent = []
+
+    def is_neighbor_active(self, n):
+        return n in self.costs
+
+    def cost_to(self, n):
+        return self.costs[n]
+
+    def _to_wire_id(self, n):
+        return n
+
+    def _from_wire_id(self, n):
+        return n
+
+    def _send(self, n, msg):
+        self.sent.append((n, msg.payload))
+
+    def _kick_routing(self):
+        pass
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+def vector(src, rows, full=True):
+    return Message("info", src, "A", 1, {"routing_table": [[d, c] for d, c in rows.items()], "full": full},
+                   alg="dvr")
+
+def setup():
+    clk = Clock()
+    node = Stub("A", {"B": 1.0, "C": 1.0})
+    dv = DVR("A", trig=Throttle(0.0, 0.05, 1.0), clock=clk)
+    dv.update_local_links(node)
+    dv.advertise(node)  # first send: the whole table to everyone
+    node.sent.clear()
+    return clk, node, dv
+
+def sent_to(node, n):
+    return [dict(map(tuple, p["routing_table"])) | {"full": p["full"]} for m, p in node.sent if m == n]
+
+def test_route_learned_via_a_neighbor_goes_back_poisoned():
+    clk, node, dv = setup()
+    dv.on_receive_info(node, vector("B", {"D": 1.0}))
+    assert dv.dv_self["D"] == 2.0 and dv.next_hop["D"] == "B"
+    clk.t += 1
+    dv.advertise(node)
+    assert sent_to(node, "B") == [{"D": INF, "full": False}]
+    assert sent_to(node, "C") == [{"D": 2.0, "full": False}]
+
+def test_poison_reverse_reaches_every_equal_cost_next_hop():
+    clk, node, dv = setup()
+    dv.on_receive_info(node, vector("B", {"D": 1.0}))
+    dv.on_receive_info(node, vector("C", {"D": 1.0}))
+    assert dv.next_hops["D"] == ("B", "C")
+    clk.t += 1
+    dv.advertise(node)
+    assert sent_to(node, "B")[-1]["D"] == INF and sent_to(node, "C")[-1]["D"] == INF
+
+def test_triggered_update_carries_only_changed_entries_and_is_throttled():
+    clk, node, dv = setup()
+    dv.on_receive_info(node, vector("B", {"D": 1.0, "E": 1.0}))
+    clk.t += 1
+    dv.advertise(node)
+    node.sent.clear()
+    dv.on_receive_info(node, vector("B", {"E": 4.0}, full=False))
+    assert dv.dv_self["E"] == 5.0 and dv.dv_self["D"] == 2.0
+    # a run just happened: the next one waits for the (backed-off) hold
+    assert not dv.should_advertise() and dv.next_due() > clk.t
+    clk.t = dv.next_due()
+    assert dv.should_advertise()
+    dv.advertise(node)
+    assert sent_to(node, "C") == [{"E": 5.0, "full": False}]
+    assert not dv.should_advertise()
+
+def test_neighbor_coming_up_gets_the_whole_table():
+    clk, node, dv = setup()
+    dv.on_receive_info(node, vector("B", {"D": 1.0}))
+    clk.t += 1
+    dv.advertise(node)
+    node.sent.clear()
+    node.costs["E"] = 1.0
+    node.neighbors.add("E")
+    dv.update_local_links(node)
+    clk.t += 1
+    dv.advertise(node)
+    full = sent_to(node, "E")
+    assert full and full[0]["full"] and set(full[0]) >= {"A", "B", "C", "D", "E"}
+    assert all(not p["full"] for m, p in node.sent if m != "E")
+
+def test_link_down_reroutes_only_affected_destinations():
+    clk, node, dv = setup()
+    dv.on_receive_info(node, vector("B", {"D": 1.0, "F": 5.0}))
+    dv.on_receive_info(node, vector("C", {"D": 3.0, "F": 1.0}))
+    assert dv.next_hop["D"] == "B" and dv.next_hop["F"] == "C"
+    before = dv.recomputed
+    del node.costs["B"]
+    dv.update_local_links(node)
+    assert dv.next_hop["D"] == "C" and dv.dv_self["D"] == 4.0
+    assert dv.dv_self.get("B", INF) >= INF
+    assert dv.recomputed - before <= 3  # B, D and F (via B's vector), not the whole table
+
+def test_no_count_to_infinity_when_the_far_end_is_cut_off():
+    sim = Simulator(line(4), mode="dvr", seed=1)
+    sim.run(10.0)
+    assert sim.wrong_routes() == 0
+    sim.fail_link(10.0, "n2", "n3")
+    sim.run(12.0)
+    # poison reverse: n0..n2 drop n3 instead of bouncing it between them
+    for n in ("n0", "n1", "n2"):
+        e = sim.nodes[n].routing_table.get("n3")
+        assert e is None or e["next_hop"] is None or e["cost"] == float("inf"), (n, e)
+    assert sim.wrong_routes() == 0
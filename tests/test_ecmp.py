@@ -0,0 +1,38 @@
+from __future__ import annotations
+from collections import Counter
+
+from fib import FibEntry
+from messages import Message
+from node import RouterNode
+
+TOPO = {"s": {"a": 1, "b": 1}, "a": {"s": 1, "c": 1, "d": 1}, "b": {"s": 1, "c": 1, "d": 1},
+        "c": {"a": 1, "b": 1, "t": 1}, "d": {"a": 1, "b": 1, "t": 1}, "t": {"c": 1, "d": 1}}
+
+def node(name):
+    return RouterNode(name, {k: k for k in TOPO}, TOPO, mode="lsr", transport="memory", log_level="ERROR")
+
+def flows(n):
+    return [Message(src="s", dst="t", hdr={"flow": str(i)}) for i in range(n)]
+
+def test_two_equal_hops_split_evenly():
+    s = node("s")
+    entry = FibEntry(("a", "b"), None, 3.0)
+    split = Counter(s.next_hop_for(m, entry) for m in flows(4000))
+    assert set(split) == {"a", "b"}
+    assert abs(split["a"] - 2000) < 200, split
+
+def test_split_not_polarized_across_hops():
+    # the flows s hashes onto a must still spread over a's own two equal hops
+    s, a = node("s"), node("a")
+    first = FibEntry(("a", "b"), None, 3.0)
+    second = FibEntry(("c", "d"), None, 2.0)
+    via_a = [m for m in flows(4000) if s.next_hop_for(m, first) == "a"]
+    split = Counter(a.next_hop_for(m, second) for m in via_a)
+    assert abs(split["c"] - len(via_a) / 2) < 0.1 * len(via_a), split
+
+def test_flow_keeps_its_hop():
+    s = node("s")
+    entry = FibEntry(("a", "b"), None, 3.0)
+    for m in flows(50):
+        again = Message(src=m.src, dst=m.dst, hdr=dict(m.hdr))
+        assert s.next_hop_for(m, entry) == s.next_hop_for(again, entry)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+from node import RouterNode
+
+TOPO = {"s": {"a": 1, "b": 1}, "a": {"s": 1, "t": 1}, "b": {"s": 1, "t": 1}, "t": {"a": 1, "b": 1}}
+
+def node(name, transport="memory"):
+    return RouterNode(name, {k: k for k in TOPO}, TOPO, mode="lsr", transport=transport, log_level="ERROR")
+
+def test_compiled_entries_carry_resolved_links():
+    s = node("s")
+    s.routing_table = {"t": {"next_hop": "a", "next_hops": ["a", "b"], "backup": "b", "cost": 2}}
+    e = s.fib.get("t")
+    assert [l.name for l in e.links] == ["a", "b"]
+    assert e.backup_link is e.links[1]  # one handle per neighbor, shared across entries and versions
+    s.routing_table = {"t": {"next_hop": "b", "cost": 2}, "b": {"next_hop": "b", "cost": 1}}
+    assert s.fib.get("t").links[0] is s.fib.get("b").links[0] is e.links[1]
+
+def test_redis_link_resolves_the_channel():
+    pytest.importorskip("redis")
+    s = RouterNode("s", {"s": "ch-s", "a": "ch-a"}, {"s": {"a": 1}, "a": {"s": 1}}, mode="lsr",
+                   transport="redis", log_level="ERROR")
+    s.routing_table = {"a": {"next_hop": "a", "cost": 1}}
+    assert s.fib.get(s._to_wire_id("a")).links[0].addr == "ch-a"
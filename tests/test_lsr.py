@@ -0,0 +1,236 @@
+from __future__ import annotations
+import json
+
+from lsr import LSR, MAX_AGE, REQ_WAIT, lsa_checksum
+from messages import normalize_incoming
+from sim import Simulator
+from throttle import Throttle
+from topogen import line
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+class Stub:
+    """The RouterNode surface LSR uses: neighbors and costs, wire ids, and a log of what it sends."""
+    def __init__(self, me, costs):
+        self.node_id = me
+        self.costs = dict(costs)
+        self.neighbors = set(costs)
+        self.out = []  # (target or "*", wire)
+
+    def cost_to(self, n):
+        return self.costs[n]
+
+    def is_neighbor_active(self, n):
+        return True
+
+    def _to_wire_id(self, n):
+        return n
+
+    def _from_wire_id(self, n):
+        return n
+
+    def _broadcast_wire(self, wire):
+        self.out.append(("*", wire))
+
+    def _send(self, n, wire):
+        self.out.append((n, wire))
+
+    def _kick_routing(self):
+        pass
+
+def make(me, costs, clk):
+    return Stub(me, costs), LSR(me, spf=Throttle(0, 0, 0), adv=Throttle(0, 0, 0), clock=clk)
+
+def originate(node, lsr):
+    node.out.clear()
+    assert lsr.should_advertise(node)
+    lsr.advertise(node)
+    (_, wire), = node.out
+    return wire
+
+def receive(lsr, node, wire, prev=None):
+    msg = normalize_incoming(wire)
+    msg.prev = prev
+    return lsr.on_receive_lsp(node, msg)
+
+def lsa_of(wire):
+    return json.loads(wire)["lsa"]
+
+def test_checksum_ignores_order_and_sees_every_cost():
+    assert lsa_checksum({"B": 1.0, "C": 4.0}) == lsa_checksum({"C": 4, "B": 1})
+    assert lsa_checksum({"B": 1.0, "C": 4.0}) != lsa_checksum({"B": 1.0, "C": 5.0})
+
+def test_full_then_delta_then_bare_refresh():
+    clk = Clock()
+    a, la = make("A", {"B": 1.0, "C": 4.0}, clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    full = json.loads(originate(a, la))
+    assert full["seq_num"] == 1 and full["neighbors"] == ["B", "C"] and full["lsa"]["costs"] == [1, 4]
+    assert receive(lb, b, json.dumps(full), prev="A")
+    assert lb.lsdb["A"]["costs"] == {"B": 1.0, "C": 4.0}
+
+    clk.t += 1
+    a.costs["C"] = 2.0
+    delta = originate(a, la)
+    assert lsa_of(delta) == {"seq": 2, "cksum": lsa_checksum({"B": 1.0, "C": 2.0}), "delta": {"C": 2}}
+    assert receive(lb, b, delta, prev="A")
+    assert lb.lsdb["A"]["costs"] == {"B": 1.0, "C": 2.0} and lb.graph.csr().row("A")["C"] == 2.0
+
+    clk.t += la.refresh + 1  # nothing changed: the periodic refresh is only seq + cksum
+    refresh = originate(a, la)
+    assert lsa_of(refresh) == {"seq": 3, "cksum": lsa_checksum({"B": 1.0, "C": 2.0})}
+    skipped = lb.spf_skipped
+    assert receive(lb, b, refresh, prev="A")
+    assert lb.lsdb["A"]["seq"] == 3 and lb.spf_skipped == skipped + 1
+    assert (la.sent_full, la.sent_delta, la.sent_refresh) == (1, 1, 1)
+
+def test_new_neighbor_and_full_refresh_interval_send_full_lsas():
+    clk = Clock()
+    a, la = make("A", {"B": 1.0}, clk)
+    originate(a, la)
+    clk.t += 1
+    a.costs["D"] = 1.0
+    a.neighbors.add("D")
+    assert "seq_num" in json.loads(originate(a, la))  # neighbor set changed
+    clk.t += la.full_refresh
+    assert "seq_num" in json.loads(originate(a, la))
+
+def test_delta_after_a_missed_lsa_asks_the_sender_for_the_full_record():
+    clk = Clock()
+    a, la = make("A", {"B": 1.0, "C": 4.0}, clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    receive(lb, b, originate(a, la), prev="A")
+    clk.t += 1
+    a.costs["C"] = 2.0
+    originate(a, la)  # seq 2 never reaches B
+    clk.t += 1
+    a.costs["C"] = 3.0
+    b.out.clear()
+    assert receive(lb, b, originate(a, la), prev="A") is False  # not installed, not flooded on
+    assert lb.delta_miss == 1 and lb.lsdb["A"]["seq"] == 1
+    (to, wire), = b.out
+    assert to == "A" and lsa_of(wire) == {"req": ["A"]}
+    a.out.clear()
+    receive(la, a, wire)
+    (to, full), = a.out
+    assert to == "B" and receive(lb, b, full)
+    assert lb.lsdb["A"]["costs"] == {"B": 1.0, "C": 3.0} and lb.lsdb["A"]["seq"] == 3
+
+def test_age_carries_over_and_old_lsas_expire():
+    clk = Clock()
+    a, la = make("A", {"B": 1.0}, clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    d = json.loads(originate(a, la))
+    d["lsa"]["age"] = 20.0
+    assert receive(lb, b, json.dumps(d))
+    assert lb.lsdb["A"]["ts"] == clk.t - 20.0
+    clk.t += MAX_AGE - 20.0 + 0.1
+    lb.expire()
+    assert "A" not in lb.lsdb and lb.graph.csr().row("A") == {}
+    d["seq_num"] += 1
+    d["lsa"]["age"] = MAX_AGE
+    assert not receive(lb, b, json.dumps(d))  # too old to install
+
+def test_old_and_duplicate_seqs_are_not_installed():
+    clk = Clock()
+    a, la = make("A", {"B": 1.0}, clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    first = originate(a, la)
+    clk.t += 1
+    a.costs["B"] = 2.0
+    second = originate(a, la)
+    receive(lb, b, first)
+    receive(lb, b, second)
+    assert not receive(lb, b, first) and not receive(lb, b, second)
+    assert lb.lsa_old == 2 and lb.lsdb["A"]["seq"] == 2
+
+def exchange(src_node, dst_lsr, dst_node, to):
+    """Deliver what src_node sent to `to` and clear it; returns how many messages went."""
+    msgs = [w for t, w in src_node.out if t == to]
+    src_node.out[:] = [(t, w) for t, w in src_node.out if t != to]
+    for w in msgs:
+        receive(dst_lsr, dst_node, w)
+    return len(msgs)
+
+def with_lsdb(clk):
+    """A that knows its own LSA plus C's and D's."""
+    a, la = make("A", {"B": 1.0, "C": 1.0}, clk)
+    originate(a, la)
+    for me, costs in (("C", {"A": 1.0, "D": 2.0}), ("D", {"C": 2.0})):
+        n, ln = make(me, costs, clk)
+        receive(la, a, originate(n, ln))
+    a.out.clear()
+    return a, la
+
+def test_database_exchange_brings_a_new_neighbor_up_to_date():
+    clk = Clock()
+    a, la = with_lsdb(clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    originate(b, lb)
+    b.out.clear()
+    la.send_dbd(a, "B")
+    assert exchange(a, lb, b, "B") == 1
+    reply = [lsa_of(w) for _, w in b.out]
+    assert {"req": ["A", "C", "D"]} in reply and any("dbd" in r and "init" not in r for r in reply)
+    exchange(b, la, a, "A")  # A answers the req and asks for B's record in turn
+    assert exchange(a, lb, b, "B") == 4  # 3 full LSAs + A's req
+    exchange(b, la, a, "A")
+    assert exchange(a, lb, b, "B") == 0  # no summary ping-pong
+    for origin in ("A", "C", "D"):
+        assert lb.lsdb[origin]["seq"] == la.lsdb[origin]["seq"]
+        assert lb.lsdb[origin]["cksum"] == la.lsdb[origin]["cksum"]
+    assert la.lsdb["B"]["costs"] == {"A": 1.0}
+    assert lb.graph.csr().row("C") == la.graph.csr().row("C")
+
+def test_summary_only_asks_for_missing_or_newer_records():
+    clk = Clock()
+    a, la = with_lsdb(clk)
+    b, lb = make("B", {"A": 1.0}, clk)
+    for origin in ("C", "D"):
+        rec = la.lsdb[origin]
+        receive(lb, b, la._full_wire(rec, clk.t))
+    la.lsdb["D"]["seq"] += 1  # A has a newer D than B
+    la.send_dbd(a, "B", init=False)
+    exchange(a, lb, b, "B")
+    (to, w), = b.out
+    assert to == "A" and lsa_of(w) == {"req": ["A", "D"]}
+
+def summary(lsr, sender, to):
+    dbd = [[r["from"], r["seq"], r["cksum"]] for r in lsr.lsdb.values()]
+    return json.dumps({"type": "info", "from": sender, "to": to, "hops": 1, "headers": {"alg": "lsr"},
+                       "lsa": {"dbd": dbd}})
+
+def test_a_record_requested_from_one_neighbor_is_not_asked_again_right_away():
+    clk = Clock()
+    a, la = with_lsdb(clk)
+    b, lb = make("B", {"A": 1.0, "E": 1.0}, clk)
+    receive(lb, b, summary(la, "A", "B"))
+    b.out.clear()
+    # E offers the same records before A's answer arrived: nothing to ask for
+    receive(lb, b, summary(la, "E", "B"))
+    assert b.out == []
+    clk.t += REQ_WAIT + 0.1  # A never answered: E gets asked
+    receive(lb, b, summary(la, "E", "B"))
+    (to, w), = b.out
+    assert to == "E" and sorted(lsa_of(w)["req"]) == ["A", "C", "D"]
+
+def test_refresh_mismatch_fetches_the_full_lsa():
+    sim = Simulator(line(3), mode="lsr", seed=1)
+    sim.run(20.0)
+    a, far = sim.nodes["n0"].lsr, sim.nodes["n2"].lsr
+    # n2 missed an LSA from n0: its record is stale but looks complete
+    stale = {"n1": 7.0}
+    rec = far.lsdb["n0"]
+    rec["wire"], rec["costs"], rec["cksum"] = dict(stale), dict(stale), lsa_checksum(stale)
+    far.graph.set_row("n0", stale)
+    sent = (a.sent_full, a.sent_refresh)
+    sim.run(40.0)
+    assert a.sent_full == sent[0] and a.sent_refresh > sent[1]  # only bare refreshes went out
+    assert far.req_sent >= 1
+    assert far.lsdb["n0"]["cksum"] == a.lsdb["n0"]["cksum"]
+    assert sim.wrong_routes() == 0
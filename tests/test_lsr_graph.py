@@ -0,0 +1,133 @@
+from __future__ import annotations
+import random, threading
+
+from dijkstra import INF, IncrementalSPF, dijkstra
+from graph import LinkStateGraph
+from topogen import random_graph
+
+def load(topo, me):
+    ls = LinkStateGraph(me)
+    for u, nbrs in topo.items():
+        ls.set_row(u, nbrs)
+    return ls
+
+def assert_matches_dijkstra(spf, ls, me):
+    ref = dijkstra(ls.csr().to_dict(), me)
+    for v, d in ref.dist.items():
+        assert spf.dist.get(v, INF) == d, (v, spf.dist.get(v), d)
+
+def test_change_between_snapshot_and_spf_is_not_lost():
+    topo = {"A": {"B": 1.0, "C": 5.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"A": 5.0, "B": 1.0}}
+    ls = load(topo, "A")
+    spf = IncrementalSPF("A")
+    spf.update_graph(*ls.snapshot())
+    assert spf.dist["C"] == 2.0
+    g, changed = ls.snapshot()
+    # B-C withdrawn after the snapshot was taken, before SPF runs on it
+    ls.set_row("B", {"A": 1.0})
+    ls.set_row("C", {"A": 5.0})
+    spf.update_graph(g, changed)
+    spf.update_graph(*ls.snapshot())
+    assert spf.dist["C"] == 5.0 and spf.next_hop["C"] == "C"
+
+def test_incremental_matches_full_dijkstra_on_random_changes():
+    rng = random.Random(7)
+    topo = random_graph(200, 4, seed=7)
+    me = "n0"
+    ls = load(topo, me)
+    spf = IncrementalSPF(me)
+    spf.update_graph(*ls.snapshot())
+    for _ in range(100):
+        u = rng.choice(sorted(topo))
+        if not topo[u]:
+            continue
+        v = rng.choice(sorted(topo[u]))
+        w = None if rng.random() < 0.3 else float(rng.randint(1, 10))
+        for a, b in ((u, v), (v, u)):
+            if w is None:
+                topo[a].pop(b, None)
+            else:
+                topo[a][b] = w
+            ls.set_row(a, topo[a])
+        spf.update_graph(*ls.snapshot())
+        assert_matches_dijkstra(spf, ls, me)
+
+def test_concurrent_lsas_and_spf_converge_to_dijkstra():
+    topo = random_graph(300, 4, seed=3)
+    me = "n0"
+    ls = load(topo, me)
+    spf = IncrementalSPF(me)
+    spf.update_graph(*ls.snapshot())
+    names = sorted(topo)
+    stop = threading.Event()
+
+    def lsas():
+        rng = random.Random(3)
+        for _ in range(3000):
+            u = rng.choice(names)
+            ls.set_row(u, {v: float(rng.randint(1, 10)) for v in topo[u]})
+        stop.set()
+
+    t = threading.Thread(target=lsas)
+    t.start()
+    while not stop.is_set():
+        spf.update_graph(*ls.snapshot())
+    t.join()
+    spf.update_graph(*ls.snapshot())
+    assert_matches_dijkstra(spf, ls, me)
+
+def expected_rows(adv):
+    """The two-way rule, written out: u-v is used if both advertise it (lower cost) or v has no LSA."""
+    names = set(adv) | {v for n in adv.values() for v in n}
+    rows = {u: {} for u in names}
+    for u in names:
+        for v in names:
+            a, b = adv.get(u, {}).get(v), adv.get(v, {}).get(u)
+            if a is not None and b is not None:
+                rows[u][v] = min(a, b)
+            elif a is not None and v not in adv or b is not None and u not in adv:
+                rows[u][v] = a if a is not None else b
+    return rows
+
+def test_two_way_check_and_lower_cost():
+    ls = LinkStateGraph("A")
+    ls.set_row("A", {"B": 3.0, "C": 1.0, "X": 2.0})
+    ls.set_row("B", {"A": 2.0})
+    ls.set_row("C", {"D": 1.0})  # C does not confirm A-C
+    g = ls.csr()
+    assert g.row("A") == {"B": 2.0, "X": 2.0}  # X sends no LSA: A's word is enough
+    assert g.row("X") == {"A": 2.0}
+    assert g.row("D") == {"C": 1.0}
+
+def test_patched_csr_matches_a_rebuild_after_random_lsas():
+    rng = random.Random(11)
+    names = [f"n{i}" for i in range(60)]
+    adv = {}
+    ls = LinkStateGraph("n0")
+    for step in range(400):
+        u = rng.choice(names)
+        if rng.random() < 0.1:
+            adv.pop(u, None)
+            ls.remove(u)
+        else:
+            adv[u] = {v: float(rng.randint(1, 9)) for v in rng.sample(names, 4) if v != u}
+            ls.set_row(u, adv[u])
+        if step % 7:
+            continue  # several LSAs between reads: the patch covers all of them
+        g = ls.csr()
+        ref = expected_rows(adv)
+        for u in g.names:
+            assert g.row(u) == ref.get(u, {}), (step, u)
+
+def test_csr_is_reused_until_something_changes():
+    ls = load({"A": {"B": 1.0}, "B": {"A": 1.0}}, "A")
+    g = ls.csr()
+    assert ls.csr() is g
+    assert ls.set_row("B", {"A": 1.0}) is False  # same LSA again
+    assert ls.csr() is g
+    ls.set_row("B", {"A": 4.0})
+    g2 = ls.csr()
+    assert g2 is not g and g2.row("A") == {"B": 1.0} and g.row("A") == {"B": 1.0}
+    ls.set_row("A", {"B": 5.0})
+    assert ls.csr().row("A") == {"B": 4.0}
+    assert g2.row("A") == {"B": 1.0}  # earlier snapshots are never patched in place
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from node import NeighborMetrics, RouterNode
+
+TOPO = {"A": {"B": 1, "C": 1}, "B": {"A": 1}, "C": {"A": 1}}
+
+def test_down_neighbor_drops_rtt_and_cost_series():
+    a = RouterNode("A", {n: n for n in TOPO}, TOPO, mode="dvr", transport="memory", log_level="ERROR",
+                   metrics_port=0)
+    a.metrics.collector(a._collect_metrics)
+    for n in ("B", "C"):
+        nm = a.nei_metrics[n] = NeighborMetrics(last_seen=a._now())
+        nm.sample(4.0)
+    text = a.metrics.render()
+    assert 'router_neighbor_cost{' in text and 'neighbor="B"' in text
+    a._link_down("B")
+    text = a.metrics.render()
+    cost = [l for l in text.splitlines() if l.startswith("router_neighbor_cost{")]
+    assert cost and all('"B"' not in l for l in cost)
+    assert any('"C"' in l for l in cost)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+import threading, time
+
+from async_node import AsyncRouterNode, SharedLoop
+from memnet import MemoryNetwork
+from messages import Message
+from topogen import grid
+
+class Node(AsyncRouterNode):
+    def on_data_local(self, msg):
+        if msg.type == "message":
+            self.rx.append(msg.id)
+
+def test_many_nodes_one_loop_converge_and_deliver():
+    topo = grid(3, 3)
+    net = MemoryNetwork(latency=0.001, seed=1)
+    before = threading.active_count()
+    loop = SharedLoop()
+    nodes = {n: Node(n, {k: k for k in topo}, topo, mode="dvr", transport="memory", network=net,
+                     log_level="ERROR", hello_period=0.2, dead_after=2.0) for n in topo}
+    rx = []
+    for node in nodes.values():
+        node.rx = rx
+    try:
+        loop.start(nodes.values())
+        # one loop thread plus the memnet scheduler, whatever the node count
+        assert threading.active_count() - before <= 2
+        names = sorted(topo)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not all(len(n.fib) == len(topo) - 1 for n in nodes.values()):
+            time.sleep(0.05)
+        nodes[names[0]]._process_msg(Message("message", names[0], names[-1], 8, "x", id="m1", alg="dvr"))
+        while time.monotonic() < deadline and not rx:
+            time.sleep(0.02)
+        assert rx == ["m1"]
+    finally:
+        for node in nodes.values():
+            node.stop()
+        loop.close()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import random
+
+import pytest
+
+from dijkstra import INF, IncrementalSPF, dijkstra
+from graph import LinkStateGraph
+from topogen import grid, random_graph
+
+def events(topo, rng, k):
+    """k symmetric single-link changes (cost up/down, link down), each undone right after."""
+    edges = [(u, v) for u, n in topo.items() for v in n if u < v]
+    out = []
+    for _ in range(k):
+        u, v = rng.choice(edges)
+        w = topo[u][v]
+        kind = rng.choice(("up", "down", "fail"))
+        nw = None if kind == "fail" else (w * 3 if kind == "up" else max(1.0, w / 3))
+        out.append([(u, v, nw), (v, u, nw)])
+        out.append([(u, v, w), (v, u, w)])
+    return out
+
+def apply(topo, deltas):
+    for u, v, w in deltas:
+        if w is None:
+            topo[u].pop(v, None)
+        else:
+            topo[u][v] = w
+
+def check(spf, topo, src):
+    ref = dijkstra(topo, src, ecmp=spf.ecmp)
+    via = {n: dijkstra(topo, n).dist for n in topo[src]}
+    for v, d in ref.dist.items():
+        assert spf.dist.get(v, INF) == d, (v, spf.dist.get(v), d)
+        if v == src or d == INF:
+            continue
+        # any next hop will do as long as it starts a shortest path
+        nh = spf.next_hop[v]
+        assert abs(topo[src][nh] + via[nh][v] - d) <= 1e-9 * d, (v, nh)
+        if spf.ecmp:
+            assert set(spf.next_hops[v]) == set(ref.next_hops[v]), v
+
+TOPOS = [("random", lambda: random_graph(300, 4, seed=5)), ("grid", lambda: grid(12, 12, 1.0, 5.0, seed=5))]
+
+@pytest.mark.parametrize("name,make", TOPOS)
+@pytest.mark.parametrize("ecmp", [False, True])
+def test_apply_matches_dijkstra_after_every_change(name, make, ecmp):
+    topo = make()
+    src = sorted(topo)[0]
+    spf = IncrementalSPF(src, topo, ecmp=ecmp)
+    for d in events(topo, random.Random(1), 40):
+        apply(topo, d)
+        spf.apply(d)
+        check(spf, topo, src)
+    assert spf.incremental_runs == 80 and spf.full_runs == 1
+
+def test_update_syncs_to_a_whole_topology():
+    topo = random_graph(200, 4, seed=2)
+    src = "n0"
+    spf = IncrementalSPF(src, topo, ecmp=True)
+    rng = random.Random(2)
+    for d in events(topo, rng, 10)[::2]:  # changes only, never undone
+        apply(topo, d)
+        spf.update({u: dict(n) for u, n in topo.items()})
+        check(spf, topo, src)
+    assert spf.full_runs == 1
+    # a large change falls back to a full run
+    big = {u: {v: w + 1 for v, w in n.items()} for u, n in topo.items()}
+    spf.update(big)
+    assert spf.full_runs == 2
+    check(spf, big, src)
+
+def test_update_graph_reads_only_changed_rows():
+    topo = random_graph(200, 4, seed=9)
+    src = "n0"
+    ls = LinkStateGraph(src)
+    for u, n in topo.items():
+        ls.set_row(u, n)
+    spf = IncrementalSPF(src, ecmp=True)
+    spf.update_graph(*ls.snapshot())
+    rng = random.Random(9)
+    for d in events(topo, rng, 30):
+        apply(topo, d)
+        for u in {u for u, _, _ in d}:
+            ls.set_row(u, topo[u])
+        spf.update_graph(*ls.snapshot())
+        check(spf, topo, src)
+    assert spf.full_runs == 1
+
+def test_node_cut_off_becomes_unreachable_and_comes_back():
+    topo = {"A": {"B": 1.0}, "B": {"A": 1.0, "C": 1.0}, "C": {"B": 1.0}}
+    spf = IncrementalSPF("A", topo)
+    spf.apply([("B", "C", None), ("C", "B", None)])
+    assert "C" not in spf.dist or spf.dist["C"] == INF
+    spf.apply([("B", "C", 2.0), ("C", "B", 2.0)])
+    assert spf.dist["C"] == 3.0 and spf.next_hop["C"] == "B"
+
+def test_equal_cost_paths_kept_in_next_hops():
+    topo = {"s": {"a": 1, "b": 1}, "a": {"s": 1, "t": 1}, "b": {"s": 1, "t": 1}, "t": {"a": 1, "b": 1}}
+    spf = IncrementalSPF("s", topo, ecmp=True)
+    assert spf.next_hops["t"] == ("a", "b")
+    spf.apply([("b", "t", 3.0)])
+    assert spf.next_hops["t"] == ("a",)
+    spf.apply([("b", "t", 1.0)])
+    assert spf.next_hops["t"] == ("a", "b")
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from throttle import Throttle
+
+def test_first_event_waits_initial_delay_and_burst_coalesces():
+    t = Throttle(initial=0.05, hold=0.2, max_hold=5.0)
+    t.request(100.0)
+    assert t.pending and t.next_due() == 100.05
+    for dt in (0.01, 0.02, 0.03):
+        t.request(100.0 + dt)
+    assert t.next_due() == 100.05 and t.coalesced == 3
+    assert not t.due(100.04) and t.due(100.05)
+
+def test_hold_doubles_while_events_keep_coming():
+    t = Throttle(initial=0.05, hold=0.2, max_hold=1.0)
+    now = 0.0
+    t.request(now)
+    waits = []
+    for _ in range(5):
+        now = t.next_due()
+        t.done(now)
+        t.request(now)  # another event right after every run
+        waits.append(round(t.next_due() - now, 6))
+    assert waits == [0.2, 0.4, 0.8, 1.0, 1.0]
+
+def test_quiet_max_hold_resets_to_initial():
+    t = Throttle(initial=0.05, hold=0.2, max_hold=1.0)
+    t.request(0.0)
+    t.done(0.05)
+    t.request(0.06)
+    t.done(t.next_due())  # 0.25: the hold was used
+    t.request(0.25 + 1.0)  # quiet for max_hold
+    assert t.next_due() == 1.25 + 0.05
+    t.done(1.30)
+    t.request(1.31)
+    assert round(t.next_due(), 6) == 1.50  # hold back at its first step
+
+def test_stats_track_runs_and_time():
+    t = Throttle()
+    t.request(0.0)
+    t.done(0.05, elapsed=0.002)
+    t.request(10.0)
+    t.done(10.05, elapsed=0.004)
+    s = t.stats()
+    assert s["runs"] == 2 and s["events"] == 2
+    assert round(s["max_ms"], 6) == 4.0 and round(s["total_ms"], 6) == 6.0
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from flooding import Flooding
+from messages import Message
+from trace_analyze import Analysis, parse_msg
+
+class Stub:
+    def __init__(self, me, neighbors):
+        self.node_id = me
+        self.neighbors = set(neighbors)
+        self.lines = []
+        self.sent = []
+
+    def _to_wire_id(self, n):
+        return n
+
+    def is_neighbor_active(self, n):
+        return True
+
+    def on_data_local(self, msg):
+        if msg.dst == self.node_id:
+            self._log("INFO", "DATA for me from %s (id=%s): %s", msg.src, msg.id, msg.payload, tag="RECV")
+
+    def _send(self, n, msg):
+        self.sent.append(n)
+
+    def _log(self, level, msg, *args, tag=None, **fields):
+        self.lines.append((tag, msg % args))
+
+def recv_events(node):
+    return [parse_msg(node.node_id, tag, text) for tag, text in node.lines if tag == "RECV"]
+
+def test_broadcast_and_unicast_deliveries_carry_the_message_id():
+    b = Stub("B", ["A", "C"])
+    f = Flooding()
+    f.handle_message(b, Message("message", "A", "*", 8, "to all", id="m-all", prev="A"))
+    f.handle_message(b, Message("message", "A", "B", 8, "to B", id="m-b", prev="A"))
+    assert recv_events(b) == [("recv", {"node": "B", "src": "A", "id": "m-all"}),
+                              ("recv", {"node": "B", "src": "A", "id": "m-b"})]
+    assert b.sent == ["C"]  # a broadcast is also flooded on
+
+def test_broadcast_deliveries_count_in_the_analysis():
+    an = Analysis()
+    an.feed("fwd", {"node": "A", "to": ["B", "C"], "dst": "*", "id": "m-all", "flood": True})
+    for n in ("B", "C"):
+        node = Stub(n, ["A"])
+        Flooding().handle_message(node, Message("message", "A", "*", 8, "x", id="m-all", prev="A"))
+        for kind, ev in recv_events(node):
+            an.feed(kind, ev)
+    rep = an.report(0)
+    assert rep["deliveries"][0]["delivered"] == 2
+    assert rep["flooding"][0]["tx_per_delivery"] == 1.0
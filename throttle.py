@@ -0,0 +1,63 @@
+from __future__ import annotations
+from typing import Dict, Optional
+
+class Throttle:
+    """
+    OSPF-style event throttling (SPF runs, LSA origination).
+
+    The first event after a quiet period is scheduled `initial` seconds out so a
+    burst lands in one run. While events keep coming, the wait between runs
+    starts at `hold` and doubles up to `max_hold`; after a quiet `max_hold`
+    it falls back to `initial`. Times are passed in, so any clock works.
+    """
+    def __init__(self, initial: float = 0.05, hold: float = 0.2, max_hold: float = 5.0):
+        self.initial = float(initial)
+        self.hold = float(hold)
+        self.max_hold = max(float(max_hold), self.hold)
+        self._wait = self.hold
+        self._due: Optional[float] = None
+        self._last_run: Optional[float] = None
+        self.events = 0
+        self.coalesced = 0
+        self.runs = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def pending(self) -> bool:
+        return self._due is not None
+
+    def request(self, now: float) -> None:
+        """Record an event; schedules a run unless one is already pending."""
+        self.events += 1
+        if self._due is not None:
+            self.coalesced += 1
+            return
+        if self._last_run is None or now - self._last_run >= self.max_hold:
+            self._wait = self.hold
+            self._due = now + self.initial
+        else:
+            self._due = max(now + self.initial, self._last_run + self._wait)
+            self._wait = min(self._wait * 2, self.max_hold)
+
+    def due(self, now: float) -> bool:
+        return self._due is not None and now >= self._due
+
+    def next_due(self) -> Optional[float]:
+        return self._due
+
+    def done(self, now: float, elapsed: float = 0.0) -> None:
+        """Mark the pending run as executed at `now`, taking `elapsed` seconds."""
+        self._due = None
+        self._last_run = now
+        self.runs += 1
+        self.last_time = elapsed
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def stats(self) -> Dict[str, float]:
+        return {"runs": self.runs, "events": self.events, "coalesced": self.coalesced,
+                "wait_s": self._wait, "last_ms": self.last_time * 1e3, "max_ms": self.max_time * 1e3,
+                "total_ms": self.total_time * 1e3}
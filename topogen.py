@@ -0,0 +1,70 @@
+from __future__ import annotations
+import random
+from typing import Dict, Optional
+
+# Synthetic topologies in the same shape as config/topo.json after load_topo:
+# {node: {neighbor: cost}}, symmetric, nodes named n0..n{N-1} (or r{row}c{col}).
+Topo = Dict[str, Dict[str, float]]
+
+def _link(t: Topo, a: str, b: str, w: float) -> None:
+    t.setdefault(a, {})[b] = w
+    t.setdefault(b, {})[a] = w
+
+def _cost(rng: random.Random, wmin: float, wmax: float) -> float:
+    return float(rng.randint(int(wmin), int(wmax))) if wmin != wmax else float(wmin)
+
+def line(n: int, w: float = 1.0) -> Topo:
+    t: Topo = {f"n{i}": {} for i in range(n)}
+    for i in range(n - 1):
+        _link(t, f"n{i}", f"n{i + 1}", w)
+    return t
+
+def ring(n: int, w: float = 1.0) -> Topo:
+    t = line(n, w)
+    if n > 2:
+        _link(t, f"n{n - 1}", "n0", w)
+    return t
+
+def grid(rows: int, cols: int, wmin: float = 1.0, wmax: float = 1.0, seed: Optional[int] = 0) -> Topo:
+    rng = random.Random(seed)
+    t: Topo = {f"r{r}c{c}": {} for r in range(rows) for c in range(cols)}
+    for r in range(rows):
+        for c in range(cols):
+            if c + 1 < cols:
+                _link(t, f"r{r}c{c}", f"r{r}c{c + 1}", _cost(rng, wmin, wmax))
+            if r + 1 < rows:
+                _link(t, f"r{r}c{c}", f"r{r + 1}c{c}", _cost(rng, wmin, wmax))
+    return t
+
+def random_graph(n: int, degree: float = 4.0, wmin: float = 1.0, wmax: float = 10.0,
+                 seed: Optional[int] = 0) -> Topo:
+    """Connected random graph: a random spanning tree plus extra links up to ~degree per node."""
+    rng = random.Random(seed)
+    names = [f"n{i}" for i in range(n)]
+    t: Topo = {x: {} for x in names}
+    for i in range(1, n):
+        _link(t, names[i], names[rng.randrange(i)], _cost(rng, wmin, wmax))
+    extra = max(0, int(n * degree / 2) - (n - 1))
+    for _ in range(extra):
+        a, b = rng.randrange(n), rng.randrange(n)
+        if a != b:
+            _link(t, names[a], names[b], _cost(rng, wmin, wmax))
+    return t
+
+def scale_free(n: int, m: int = 2, wmin: float = 1.0, wmax: float = 10.0, seed: Optional[int] = 0) -> Topo:
+    """Barabási–Albert preferential attachment: each new node links to m existing ones."""
+    rng = random.Random(seed)
+    t: Topo = {f"n{i}": {} for i in range(n)}
+    ends: list[int] = []
+    for i in range(min(n, m + 1)):
+        for j in range(i):
+            _link(t, f"n{i}", f"n{j}", _cost(rng, wmin, wmax))
+            ends += [i, j]
+    for i in range(m + 1, n):
+        targets: set[int] = set()
+        while len(targets) < m:
+            targets.add(rng.choice(ends))
+        for j in targets:
+            _link(t, f"n{i}", f"n{j}", _cost(rng, wmin, wmax))
+            ends += [i, j]
+    return t
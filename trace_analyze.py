@@ -0,0 +1,249 @@
+"""
+Offline analysis of node logs and message traces.
+
+    python trace_analyze.py logs/*.log
+    python trace_analyze.py traces.jsonl logs/*_lsr.log --top 10 --json
+
+Reads, line by line (plain or .gz, "-" for stdin):
+  - node logs, text ("[B/FWD] FWD(flood) → C,D (dst=D, id=...)") or JSONL (--log-format jsonl);
+  - TRACE records the destination logs for traced messages (headers.trace);
+  - trace files written by `send_cli.py --load --trace-out`.
+Reports latency per path with a per-hop breakdown (time inside each node, time
+on each link), duplicate deliveries, flood amplification (transmissions per
+flooded message) and the busiest links. Memory grows with the number of
+distinct messages and paths, never with the size of the files.
+"""
+from __future__ import annotations
+import argparse, gzip, json, math, re, sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TEXT_LINE = re.compile(r"^\[([^/\]]+)(?:/([^\]]+))?\] (.*)$")  # older logs: "[A] FWD(flooding) → ..."
+FWD = re.compile(r"FWD(?:\((\w+)\))? → (\S+) \(dst=([^,)]+), (?:id|mid)=([^,)]+)")
+FWD_VIA = re.compile(r"^FWD (\S+) via (\S+)")  # older routed lines, no message id
+RECV = re.compile(r"DATA for (?:me|all) from (\S+) \(id=([^)]+)\)")
+
+class LogHist:
+    """Streaming histogram with ~2.5% wide log buckets: exact count/sum/min/max, approximate percentiles."""
+    RATIO = 1.05
+
+    def __init__(self):
+        self.b: Dict[int, int] = {}
+        self.n = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        self.sum += x
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        k = -10**9 if x <= 0 else int(math.floor(math.log(x, self.RATIO)))
+        self.b[k] = self.b.get(k, 0) + 1
+
+    def pct(self, p: float) -> Optional[float]:
+        if not self.n:
+            return None
+        rank = max(1, math.ceil(p / 100.0 * self.n))
+        acc = 0
+        for k in sorted(self.b):
+            acc += self.b[k]
+            if acc >= rank:
+                v = 0.0 if k == -10**9 else self.RATIO ** (k + 0.5)
+                return min(max(v, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.n if self.n else None
+
+# ---------- input ----------
+
+def open_lines(path: str) -> Iterator[str]:
+    if path == "-":
+        yield from sys.stdin
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        yield from f
+
+def events(paths: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """("trace"|"fwd"|"recv", fields) for every line that carries one; other lines are skipped."""
+    for path in paths:
+        for line in open_lines(path):
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] == "{":
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if "trace" in rec and "tag" not in rec:  # send_cli --trace-out
+                    yield "trace", rec
+                    continue
+                node, tag, msg = rec.get("node"), str(rec.get("tag", "")), rec.get("msg", "")
+            else:
+                m = TEXT_LINE.match(line)
+                if not m:
+                    continue
+                node, tag, msg = m.groups()
+                if tag is None:
+                    tag = msg.split("(", 1)[0].split(" ", 1)[0]
+            ev = parse_msg(node, tag.upper(), msg)
+            if ev is not None:
+                yield ev
+
+def parse_msg(node: str, tag: str, msg: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    if tag == "TRACE":
+        try:
+            return "trace", json.loads(msg)
+        except ValueError:
+            return None
+    if tag == "FWD":
+        m = FWD.search(msg)
+        if m:
+            how, to, dst, mid = m.groups()
+            return "fwd", {"node": node, "to": to.split(","), "dst": dst, "id": mid, "flood": how is not None}
+        m = FWD_VIA.match(msg)
+        if m:
+            return "fwd", {"node": node, "to": [m.group(2)], "dst": m.group(1), "id": None, "flood": False}
+        return None
+    if tag == "RECV":
+        m = RECV.search(msg)
+        if m:
+            return "recv", {"node": node, "src": m.group(1), "id": m.group(2)}
+    return None
+
+# ---------- analysis ----------
+
+class Analysis:
+    def __init__(self):
+        self.paths: Dict[str, Dict[str, Any]] = {}   # "A>B>D" -> e2e hist + per-segment hists
+        self.trace_ids: Dict[str, int] = {}
+        self.recv: Dict[Tuple[str, str], int] = {}   # (node, id) -> deliveries
+        self.link_tx: Dict[Tuple[str, str], int] = {}
+        self.link_lat: Dict[Tuple[str, str], LogHist] = {}
+        self.flood_ids: set = set()
+        self.flood_tx = 0
+        self.routed_tx = 0
+        self.lines = {"trace": 0, "fwd": 0, "recv": 0}
+
+    def feed(self, kind: str, ev: Dict[str, Any]) -> None:
+        self.lines[kind] += 1
+        getattr(self, "_" + kind)(ev)
+
+    def _trace(self, ev: Dict[str, Any]) -> None:
+        hops = [h for h in ev.get("trace") or [] if isinstance(h, dict) and "n" in h]
+        if not hops:
+            return
+        mid = str(ev.get("id", ""))
+        self.trace_ids[mid] = self.trace_ids.get(mid, 0) + 1
+        key = ">".join(str(h["n"]) for h in hops)
+        p = self.paths.get(key)
+        if p is None:
+            p = self.paths[key] = {"e2e": LogHist(), "seg": {}}
+        first, last = hops[0], hops[-1]
+        start = first.get("rx", first.get("tx"))
+        end = last.get("rx", last.get("tx"))
+        if start is not None and end is not None:
+            p["e2e"].add(end - start)
+        seg = p["seg"]
+        for i, h in enumerate(hops):
+            if "rx" in h and "tx" in h:
+                seg.setdefault(str(h["n"]), LogHist()).add(h["tx"] - h["rx"])
+            if i + 1 < len(hops):
+                nxt = hops[i + 1]
+                link = (str(h["n"]), str(nxt["n"]))
+                if "tx" in h and "rx" in nxt:
+                    d = nxt["rx"] - h["tx"]
+                    seg.setdefault(f"{link[0]}>{link[1]}", LogHist()).add(d)
+                    self.link_lat.setdefault(link, LogHist()).add(d)
+
+    def _fwd(self, ev: Dict[str, Any]) -> None:
+        for to in ev["to"]:
+            link = (ev["node"], to)
+            self.link_tx[link] = self.link_tx.get(link, 0) + 1
+        if ev["flood"]:
+            self.flood_ids.add(ev["id"])
+            self.flood_tx += len(ev["to"])
+        else:
+            self.routed_tx += len(ev["to"])
+
+    def _recv(self, ev: Dict[str, Any]) -> None:
+        k = (ev["node"], ev["id"])
+        self.recv[k] = self.recv.get(k, 0) + 1
+
+    # ---------- report ----------
+    def report(self, top: int) -> Dict[str, List[Dict[str, Any]]]:
+        r3 = lambda v: None if v is None else round(v, 3)
+        paths = []
+        for key, p in sorted(self.paths.items(), key=lambda kv: -kv[1]["e2e"].n):
+            e = p["e2e"]
+            # breakdown in path order: node residence and link time, mean ms
+            order, names = [], key.split(">")
+            for i, n in enumerate(names):
+                order.append(n)
+                if i + 1 < len(names):
+                    order.append(f"{n}>{names[i + 1]}")
+            parts = [f"{s} {p['seg'][s].mean:.3f}" for s in order if s in p["seg"]]
+            paths.append({"path": key, "n": e.n, "p50_ms": r3(e.pct(50)), "p95_ms": r3(e.pct(95)),
+                          "p99_ms": r3(e.pct(99)), "max_ms": r3(e.max if e.n else None),
+                          "mean_ms": r3(e.mean), "breakdown_ms": " | ".join(parts)})
+        delivered = len(self.recv)
+        dup_recv = sum(c - 1 for c in self.recv.values() if c > 1)
+        dup_trace = sum(c - 1 for c in self.trace_ids.values() if c > 1)
+        deliveries = [{"delivered": delivered, "duplicate_deliveries": dup_recv,
+                       "dup_pct": r3(100.0 * dup_recv / (delivered + dup_recv)) if delivered else 0.0,
+                       "traced": len(self.trace_ids), "duplicate_traces": dup_trace}]
+        nflood = len(self.flood_ids)
+        flood_recv = sum(1 for (_, mid) in self.recv if mid in self.flood_ids)
+        flooding = [{"flooded_msgs": nflood, "flood_tx": self.flood_tx,
+                     "tx_per_msg": r3(self.flood_tx / nflood) if nflood else None,
+                     "tx_per_delivery": r3(self.flood_tx / flood_recv) if flood_recv else None,
+                     "routed_tx": self.routed_tx}]
+        total_tx = sum(self.link_tx.values())
+        links = self.link_tx or {k: h.n for k, h in self.link_lat.items()}
+        total = total_tx or sum(links.values())
+        hot = []
+        for (a, b), n in sorted(links.items(), key=lambda kv: -kv[1])[:top]:
+            lat = self.link_lat.get((a, b))
+            hot.append({"link": f"{a}>{b}", "tx": n, "share_pct": r3(100.0 * n / total) if total else 0.0,
+                        "p50_ms": r3(lat.pct(50)) if lat else None, "mean_ms": r3(lat.mean) if lat else None})
+        return {"paths": paths[:top] if top else paths, "deliveries": deliveries, "flooding": flooding,
+                "hot_links": hot}
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    print(f"\n== {title} ==")
+    if not rows:
+        print("(none)")
+        return
+    cols = list(rows[0])
+    fmt = lambda v: "-" if v is None else (f"{v:.3f}" if isinstance(v, float) else str(v))
+    width = {c: max(len(c), *(len(fmt(r.get(c))) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(width[c]) for c in cols))
+    for r in rows:
+        print("  ".join(fmt(r.get(c)).ljust(width[c]) for c in cols))
+
+def main():
+    ap = argparse.ArgumentParser(description="Latency per path, duplicates, flood amplification and hot links "
+                                             "from node logs and traces")
+    ap.add_argument("files", nargs="+", help="log/trace files (.gz ok, - for stdin)")
+    ap.add_argument("--top", type=int, default=20, help="rows per table for paths and links (0 = all paths)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    an = Analysis()
+    for kind, ev in events(args.files):
+        an.feed(kind, ev)
+    rep = an.report(args.top)
+    if args.json:
+        print(json.dumps({"lines": an.lines, **rep}))
+        return
+    print(f"events: {an.lines}")
+    print_table("latency per path (trace rx at the source to rx at the destination)", rep["paths"])
+    print_table("deliveries", rep["deliveries"])
+    print_table("flooding", rep["flooding"])
+    print_table("hot links", rep["hot_links"])
+
+if __name__ == "__main__":
+    main()